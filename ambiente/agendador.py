@@ -0,0 +1,163 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+import gspread
+
+# Cotas da API do Google Sheets por usuário (a conta de serviço é um único usuário): 60 leituras e 60 escritas por minuto
+LEITURAS_POR_MINUTO = 60
+ESCRITAS_POR_MINUTO = 60
+
+# Novas tentativas em erros de cota (429) e indisponibilidade (5xx)
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+MAX_TENTATIVAS = 6
+ESPERA_BASE = 1.0  # segundos
+ESPERA_MAXIMA = 64.0  # segundos
+
+
+class BaldeDeFichas:
+    """
+    Token bucket: libera `por_minuto` requisições por minuto, com rajadas de até `capacidade`.
+    Quem chega com o balde vazio reserva a próxima ficha e espera por ela (ordem de chegada).
+    """
+
+    def __init__(self, por_minuto, capacidade=None):
+        self.taxa = por_minuto / 60
+        self.capacidade = capacidade or por_minuto
+        self.fichas = float(self.capacidade)
+        self.atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """
+        Consome uma ficha, esperando se necessário. Retorna o tempo de espera em segundos.
+        """
+        with self._lock:
+            agora = time.monotonic()
+            self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+            self.atualizado_em = agora
+            self.fichas -= 1
+            espera = -self.fichas / self.taxa if self.fichas < 0 else 0.0
+        if espera:
+            time.sleep(espera)
+        return espera
+
+
+def status_do_erro(erro):
+    """
+    Código HTTP de um erro da API do gspread (None se não houver resposta).
+    """
+    codigo = getattr(erro, "code", None)
+    if isinstance(codigo, int):
+        return codigo
+    return getattr(getattr(erro, "response", None), "status_code", None)
+
+
+class AgendadorRequisicoes:
+    """
+    Ponto único de passagem das chamadas à API do Google Sheets:
+    limita a taxa por cota (leitura/escrita), repete com backoff exponencial e jitter em 429/5xx,
+    junta leituras idênticas simultâneas em uma só chamada e contabiliza o que foi enfileirado e limitado.
+    """
+
+    def __init__(self, leituras_por_minuto=LEITURAS_POR_MINUTO, escritas_por_minuto=ESCRITAS_POR_MINUTO):
+        self.baldes = {
+            "leitura": BaldeDeFichas(leituras_por_minuto),
+            "escrita": BaldeDeFichas(escritas_por_minuto)
+        }
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # chave da leitura -> Future com o resultado
+        self._metricas = {
+            "chamadas": 0, "em_fila": 0, "limitadas": 0, "espera_limite": 0.0,
+            "novas_tentativas": 0, "espera_backoff": 0.0, "falhas": 0, "coalescidas": 0
+        }
+
+    def _somar(self, **valores):
+        with self._lock:
+            for nome, valor in valores.items():
+                self._metricas[nome] += valor
+
+    def _esperar_ficha(self, tipo):
+        self._somar(em_fila=1)
+        try:
+            espera = self.baldes[tipo].adquirir()
+        finally:
+            self._somar(em_fila=-1)
+        if espera:
+            self._somar(limitadas=1, espera_limite=espera)
+
+    def _com_novas_tentativas(self, tipo, idempotente, funcao, args, kwargs):
+        tentativa = 0
+        while True:
+            self._esperar_ficha(tipo)
+            self._somar(chamadas=1)
+            try:
+                return funcao(*args, **kwargs)
+            except gspread.exceptions.APIError as erro:
+                status = status_do_erro(erro)
+                # Escrita não idempotente (ex.: appendCells) só é repetida em 429, quando a API garantidamente a recusou
+                retentavel = status == 429 or (idempotente and status in STATUS_RETENTAVEIS)
+                tentativa += 1
+                if not retentavel or tentativa >= MAX_TENTATIVAS:
+                    self._somar(falhas=1)
+                    raise
+                # Backoff exponencial com "full jitter"
+                espera = random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+                self._somar(novas_tentativas=1, espera_backoff=espera)
+                time.sleep(espera)
+
+    def executar(self, tipo, funcao, *args, chave=None, idempotente=True, **kwargs):
+        """
+        Executa `funcao(*args, **kwargs)` respeitando a cota do `tipo` ("leitura" ou "escrita").
+        Leituras com a mesma `chave` em andamento ao mesmo tempo recebem o mesmo resultado (não altere-o).
+        """
+        if chave is None:
+            return self._com_novas_tentativas(tipo, idempotente, funcao, args, kwargs)
+
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = Future()
+                self._em_andamento[chave] = futuro
+            else:
+                self._metricas["coalescidas"] += 1
+        if not dono:
+            return futuro.result()
+
+        try:
+            resultado = self._com_novas_tentativas(tipo, idempotente, funcao, args, kwargs)
+            futuro.set_result(resultado)
+            return resultado
+        except BaseException as erro:
+            futuro.set_exception(erro)
+            raise
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+
+    def metricas(self):
+        """
+        Cópia dos contadores: chamadas feitas, em fila agora, limitadas pelo balde (e segundos de espera),
+        novas tentativas (e segundos de backoff), falhas definitivas e leituras coalescidas.
+        """
+        with self._lock:
+            return dict(self._metricas)
+
+
+# Agendador do processo, compartilhado por todas as sessões do Streamlit
+agendador = AgendadorRequisicoes()
+
+
+def ler(funcao, *args, chave=None, **kwargs):
+    """
+    Chamada de leitura à API pelo agendador do processo.
+    """
+    return agendador.executar("leitura", funcao, *args, chave=chave, **kwargs)
+
+
+def escrever(funcao, *args, idempotente=True, **kwargs):
+    """
+    Chamada de escrita à API pelo agendador do processo.
+    """
+    return agendador.executar("escrita", funcao, *args, idempotente=idempotente, **kwargs)
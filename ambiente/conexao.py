@@ -0,0 +1,159 @@
+import os
+import threading
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+from ambiente.agendador import ler, status_do_erro
+from ambiente.metricas import instrumentar_cliente
+
+# Caminho para acessar a chave JSON (mesma pasta deste arquivo)
+DIR_ATUAL = os.path.dirname(os.path.abspath(__file__))
+path_chave_json = os.path.join(DIR_ATUAL, "chave.json")
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/spreadsheets"
+]
+
+# 🔹 Pool de conexões do processo (sobrevive aos reruns do Streamlit e é compartilhado entre sessões)
+_lock = threading.Lock()  # só para os dicionários abaixo (operações rápidas, nunca durante chamadas à API)
+_lock_cliente = threading.Lock()
+_credenciais = None
+_cliente = None
+_planilhas = {}  # nome da planilha -> Spreadsheet
+_abas = {}  # (nome da planilha, título da aba) -> Worksheet
+
+# nome da planilha -> RLock da abertura (uma abertura por planilha; as demais planilhas não esperam)
+_locks_planilhas = {}
+
+
+def _lock_planilha(nome_planilha):
+    with _lock:
+        return _locks_planilhas.setdefault(nome_planilha, threading.RLock())
+
+
+def obter_cliente():
+    """
+    Retorna o cliente gspread autorizado uma única vez por processo, renovando o token quando expira.
+    """
+    global _credenciais, _cliente
+    with _lock_cliente:
+        if _cliente is None:
+            _credenciais = ServiceAccountCredentials.from_json_keyfile_name(path_chave_json, SCOPE)
+            _cliente = gspread.authorize(_credenciais)
+            instrumentar_cliente(_cliente)
+        elif getattr(_credenciais, "access_token_expired", False) and hasattr(_cliente, "login"):
+            # Versões do gspread baseadas em oauth2client renovam o token via login()
+            _cliente.login()
+        return _cliente
+
+
+def abrir_planilha(client, nome_planilha):
+    """
+    Retorna o objeto Spreadsheet já aberto, evitando a busca no Drive a cada rerun.
+    A abertura (que pode esperar pela cota) não bloqueia quem usa outras planilhas ou já tem a sua aberta.
+    """
+    with _lock:
+        spreadsheet = _planilhas.get(nome_planilha)
+    if spreadsheet is not None:
+        return spreadsheet
+
+    with _lock_planilha(nome_planilha):
+        # Outra thread pode ter aberto a planilha enquanto esta esperava
+        with _lock:
+            spreadsheet = _planilhas.get(nome_planilha)
+        if spreadsheet is None:
+            spreadsheet = ler(client.open, nome_planilha, chave=("open", nome_planilha))
+            with _lock:
+                _planilhas[nome_planilha] = spreadsheet
+        return spreadsheet
+
+
+def _carregar_abas(client, nome_planilha):
+    # Uma única chamada de metadados traz todas as abas da planilha (chamada com o lock da planilha)
+    spreadsheet = abrir_planilha(client, nome_planilha)
+    abas = ler(spreadsheet.worksheets, chave=("worksheets", nome_planilha))
+    with _lock:
+        for sheet in abas:
+            _abas[(nome_planilha, sheet.title)] = sheet
+
+
+def abrir_aba(client, nome_planilha, titulo_aba):
+    """
+    Retorna a Worksheet pelo título. Na primeira consulta (ou quando a aba é desconhecida)
+    todas as abas da planilha são carregadas de uma vez com uma única chamada de metadados.
+    """
+    with _lock:
+        aba = _abas.get((nome_planilha, titulo_aba))
+    if aba is not None:
+        return aba
+
+    with _lock_planilha(nome_planilha):
+        with _lock:
+            aba = _abas.get((nome_planilha, titulo_aba))
+        if aba is None:
+            _carregar_abas(client, nome_planilha)
+            with _lock:
+                aba = _abas.get((nome_planilha, titulo_aba))
+        if aba is None:
+            raise gspread.exceptions.WorksheetNotFound(titulo_aba)
+        return aba
+
+
+def _titulos_carregados(nome_planilha):
+    with _lock:
+        return [titulo for planilha, titulo in _abas if planilha == nome_planilha]
+
+
+def titulos_abas(client, nome_planilha):
+    """
+    Títulos das abas existentes na planilha (carregados uma vez e mantidos no pool).
+    """
+    titulos = _titulos_carregados(nome_planilha)
+    if titulos:
+        return titulos
+
+    with _lock_planilha(nome_planilha):
+        titulos = _titulos_carregados(nome_planilha)
+        if not titulos:
+            _carregar_abas(client, nome_planilha)
+            titulos = _titulos_carregados(nome_planilha)
+        return titulos
+
+
+def descartar_conexoes(nome_planilha=None):
+    """
+    Esquece as planilhas/abas em cache (todas ou apenas as de uma planilha), forçando nova abertura.
+    """
+    with _lock:
+        if nome_planilha is None:
+            _planilhas.clear()
+            _abas.clear()
+            return
+        _planilhas.pop(nome_planilha, None)
+        for chave in [chave for chave in _abas if chave[0] == nome_planilha]:
+            del _abas[chave]
+
+
+def conexao_obsoleta(erro):
+    """
+    Indica se o erro vem de uma aba/planilha guardada no pool que não existe mais com aquele id ou título
+    (apagada ou renomeada direto no Google Sheets).
+    """
+    if isinstance(erro, (gspread.exceptions.WorksheetNotFound, gspread.exceptions.SpreadsheetNotFound)):
+        return True
+    return isinstance(erro, gspread.exceptions.APIError) and status_do_erro(erro) in (400, 404)
+
+
+def com_reconexao(nome_planilha, operacao):
+    """
+    Executa `operacao()` (que abre as abas pelo pool). Se a aba ou a planilha em cache não existe mais,
+    descarta as conexões da planilha e tenta de novo uma única vez, com tudo reaberto.
+    """
+    try:
+        return operacao()
+    except Exception as erro:
+        if not conexao_obsoleta(erro):
+            raise
+        descartar_conexoes(nome_planilha)
+        return operacao()
@@ -1,37 +1,79 @@
+import json
 import os
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import threading
+import time
 import pandas as pd
 import streamlit as st
+from ambiente.agendador import ler
+from ambiente.manutencao import PlanoManutencao
+from ambiente.metricas import medir
+from ambiente.conexao import obter_cliente, abrir_planilha, abrir_aba, descartar_conexoes, titulos_abas, path_chave_json
+from funcoes.arquivos_cache import DIR_CACHE, caminho_arquivo_cache
 
-# Caminho para acessar a chave JSON (deve estar na mesma pasta do app.py ou definir caminho correto)
-DIR_ATUAL = os.path.dirname(os.path.abspath(__file__))  # Obtém o diretório do script
-path_chave_json = os.path.join(DIR_ATUAL, "chave.json")  # Caminho correto do JSON
+# Abas da planilha e seus cabeçalhos
+ABAS_E_CABECALHOS = {
+    "Receitas": ["Data", "Descrição", "Valor", "Meio de Pagamento", "Categoria"],
+    "Despesas": ["Data", "Descrição", "Valor", "Meio de Pagamento", "Categoria"],
+    "Transações": ["Data", "Descrição", "Valor", "Forma de Pagamento", "Categoria", "Tipo"],
+    "Investimentos": ["Ativo", "Valor Investido", "Rentabilidade", "Valor Atual", "Data de Compra", "Data de Venda"],
+    "Análise de Gastos": ["Mês/Ano", "Categoria", "Total Gasto", "Média Mensal", "Percentual do Total", "Recomendação"]
+}
+
+# Tempo (segundos) em que a verificação de abas e cabeçalhos vale para todas as sessões (e reinícios do app)
+TTL_CONFIGURACAO = 6 * 60 * 60
+
+_configuradas = {}  # nome da planilha -> momento da última verificação bem-sucedida
+_lock = threading.Lock()
+
+
+def _caminho_configuracao(nome_planilha):
+    return caminho_arquivo_cache("configuracao", nome_planilha, "json")
+
+
+def planilha_configurada(nome_planilha):
+    """
+    Indica se as abas e cabeçalhos foram verificados há menos de TTL_CONFIGURACAO (em memória ou no disco).
+    """
+    with _lock:
+        verificada_em = _configuradas.get(nome_planilha)
+        if verificada_em is None and os.path.exists(_caminho_configuracao(nome_planilha)):
+            try:
+                with open(_caminho_configuracao(nome_planilha), "r", encoding="utf-8") as arquivo:
+                    verificada_em = json.load(arquivo)["verificada_em"]
+            except (OSError, ValueError, KeyError):
+                verificada_em = None
+            _configuradas[nome_planilha] = verificada_em
+        return verificada_em is not None and time.time() - verificada_em < TTL_CONFIGURACAO
+
+
+def marcar_configurada(nome_planilha):
+    with _lock:
+        agora = time.time()
+        _configuradas[nome_planilha] = agora
+        os.makedirs(DIR_CACHE, exist_ok=True)
+        with open(_caminho_configuracao(nome_planilha), "w", encoding="utf-8") as arquivo:
+            json.dump({"verificada_em": agora}, arquivo)
 
 
 def config_ambiente():
     """
     Configura a conexão com o Google Sheets e verifica a necessidade de configuração inicial.
     """
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/spreadsheets"
-    ]
-
     if not os.path.exists(path_chave_json):
         st.error("❌ Chave JSON não encontrada! Certifique-se de que 'chave.json' está no diretório correto.")
         return None
 
     try:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(path_chave_json, scope)
-        client = gspread.authorize(creds)
+        # Cliente autorizado uma única vez por processo (pool compartilhado entre reruns e sessões)
+        with medir("config.cliente"):
+            client = obter_cliente()
         st.success("✅ Conexão bem-sucedida com Google Sheets!")
 
-        # ✅ Se ainda não configurou a planilha nesta sessão, configura agora
-        if not st.session_state.get("planilha_configurada", False):
-            criar_abas_e_cabecalhos(client, "Controle Financeiro")
-            st.session_state["planilha_configurada"] = True  # Marca como configurada
+        # ✅ Verificação de abas e cabeçalhos compartilhada entre sessões, refeita só depois do TTL
+        if not planilha_configurada("Controle Financeiro"):
+            with medir("config.abas_e_cabecalhos"):
+                if criar_abas_e_cabecalhos(client, "Controle Financeiro"):
+                    marcar_configurada("Controle Financeiro")
 
         config_print()
         return client
@@ -44,41 +86,47 @@ def config_ambiente():
 def criar_abas_e_cabecalhos(client, nome_planilha):
     """
     Configura as abas e cabeçalhos na planilha do Google Sheets (somente na primeira execução).
+    Usa no máximo quatro chamadas: abertura da planilha e metadados (relidos a cada verificação), leitura da
+    linha 1 de todas as abas em lote e um único batchUpdate com a criação das abas faltantes e só os cabeçalhos que diferem.
+    Retorna True se a planilha ficou configurada.
     """
     try:
-        spreadsheet = client.open(nome_planilha)
-
-        abas_e_cabecalhos = {
-            "Receitas": ["Data", "Descrição", "Valor", "Meio de Pagamento", "Categoria"],
-            "Despesas": ["Data", "Descrição", "Valor", "Meio de Pagamento", "Categoria"],
-            "Transações": ["Data", "Descrição", "Valor", "Forma de Pagamento", "Categoria", "Tipo"],
-            "Investimentos": ["Ativo", "Valor Investido", "Rentabilidade", "Valor Atual", "Data de Compra", "Data de Venda"],
-            "Análise de Gastos": ["Mês/Ano", "Categoria", "Total Gasto", "Média Mensal", "Percentual do Total", "Recomendação"]
-        }
-
-        abas_existentes = {sheet.title for sheet in spreadsheet.worksheets()}
-
-        # Criar abas que não existem
-        for aba, cabecalho in abas_e_cabecalhos.items():
-            if aba not in abas_existentes:
-                spreadsheet.add_worksheet(title=aba, rows="100", cols="10")
-                sheet = spreadsheet.worksheet(aba)
-                sheet.append_row(cabecalho)
-                st.success(f"📂 Aba '{aba}' criada e cabeçalho adicionado!")
-
-        # Corrigir cabeçalhos das abas existentes (somente se houver erro)
-        for aba, cabecalho in abas_e_cabecalhos.items():
-            sheet = spreadsheet.worksheet(aba)
-            dados = sheet.get_all_values()
-
-            if not dados or dados[0] != cabecalho:
-                sheet.update(range_name='A1', values=[cabecalho])
+        # Abas apagadas ou renomeadas desde a última verificação: a lista de abas do pool é relida
+        descartar_conexoes(nome_planilha)
+        spreadsheet = abrir_planilha(client, nome_planilha)
+        abas_existentes = {titulo: abrir_aba(client, nome_planilha, titulo) for titulo in titulos_abas(client, nome_planilha)}
+        abas_faltantes = [aba for aba in ABAS_E_CABECALHOS if aba not in abas_existentes]
+
+        # Ler apenas a linha 1 de todas as abas já existentes em uma única chamada
+        abas_para_verificar = [aba for aba in ABAS_E_CABECALHOS if aba in abas_existentes]
+        cabecalhos_atuais = {}
+        if abas_para_verificar:
+            intervalos = [f"'{aba}'!1:1" for aba in abas_para_verificar]
+            resposta = ler(spreadsheet.values_batch_get, intervalos, chave=("values_batch_get", nome_planilha, *intervalos))
+            for aba, intervalo in zip(abas_para_verificar, resposta.get("valueRanges", [])):
+                valores = intervalo.get("values", [])
+                cabecalhos_atuais[aba] = valores[0] if valores else []
+
+        # Abas faltantes e cabeçalhos divergentes no mesmo plano, enviado em uma única chamada
+        plano = PlanoManutencao(spreadsheet, abas_existentes.values())
+        for aba, cabecalho in ABAS_E_CABECALHOS.items():
+            if aba in abas_faltantes:
+                id_aba = plano.criar_aba(aba)
+            else:
+                id_aba = abas_existentes[aba].id
+            if plano.escrever_linhas(id_aba, [cabecalhos_atuais.get(aba, [])], [cabecalho]) and aba not in abas_faltantes:
                 st.warning(f"⚠️ Cabeçalho da aba '{aba}' atualizado.")
+        plano.aplicar()
+
+        for aba in abas_faltantes:
+            st.success(f"📂 Aba '{aba}' criada e cabeçalho adicionado!")
 
         st.success("✅ Planilha configurada corretamente!")
+        return True
 
     except Exception as e:
         st.error(f"❌ Erro ao configurar a planilha: {e}")
+        return False
 
 
 def config_print():
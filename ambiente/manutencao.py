@@ -0,0 +1,131 @@
+import threading
+from ambiente.agendador import escrever
+
+# Tamanho das abas criadas pela manutenção
+LINHAS_ABA_NOVA = 100
+COLUNAS_ABA_NOVA = 10
+
+_grades = {}  # (planilha, id da aba) -> [linhas, colunas] da grade conhecidos após as últimas expansões
+_lock = threading.Lock()
+
+
+def _celula(valor):
+    # Célula sem userEnteredValue (com fields="userEnteredValue") é apagada; stringValue equivale ao RAW
+    if valor is None or valor == "":
+        return {}
+    return {"userEnteredValue": {"stringValue": str(valor)}}
+
+
+def blocos_alterados(atuais, desejadas, largura=None):
+    """
+    Compara as linhas atuais com as desejadas e agrupa as diferentes em blocos contíguos.
+    Linhas atuais sobrando viram linhas vazias (apagadas); as desejadas são completadas com "" até a largura.
+    Retorna [(índice da primeira linha, linhas do bloco)].
+    """
+    largura = largura or max((len(linha) for linha in [*atuais, *desejadas]), default=0)
+
+    def completar(linha):
+        return (list(linha) + [""] * largura)[:largura]
+
+    total = max(len(atuais), len(desejadas))
+    blocos = []
+    inicio = None
+    for i in range(total + 1):
+        desejada = completar(desejadas[i]) if i < len(desejadas) else [""] * largura
+        mudou = i < total and (i >= len(atuais) or completar(atuais[i]) != desejada)
+        if mudou and inicio is None:
+            inicio, valores = i, []
+        if mudou:
+            valores.append(desejada)
+        elif inicio is not None:
+            blocos.append((inicio, valores))
+            inicio = None
+    return blocos
+
+
+class PlanoManutencao:
+    """
+    Alterações de estrutura (abas, tamanho da grade) e de conteúdo de uma planilha, acumuladas para
+    serem enviadas em um único spreadsheets.batchUpdate, só com as células que mudaram.
+    `abas` são as Worksheets existentes (para conhecer ids e tamanhos das grades).
+    """
+
+    def __init__(self, spreadsheet, abas=()):
+        self.spreadsheet = spreadsheet
+        self.requisicoes = []
+        self.idempotente = True
+        self._chave = getattr(spreadsheet, "id", None) or spreadsheet.title
+        self._ids = {aba.id for aba in abas}
+        self._grades = {}
+        with _lock:
+            for aba in abas:
+                conhecida = _grades.get((self._chave, aba.id), [0, 0])
+                self._grades[aba.id] = [max(aba.row_count, conhecida[0]), max(aba.col_count, conhecida[1])]
+
+    def __bool__(self):
+        return bool(self.requisicoes)
+
+    def criar_aba(self, titulo, linhas=LINHAS_ABA_NOVA, colunas=COLUNAS_ABA_NOVA):
+        """
+        Acrescenta a criação da aba ao plano, com id escolhido aqui para o conteúdo entrar no mesmo envio.
+        """
+        id_aba = max(self._ids, default=0) + 1
+        self._ids.add(id_aba)
+        self._grades[id_aba] = [linhas, colunas]
+        self.requisicoes.append({"addSheet": {"properties": {
+            "sheetId": id_aba, "title": titulo, "gridProperties": {"rowCount": linhas, "columnCount": colunas}
+        }}})
+        # addSheet repetido falha (título duplicado) ou duplicaria a aba: não pode ser repetido após um 5xx
+        self.idempotente = False
+        return id_aba
+
+    def _garantir_grade(self, id_aba, linhas, colunas):
+        # updateCells, ao contrário da API de valores, não expande a grade sozinho
+        grade = self._grades.setdefault(id_aba, [0, 0])
+        for indice, (dimensao, necessario) in enumerate((("ROWS", linhas), ("COLUMNS", colunas))):
+            if necessario > grade[indice]:
+                self.requisicoes.append({"appendDimension": {
+                    "sheetId": id_aba, "dimension": dimensao, "length": necessario - grade[indice]
+                }})
+                grade[indice] = necessario
+
+    def escrever_linhas(self, id_aba, atuais, desejadas, linha_inicial=0, coluna_inicial=0):
+        """
+        Acrescenta ao plano a gravação só dos blocos de linhas que diferem entre `atuais` e `desejadas`
+        (linhas a partir de `linha_inicial`, índice 0 = linha 1 da planilha). Retorna quantas linhas serão gravadas.
+        """
+        gravadas = 0
+        for inicio, valores in blocos_alterados(atuais, desejadas):
+            self._garantir_grade(id_aba, linha_inicial + inicio + len(valores), coluna_inicial + len(valores[0]))
+            self.requisicoes.append({"updateCells": {
+                "start": {"sheetId": id_aba, "rowIndex": linha_inicial + inicio, "columnIndex": coluna_inicial},
+                "rows": [{"values": [_celula(valor) for valor in linha]} for linha in valores],
+                "fields": "userEnteredValue"
+            }})
+            gravadas += len(valores)
+        return gravadas
+
+    def limpar_a_partir(self, id_aba, linha):
+        """
+        Apaga o conteúdo de todas as linhas a partir de `linha` (índice 0 = linha 1 da planilha).
+        """
+        if linha < self._grades.get(id_aba, [linha + 1])[0]:
+            self.requisicoes.append({"updateCells": {
+                "range": {"sheetId": id_aba, "startRowIndex": linha},
+                "fields": "userEnteredValue"
+            }})
+
+    def aplicar(self):
+        """
+        Envia o plano em um único batchUpdate (nada é enviado se não houver alterações). Retorna o número de requisições.
+        """
+        if not self.requisicoes:
+            return 0
+        escrever(self.spreadsheet.batch_update, {"requests": self.requisicoes}, idempotente=self.idempotente)
+        with _lock:
+            for id_aba, grade in self._grades.items():
+                _grades[(self._chave, id_aba)] = list(grade)
+        enviadas = len(self.requisicoes)
+        self.requisicoes = []
+        self.idempotente = True
+        return enviadas
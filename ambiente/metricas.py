@@ -0,0 +1,176 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from funcoes.arquivos_cache import caminho_temporario
+
+# Orçamento de latência (segundos) por página/rotina, para destacar as rodadas que estouram
+ORCAMENTO_LATENCIA = {
+    "Visão Geral": 0.5,
+    "Adicionar Transação": 1.0,
+    "Visualizar Transações": 1.5,
+    "Análise de Gastos": 2.0,
+    "Relatórios": 3.0,
+    "Importar Transações (CSV)": 10.0,
+    "Sincronização Nubank": 60.0
+}
+
+# Quantas rodadas recentes ficam guardadas para o painel
+HISTORICO_RODADAS = 50
+
+# Se definido, o export Prometheus é gravado neste arquivo ao fim de cada rodada (textfile collector)
+ARQUIVO_EXPORTACAO = os.environ.get("METRICAS_ARQUIVO")
+
+_rodada_atual = contextvars.ContextVar("rodada_atual", default=None)
+_lock = threading.Lock()
+_etapas = {}  # etapa -> {"contagem", "total", "maximo"} (acumulado do processo)
+_api = {"chamadas": 0, "bytes_enviados": 0, "bytes_recebidos": 0}
+_rodadas = deque(maxlen=HISTORICO_RODADAS)
+
+
+def iniciar_rodada(pagina):
+    """
+    Começa a medição de uma rodada (um rerun do Streamlit ou uma sincronização) na thread atual.
+    """
+    rodada = {
+        "pagina": pagina,
+        "inicio": time.time(),
+        "duracao": None,
+        "etapas": [],
+        "chamadas_api": 0,
+        "bytes_enviados": 0,
+        "bytes_recebidos": 0
+    }
+    rodada["_relogio"] = time.perf_counter()
+    _rodada_atual.set(rodada)
+    return rodada
+
+
+def finalizar_rodada():
+    """
+    Encerra a rodada atual, guarda no histórico e retorna o resumo (None se não havia rodada).
+    """
+    rodada = _rodada_atual.get()
+    if rodada is None:
+        return None
+    _rodada_atual.set(None)
+
+    rodada["duracao"] = time.perf_counter() - rodada.pop("_relogio")
+    orcamento = ORCAMENTO_LATENCIA.get(rodada["pagina"])
+    rodada["orcamento"] = orcamento
+    rodada["estourou"] = orcamento is not None and rodada["duracao"] > orcamento
+    with _lock:
+        _rodadas.append(rodada)
+
+    if ARQUIVO_EXPORTACAO:
+        temporario = caminho_temporario(ARQUIVO_EXPORTACAO)
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(exportar_prometheus())
+        os.replace(temporario, ARQUIVO_EXPORTACAO)
+    return rodada
+
+
+def registrar_etapa(etapa, duracao):
+    with _lock:
+        acumulado = _etapas.setdefault(etapa, {"contagem": 0, "total": 0.0, "maximo": 0.0})
+        acumulado["contagem"] += 1
+        acumulado["total"] += duracao
+        acumulado["maximo"] = max(acumulado["maximo"], duracao)
+    rodada = _rodada_atual.get()
+    if rodada is not None:
+        rodada["etapas"].append((etapa, duracao))
+
+
+@contextmanager
+def medir(etapa):
+    """
+    Cronometra um trecho: `with medir("visualizar.consulta"): ...`
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_etapa(etapa, time.perf_counter() - inicio)
+
+
+def registrar_chamada_api(bytes_enviados=0, bytes_recebidos=0):
+    with _lock:
+        _api["chamadas"] += 1
+        _api["bytes_enviados"] += bytes_enviados
+        _api["bytes_recebidos"] += bytes_recebidos
+    rodada = _rodada_atual.get()
+    if rodada is not None:
+        rodada["chamadas_api"] += 1
+        rodada["bytes_enviados"] += bytes_enviados
+        rodada["bytes_recebidos"] += bytes_recebidos
+
+
+def _registrar_resposta(resposta, *args, **kwargs):
+    # Hook de resposta do requests: uma ida e volta HTTP à API, com o tamanho do corpo enviado e recebido
+    corpo = resposta.request.body
+    registrar_chamada_api(len(corpo) if corpo else 0, len(resposta.content or b""))
+
+
+def instrumentar_cliente(cliente):
+    """
+    Conta as chamadas HTTP e os bytes trafegados pelo cliente gspread (sessão do requests).
+    """
+    sessao = getattr(getattr(cliente, "http_client", None), "session", None) or getattr(cliente, "session", None)
+    hooks = getattr(sessao, "hooks", None)
+    if hooks is not None and _registrar_resposta not in hooks.setdefault("response", []):
+        hooks["response"].append(_registrar_resposta)
+
+
+def instantaneo():
+    """
+    Métricas acumuladas do processo: etapas, API, agendador de requisições e rodadas recentes.
+    """
+    from ambiente.agendador import agendador
+
+    with _lock:
+        return {
+            "etapas": {etapa: dict(valores) for etapa, valores in _etapas.items()},
+            "api": dict(_api),
+            "agendador": agendador.metricas(),
+            "rodadas": list(_rodadas)
+        }
+
+
+def exportar_json():
+    return json.dumps(instantaneo(), ensure_ascii=False, indent=2)
+
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def exportar_prometheus():
+    """
+    Métricas no formato de texto do Prometheus.
+    """
+    dados = instantaneo()
+    linhas = [
+        "# HELP controle_financeiro_etapa_segundos Duração das etapas instrumentadas.",
+        "# TYPE controle_financeiro_etapa_segundos summary"
+    ]
+    for etapa, valores in sorted(dados["etapas"].items()):
+        linhas.append(f'controle_financeiro_etapa_segundos_count{{etapa="{_rotulo(etapa)}"}} {valores["contagem"]}')
+        linhas.append(f'controle_financeiro_etapa_segundos_sum{{etapa="{_rotulo(etapa)}"}} {valores["total"]:.6f}')
+    linhas += [
+        "# TYPE controle_financeiro_etapa_maximo_segundos gauge",
+        *[f'controle_financeiro_etapa_maximo_segundos{{etapa="{_rotulo(etapa)}"}} {valores["maximo"]:.6f}'
+          for etapa, valores in sorted(dados["etapas"].items())],
+        "# TYPE controle_financeiro_api_chamadas_total counter",
+        f'controle_financeiro_api_chamadas_total {dados["api"]["chamadas"]}',
+        "# TYPE controle_financeiro_api_bytes_total counter",
+        f'controle_financeiro_api_bytes_total{{direcao="enviados"}} {dados["api"]["bytes_enviados"]}',
+        f'controle_financeiro_api_bytes_total{{direcao="recebidos"}} {dados["api"]["bytes_recebidos"]}',
+        "# TYPE controle_financeiro_agendador gauge",
+        *[f'controle_financeiro_agendador{{metrica="{nome}"}} {valor}' for nome, valor in sorted(dados["agendador"].items())],
+        "# TYPE controle_financeiro_rodadas_acima_do_orcamento gauge",
+        f'controle_financeiro_rodadas_acima_do_orcamento {sum(rodada["estourou"] for rodada in dados["rodadas"])}'
+    ]
+    return "\n".join(linhas) + "\n"
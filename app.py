@@ -1,11 +1,8 @@
+import os
 import streamlit as st
-from ambiente.config import config_ambiente
-from funcoes.google_sheets import (
-    adicionar_transacao,
-    visualizar_transacoes,
-    atualizar_analise_gastos,
-    importar_transacoes_csv
-)
+from ambiente.metricas import finalizar_rodada, iniciar_rodada
+from armazenamento.base import criar_armazenamento, nome_armazenamento
+from funcoes.paineis import painel_desempenho, painel_diario, painel_sincronizacao_nubank
 
 # 🔹 Ajusta o layout da página para expandir um pouco a largura
 st.set_page_config(layout="centered", page_title="Controle Financeiro")
@@ -33,29 +30,73 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# 🔹 Conectar ao Google Sheets
-st.sidebar.title("📌 Configuração do Sistema")
-client = config_ambiente()
+# 🔹 Medição do rerun (tempos por etapa, chamadas à API e bytes trafegados)
+rodada = iniciar_rodada("Visão Geral")
+
+# 🔹 Armazenamento: "planilha" (Google Sheets) ou "local" (SQLite, espelhado na planilha quando houver conexão)
+ARMAZENAMENTO = os.environ.get("ARMAZENAMENTO", "planilha")
 NOME_PLANILHA = "Controle Financeiro"
 
+# 🔹 Planilhas de outros livros (família, empresa...) incluídas nos relatórios, separadas por vírgula
+PLANILHAS_EXTRAS = [nome.strip() for nome in os.environ.get("PLANILHAS_EXTRAS", "").split(",") if nome.strip()]
+
+
+def obter_armazenamento():
+    """
+    Conecta ao Google Sheets e cria o armazenamento apenas nas páginas que usam os dados.
+    gspread e pandas são importados aqui, e não na abertura do app.
+    """
+    from ambiente.config import config_ambiente
+    from ambiente.conexao import path_chave_json
+
+    client = config_ambiente() if ARMAZENAMENTO == "planilha" or os.path.exists(path_chave_json) else None
+    return criar_armazenamento(ARMAZENAMENTO, client, NOME_PLANILHA)
+
+
+st.sidebar.title("📌 Configuração do Sistema")
+
 # 🔹 Criar Menu no Sidebar
 st.sidebar.title("📌 Menu")
-menu = st.sidebar.radio("Escolha uma opção:", ["Visão Geral", "Adicionar Transação", "Visualizar Transações", "Análise de Gastos", "Importar Transações (CSV)"])
+menu = st.sidebar.radio("Escolha uma opção:", ["Visão Geral", "Adicionar Transação", "Visualizar Transações", "Análise de Gastos", "Relatórios", "Importar Transações (CSV)"])
+rodada["pagina"] = menu
+
+# 🔹 Sincronização do Nubank (lê só o progresso em disco, sem conectar à planilha)
+painel_sincronizacao_nubank(nome_armazenamento(ARMAZENAMENTO, NOME_PLANILHA), ARMAZENAMENTO)
 
 # 🔹 Opções do Menu
-if client:
-    if menu == "Visão Geral":
-        st.subheader("📊 Bem-vindo a parte de Controle Financeiro!")
-        st.write("Use as opções do menu lateral para gerenciar suas transações.")
+if menu == "Visão Geral":
+    st.subheader("📊 Bem-vindo a parte de Controle Financeiro!")
+    st.write("Use as opções do menu lateral para gerenciar suas transações.")
+
+else:
+    armazenamento = obter_armazenamento()
+
+    if armazenamento:
+        from funcoes.google_sheets import (
+            adicionar_transacao,
+            visualizar_transacoes,
+            atualizar_analise_gastos,
+            relatorios_gastos,
+            importar_transacoes_csv
+        )
+
+        if menu == "Adicionar Transação":
+            adicionar_transacao(armazenamento)
+
+        elif menu == "Visualizar Transações":
+            visualizar_transacoes(armazenamento)
+
+        elif menu == "Análise de Gastos":
+            atualizar_analise_gastos(armazenamento)
 
-    elif menu == "Adicionar Transação":
-        adicionar_transacao(client, NOME_PLANILHA)
+        elif menu == "Relatórios":
+            relatorios_gastos(armazenamento, PLANILHAS_EXTRAS)
 
-    elif menu == "Visualizar Transações":
-        visualizar_transacoes(client, NOME_PLANILHA)
+        elif menu == "Importar Transações (CSV)":
+            importar_transacoes_csv(armazenamento)
 
-    elif menu == "Análise de Gastos":
-        atualizar_analise_gastos(client, NOME_PLANILHA)
+        # 🔹 Transações digitadas ainda não enviadas (depois da página, para já contar a que acabou de ser adicionada)
+        painel_diario(armazenamento.nome)
 
-    elif menu == "Importar Transações (CSV)":
-        importar_transacoes_csv()
\ No newline at end of file
+# 🔹 Painel de desempenho (fora da medição do rerun)
+painel_desempenho(finalizar_rodada())
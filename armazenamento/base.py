@@ -0,0 +1,99 @@
+import os
+import threading
+
+# Caminho padrão do banco local (pode ser trocado pela variável de ambiente ARMAZENAMENTO_SQLITE)
+DIR_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_BANCO_LOCAL = os.environ.get("ARMAZENAMENTO_SQLITE", os.path.join(DIR_PROJETO, "dados", "financeiro.db"))
+
+
+class Armazenamento:
+    """
+    Interface comum de armazenamento de transações usada pelas páginas do app.
+    As linhas trafegam no formato da aba 'Transações':
+    [Data (DD-MM-YYYY), Descrição, Valor ("1.234,56"), Forma de Pagamento, Categoria, Tipo].
+    """
+
+    # Identifica o armazenamento nos caches locais (índices, deduplicação)
+    nome = None
+
+    def adicionar_transacoes(self, linhas):
+        raise NotImplementedError
+
+    def listar_transacoes(self, forcar=False):
+        """
+        DataFrame com as colunas da aba 'Transações' e 'Valor' em centavos (int64).
+        """
+        raise NotImplementedError
+
+    def consultar(self, pagina=1, tamanho_pagina=50, **filtros):
+        """
+        Retorna (página de resultados, total de linhas filtradas, soma dos valores em centavos).
+        """
+        raise NotImplementedError
+
+    def consultar_em_blocos(self, tamanho_bloco=50_000, **filtros):
+        """
+        Gera as transações filtradas (tabela tipada) em blocos de até `tamanho_bloco` linhas, para exportação.
+        """
+        raise NotImplementedError
+
+    def metadados(self):
+        """
+        Valores distintos e limites das transações para os filtros (ver funcoes/metadados.py),
+        mantidos a cada escrita sem reler a tabela inteira.
+        """
+        raise NotImplementedError
+
+    def agregar_gastos(self):
+        """
+        Retorna a tabela da 'Análise de Gastos' e o conjunto de meses recalculados.
+        """
+        raise NotImplementedError
+
+    def publicar_analise(self, analise_gastos_df):
+        """
+        Grava a tabela da análise. Retorna o número de linhas gravadas.
+        """
+        raise NotImplementedError
+
+
+def nome_armazenamento(tipo, nome_planilha):
+    """
+    Nome que identifica o armazenamento nos caches locais, sem precisar criá-lo (nem conectar à planilha).
+    """
+    return f"local_{nome_planilha}" if tipo == "local" else nome_planilha
+
+
+_instancias = {}
+_lock = threading.Lock()
+
+
+def criar_armazenamento(tipo, client, nome_planilha):
+    """
+    Cria (uma vez por processo) o armazenamento escolhido: "planilha" (Google Sheets) ou "local" (SQLite).
+    Na planilha, as transações digitadas passam por um diário local enviado em segundo plano.
+    No modo local, se houver conexão com o Google Sheets, um espelho em segundo plano envia as transações para a planilha.
+    """
+    with _lock:
+        chave = (tipo, nome_planilha)
+        if chave in _instancias:
+            return _instancias[chave]
+
+        if tipo == "planilha":
+            if client is None:
+                return None
+            from armazenamento.planilha import ArmazenamentoPlanilha
+            from armazenamento.diario import iniciar_diario
+            instancia = ArmazenamentoPlanilha(client, nome_planilha)
+            iniciar_diario(instancia)
+        elif tipo == "local":
+            from armazenamento.local import ArmazenamentoLocal
+            instancia = ArmazenamentoLocal(CAMINHO_BANCO_LOCAL, nome_planilha)
+            if client is not None:
+                from armazenamento.espelho import iniciar_espelho
+                iniciar_espelho(instancia, client, nome_planilha)
+        else:
+            raise ValueError(f"Armazenamento desconhecido: {tipo}")
+
+        _instancias[chave] = instancia
+        return instancia
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from ambiente.metricas import medir
+from funcoes.arquivos_cache import DIR_CACHE, caminho_arquivo_cache
+from funcoes.deduplicacao import impressoes_digitais
+from funcoes.modelo import tabela_de_linhas
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) entre tentativas de envio quando não há transações novas (ou após uma falha)
+INTERVALO_DIARIO = 15
+
+# Máximo de transações enviadas por requisição
+LOTE_DIARIO = 500
+
+# Transações pendentes necessárias para a thread enviar (1 = envia assim que possível). Valores maiores
+# mantêm o modo "enviar a cada N transações": as digitadas esperam, já salvas no diário, até completar o lote.
+# Configuração do processo (vale para todas as sessões), lida uma vez na inicialização
+LOTE_MINIMO_DIARIO = max(1, int(os.environ.get("DIARIO_LOTE_MINIMO", "1")))
+
+# Tamanho (bytes) a partir do qual o diário, sem pendências, é zerado
+TAMANHO_COMPACTACAO = 1024 * 1024
+
+_diarios = {}
+_lock = threading.Lock()
+
+
+def _impressoes(linhas_ou_df):
+    df = tabela_de_linhas(linhas_ou_df) if isinstance(linhas_ou_df, list) else linhas_ou_df
+    return impressoes_digitais(df["Data"], df["Valor"], df["Descrição"], df["Tipo"])
+
+
+def _contem_bloco(sequencia, bloco):
+    # appendCells grava o lote inteiro de uma vez: as linhas aparecem contíguas e na mesma ordem
+    tamanho = len(bloco)
+    return any(sequencia[i:i + tamanho] == bloco for i in range(len(sequencia) - tamanho + 1))
+
+
+def lote_ja_gravado(armazenamento, linhas, posicao):
+    """
+    Indica se as linhas de um envio interrompido aparecem no armazenamento depois da posição anotada antes do envio.
+    """
+    # Releitura completa: após uma falha o cache pode não saber da escrita que chegou a ser aplicada
+    gravadas = armazenamento.listar_transacoes(forcar=True).iloc[posicao:]
+    return _contem_bloco(_impressoes(gravadas), _impressoes(linhas))
+
+
+class DiarioTransacoes:
+    """
+    Diário local (JSONL, só acréscimos) das transações digitadas: cada transação é gravada em disco
+    na hora e enviada ao armazenamento depois, em lotes, por uma thread em segundo plano.
+
+    Registros do arquivo:
+    - {"registro": id, "linha": [...]}: transação aceita (ainda não enviada);
+    - {"envio": [ids], "posicao": n}: lote prestes a ser enviado, com o número de linhas da aba antes do envio;
+    - {"confirmado": [ids]}: lote gravado no armazenamento.
+    Um lote com "envio" e sem "confirmado" (queda no meio do envio) só é reenviado se as suas linhas
+    não aparecerem na aba depois da posição anotada, então a retomada não duplica transações.
+    """
+
+    def __init__(self, armazenamento, caminho=None):
+        self.armazenamento = armazenamento
+        self.caminho = caminho or caminho_arquivo_cache("diario", armazenamento.nome, "jsonl")
+        self.pendentes = {}  # id -> linha, na ordem em que foram digitadas
+        self.em_envio = None  # {"ids": [...], "posicao": n} do último envio sem confirmação
+        self.ultimo_erro = None
+        self.lote_minimo = LOTE_MINIMO_DIARIO
+        self._lock = threading.Lock()  # estado em memória e arquivo (operações rápidas)
+        self._envio = threading.Lock()  # um envio por vez, sem bloquear quem registra
+        self._acordar = threading.Event()
+        self._ler()
+
+    def _ler(self):
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, "rb") as arquivo:
+            conteudo = arquivo.read()
+
+        # Última linha incompleta (queda durante a gravação): nunca foi confirmada ao usuário e é descartada,
+        # para o próximo registro não ser acrescentado colado nela
+        completo = conteudo[:conteudo.rfind(b"\n") + 1]
+        if len(completo) != len(conteudo):
+            logger.warning("Diário %s: registro incompleto descartado.", self.caminho)
+            with open(self.caminho, "r+b") as arquivo:
+                arquivo.truncate(len(completo))
+
+        for linha in completo.decode("utf-8").splitlines():
+            registro = json.loads(linha)
+            if "registro" in registro:
+                self.pendentes[registro["registro"]] = registro["linha"]
+            elif "envio" in registro:
+                self.em_envio = {"ids": registro["envio"], "posicao": registro["posicao"]}
+            elif "confirmado" in registro:
+                for id_transacao in registro["confirmado"]:
+                    self.pendentes.pop(id_transacao, None)
+                self.em_envio = None
+
+    def _acrescentar(self, registros):
+        os.makedirs(DIR_CACHE, exist_ok=True)
+        with open(self.caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write("".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in registros))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+    @property
+    def transacoes_pendentes(self):
+        return len(self.pendentes)
+
+    def registrar(self, linhas):
+        """
+        Grava as transações no diário (com fsync) e acorda a thread de envio. Retorna os ids gerados.
+        """
+        registros = [{"registro": uuid.uuid4().hex, "linha": list(linha)} for linha in linhas]
+        with self._lock:
+            self._acrescentar(registros)
+            for registro in registros:
+                self.pendentes[registro["registro"]] = registro["linha"]
+        self._acordar.set()
+        return [registro["registro"] for registro in registros]
+
+    def _ja_gravado(self, ids, posicao):
+        with self._lock:
+            linhas = [self.pendentes[id_transacao] for id_transacao in ids if id_transacao in self.pendentes]
+        if not linhas:
+            return True
+        return lote_ja_gravado(self.armazenamento, linhas, posicao)
+
+    def _confirmar(self, ids):
+        with self._lock:
+            self._acrescentar([{"confirmado": ids}])
+            for id_transacao in ids:
+                self.pendentes.pop(id_transacao, None)
+            self.em_envio = None
+
+            # Sem pendências, o histórico do diário não tem mais utilidade
+            if not self.pendentes and os.path.getsize(self.caminho) > TAMANHO_COMPACTACAO:
+                os.remove(self.caminho)
+
+    def _proximo_lote(self):
+        with self._lock:
+            ids = list(self.pendentes)[:LOTE_DIARIO]
+            return ids, [self.pendentes[id_transacao] for id_transacao in ids]
+
+    def descarregar(self, minimo=1):
+        """
+        Envia as transações pendentes em lotes, retomando antes um envio interrompido.
+        Com `minimo`, só envia se houver ao menos essa quantidade pendente. Retorna quantas foram enviadas.
+        """
+        enviadas = 0
+        with self._envio:
+            if self.em_envio is not None:
+                ids = self.em_envio["ids"]
+                if self._ja_gravado(ids, self.em_envio["posicao"]):
+                    self._confirmar(ids)
+                else:
+                    self.em_envio = None
+
+            ids, linhas = self._proximo_lote()
+            while ids and len(ids) >= min(minimo, LOTE_DIARIO):
+                posicao = len(self.armazenamento.listar_transacoes())
+                with self._lock:
+                    self._acrescentar([{"envio": ids, "posicao": posicao}])
+                    self.em_envio = {"ids": ids, "posicao": posicao}
+                with medir("diario.envio"):
+                    self.armazenamento.adicionar_transacoes(linhas)
+                self._confirmar(ids)
+                enviadas += len(ids)
+                ids, linhas = self._proximo_lote()
+        return enviadas
+
+    def _executar(self, intervalo):
+        while True:
+            self._acordar.clear()
+            try:
+                enviadas = self.descarregar(self.lote_minimo)
+                self.ultimo_erro = None
+                if enviadas:
+                    logger.info("Diário: %s transação(ões) enviadas.", enviadas)
+            except Exception as e:
+                # Planilha fora do ar ou sem cota: as transações continuam no diário para a próxima tentativa
+                self.ultimo_erro = str(e)
+                logger.exception("Diário: falha ao enviar transações.")
+            self._acordar.wait(intervalo)
+
+
+def iniciar_diario(armazenamento, intervalo=INTERVALO_DIARIO):
+    """
+    Cria (uma vez por processo) o diário do armazenamento e inicia a thread de envio,
+    que começa reenviando o que ficou pendente de execuções anteriores.
+    """
+    with _lock:
+        if armazenamento.nome in _diarios:
+            return _diarios[armazenamento.nome]
+        diario = DiarioTransacoes(armazenamento)
+        threading.Thread(
+            target=diario._executar,
+            args=(intervalo,),
+            name=f"diario-{armazenamento.nome}",
+            daemon=True
+        ).start()
+        _diarios[armazenamento.nome] = diario
+        return diario
+
+
+def obter_diario(nome):
+    with _lock:
+        return _diarios.get(nome)
@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+from armazenamento.diario import lote_ja_gravado
+from armazenamento.planilha import ArmazenamentoPlanilha
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) entre verificações de transações pendentes
+INTERVALO_ESPELHO = 30
+
+# Máximo de transações enviadas por requisição
+LOTE_ESPELHO = 500
+
+_threads = {}
+_lock = threading.Lock()
+
+
+def _retomar_envio(local, planilha):
+    # Lote anotado sem confirmação: só volta para a fila se as linhas não chegaram à aba depois da posição anotada
+    ids, linhas, posicao = local.envio_espelho_pendente()
+    if not ids:
+        return
+    if lote_ja_gravado(planilha, linhas, posicao):
+        local.marcar_espelhadas(ids)
+    else:
+        local.descartar_envio_espelho()
+
+
+def espelhar_pendentes(local, planilha):
+    """
+    Envia para a planilha as transações locais ainda não espelhadas, em lotes. Retorna quantas foram enviadas.
+    Como no diário, cada lote é anotado no banco (com o número de linhas da aba) antes do envio, e um envio
+    interrompido é conferido na aba antes de ser repetido: a retomada não duplica transações.
+    """
+    _retomar_envio(local, planilha)
+    enviadas = 0
+    while True:
+        ids, linhas = local.pendentes_espelho(LOTE_ESPELHO)
+        if not linhas:
+            return enviadas
+        local.anotar_envio_espelho(ids, len(planilha.listar_transacoes()))
+        planilha.adicionar_transacoes(linhas)
+        local.marcar_espelhadas(ids)
+        enviadas += len(linhas)
+
+
+def _executar(local, planilha, intervalo):
+    while True:
+        try:
+            enviadas = espelhar_pendentes(local, planilha)
+            if enviadas:
+                logger.info("Espelho: %s transação(ões) enviadas para a planilha.", enviadas)
+        except Exception:
+            # A planilha pode estar fora do ar ou sem cota: as transações continuam pendentes no banco
+            logger.exception("Espelho: falha ao enviar transações para a planilha.")
+        time.sleep(intervalo)
+
+
+def iniciar_espelho(local, client, nome_planilha, intervalo=INTERVALO_ESPELHO):
+    """
+    Inicia (uma vez por processo) a thread que espelha o banco local no Google Sheets.
+    """
+    with _lock:
+        if nome_planilha in _threads:
+            return _threads[nome_planilha]
+        thread = threading.Thread(
+            target=_executar,
+            args=(local, ArmazenamentoPlanilha(client, nome_planilha), intervalo),
+            name=f"espelho-{nome_planilha}",
+            daemon=True
+        )
+        thread.start()
+        _threads[nome_planilha] = thread
+        return thread
@@ -0,0 +1,271 @@
+import os
+import re
+import sqlite3
+import threading
+import pandas as pd
+from armazenamento.base import Armazenamento, nome_armazenamento
+from funcoes.analise_incremental import montar_tabela_analise
+from funcoes.categorizacao import normalizar_texto
+from funcoes.dinheiro import formatar_centavos, texto_para_centavos
+from funcoes.metadados import acumular_metadados, metadados_vazios
+from funcoes.modelo import COLUNAS_TRANSACOES, tipar_tabela
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT,                      -- YYYY-MM-DD
+    descricao TEXT NOT NULL,
+    descricao_busca TEXT NOT NULL,  -- minúsculas e sem acentos, para a busca por texto
+    valor_centavos INTEGER NOT NULL,
+    forma_pagamento TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    espelhada INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_data ON transacoes (data);
+CREATE INDEX IF NOT EXISTS idx_transacoes_valor ON transacoes (valor_centavos);
+CREATE INDEX IF NOT EXISTS idx_transacoes_tipo ON transacoes (tipo, data);
+CREATE INDEX IF NOT EXISTS idx_transacoes_forma ON transacoes (forma_pagamento);
+CREATE INDEX IF NOT EXISTS idx_transacoes_categoria ON transacoes (categoria);
+CREATE INDEX IF NOT EXISTS idx_transacoes_espelho ON transacoes (id) WHERE espelhada = 0;
+
+-- Lote do espelho prestes a ser enviado, com o número de linhas da aba antes do envio
+CREATE TABLE IF NOT EXISTS espelho_em_envio (
+    id INTEGER PRIMARY KEY,         -- id em transacoes
+    posicao INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analise_gastos (
+    mes_ano TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    total_gasto TEXT NOT NULL,
+    media_mensal TEXT NOT NULL,
+    percentual_do_total TEXT NOT NULL,
+    recomendacao TEXT NOT NULL,
+    PRIMARY KEY (mes_ano, categoria)
+);
+"""
+
+# Filtros por valor exato: nome da coluna na planilha -> coluna no banco
+COLUNAS_IGUALDADE = {"Tipo": "tipo", "Forma de Pagamento": "forma_pagamento", "Categoria": "categoria"}
+
+SELECT_PLANILHA = """
+    SELECT data AS "Data", descricao AS "Descrição", valor_centavos AS "Valor",
+           forma_pagamento AS "Forma de Pagamento", categoria AS "Categoria", tipo AS "Tipo"
+    FROM transacoes
+"""
+
+
+class ArmazenamentoLocal(Armazenamento):
+    """
+    Armazenamento em SQLite com índices por data, valor, tipo, forma de pagamento e categoria.
+    Funciona sem conexão; use ":memory:" como caminho para testes de carga locais.
+    """
+
+    def __init__(self, caminho, nome_planilha):
+        self.nome = nome_armazenamento("local", nome_planilha)
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.executescript(ESQUEMA)
+        self._lock = threading.Lock()
+        self._df = None
+        self._versao = None
+        self._metadados = None
+        self._versao_metadados = None
+
+    def adicionar_transacoes(self, linhas):
+        if not linhas:
+            return
+        df = pd.DataFrame(linhas, columns=COLUNAS_TRANSACOES)
+        datas = pd.to_datetime(df["Data"], format="%d-%m-%Y", errors="coerce").dt.strftime("%Y-%m-%d")
+        registros = zip(
+            datas.where(datas.notna(), None).tolist(),
+            df["Descrição"].tolist(),
+            [normalizar_texto(descricao) for descricao in df["Descrição"].tolist()],
+            texto_para_centavos(df["Valor"]).tolist(),
+            df["Forma de Pagamento"].tolist(),
+            df["Categoria"].tolist(),
+            df["Tipo"].tolist()
+        )
+        with self._lock, self.conexao:
+            self.conexao.executemany(
+                "INSERT INTO transacoes (data, descricao, descricao_busca, valor_centavos, forma_pagamento, categoria, tipo) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                registros
+            )
+            self._df = None
+            # Escritas deste processo não mudam o data_version: os metadados recebem as linhas novas aqui mesmo
+            if self._metadados is not None:
+                acumular_metadados(self._metadados, tipar_tabela(df))
+
+    def listar_transacoes(self, forcar=False):
+        with self._lock:
+            # data_version muda quando outro processo (ex.: o sincronizador do Nubank) grava no banco
+            versao = self.conexao.execute("PRAGMA data_version").fetchone()[0]
+            if self._df is None or forcar or versao != self._versao:
+                self._df = self._tipar(pd.read_sql_query(SELECT_PLANILHA + " ORDER BY id", self.conexao))
+                self._versao = versao
+            return self._df.copy()
+
+    @staticmethod
+    def _tipar(df):
+        df["Data"] = pd.to_datetime(df["Data"], format="%Y-%m-%d", errors="coerce")
+        return tipar_tabela(df)
+
+    def _where(self, data_inicio=None, data_fim=None, valor_min=None, valor_max=None, texto=None, **iguais):
+        condicoes, parametros = [], []
+        if data_inicio is not None:
+            condicoes.append("data >= ?")
+            parametros.append(str(data_inicio))
+        if data_fim is not None:
+            condicoes.append("data <= ?")
+            parametros.append(str(data_fim))
+        if valor_min is not None:
+            condicoes.append("valor_centavos >= ?")
+            parametros.append(int(valor_min))
+        if valor_max is not None:
+            condicoes.append("valor_centavos <= ?")
+            parametros.append(int(valor_max))
+        for coluna, valor in iguais.items():
+            condicoes.append(f"{COLUNAS_IGUALDADE[coluna]} = ?")
+            parametros.append(valor)
+        for termo in re.findall(r"\w+", normalizar_texto(texto or "")):
+            condicoes.append("descricao_busca LIKE ?")
+            parametros.append(f"%{termo}%")
+        return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+    def consultar(self, pagina=1, tamanho_pagina=50, **filtros):
+        where, parametros = self._where(**filtros)
+        with self._lock:
+            total_linhas, total_centavos = self.conexao.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(valor_centavos), 0) FROM transacoes{where}", parametros
+            ).fetchone()
+            pagina_df = pd.read_sql_query(
+                SELECT_PLANILHA + where + " ORDER BY id LIMIT ? OFFSET ?",
+                self.conexao,
+                params=parametros + [tamanho_pagina, (max(pagina, 1) - 1) * tamanho_pagina]
+            )
+        return self._tipar(pagina_df), total_linhas, int(total_centavos)
+
+    def consultar_em_blocos(self, tamanho_bloco=50_000, **filtros):
+        # Paginação pelo id: cada bloco é uma consulta curta, sem manter uma leitura aberta (e o banco travado) entre os blocos
+        where, parametros = self._where(**filtros)
+        where += (" AND" if where else " WHERE") + " id > ?"
+        ultimo_id = 0
+        while True:
+            with self._lock:
+                bloco = pd.read_sql_query(
+                    SELECT_PLANILHA.replace("SELECT", "SELECT id,", 1) + where + " ORDER BY id LIMIT ?",
+                    self.conexao,
+                    params=parametros + [ultimo_id, tamanho_bloco]
+                )
+            if bloco.empty:
+                return
+            ultimo_id = int(bloco["id"].iloc[-1])
+            yield self._tipar(bloco.drop(columns="id"))
+            if len(bloco) < tamanho_bloco:
+                return
+
+    def metadados(self):
+        with self._lock:
+            versao = self.conexao.execute("PRAGMA data_version").fetchone()[0]
+            if self._metadados is None or versao != self._versao_metadados:
+                self._metadados = self._calcular_metadados()
+                self._versao_metadados = versao
+            return self._metadados
+
+    def _calcular_metadados(self):
+        # Consultas agrupadas sobre colunas indexadas, sem trazer as transações para a memória
+        metadados = metadados_vazios()
+        for tipo, mes, quantidade in self.conexao.execute(
+            "SELECT tipo, strftime('%m/%Y', data), COUNT(*) FROM transacoes WHERE data IS NOT NULL GROUP BY 1, 2"
+        ):
+            metadados["meses"].setdefault(tipo, {})[mes] = quantidade
+        for tipo, categoria, quantidade in self.conexao.execute(
+            "SELECT tipo, categoria, COUNT(*) FROM transacoes GROUP BY 1, 2"
+        ):
+            metadados["categorias"].setdefault(tipo, {})[categoria] = quantidade
+        metadados["formas_pagamento"] = dict(self.conexao.execute(
+            "SELECT forma_pagamento, COUNT(*) FROM transacoes GROUP BY 1"
+        ).fetchall())
+        metadados["tipos"] = dict(self.conexao.execute("SELECT tipo, COUNT(*) FROM transacoes GROUP BY 1").fetchall())
+        (
+            metadados["linhas"], metadados["data_min"], metadados["data_max"], metadados["valor_min"], metadados["valor_max"]
+        ) = self.conexao.execute(
+            "SELECT COUNT(*), MIN(data), MAX(data), MIN(valor_centavos), MAX(valor_centavos) FROM transacoes"
+        ).fetchone()
+        return metadados
+
+    def agregar_gastos(self):
+        with self._lock:
+            linhas = self.conexao.execute(
+                "SELECT strftime('%m/%Y', data), categoria, SUM(valor_centavos), COUNT(*) "
+                "FROM transacoes WHERE tipo = 'Despesa' AND data IS NOT NULL GROUP BY 1, 2"
+            ).fetchall()
+        estado = {
+            "soma": {(mes, categoria): soma for mes, categoria, soma, _ in linhas},
+            "contagem": {(mes, categoria): contagem for mes, categoria, _, contagem in linhas}
+        }
+        # O agregado em SQL é recalculado por inteiro (usa os índices), então não há meses "afetados"
+        return montar_tabela_analise(estado), set()
+
+    def publicar_analise(self, analise_gastos_df):
+        with self._lock, self.conexao:
+            self.conexao.execute("DELETE FROM analise_gastos")
+            self.conexao.executemany("INSERT INTO analise_gastos VALUES (?, ?, ?, ?, ?, ?)", analise_gastos_df.values.tolist())
+        return len(analise_gastos_df)
+
+    @staticmethod
+    def _linhas_espelho(registros):
+        ids = [registro[0] for registro in registros]
+        linhas = [
+            [data or "", descricao, formatar_centavos(valor, prefixo=""), forma, categoria, tipo]
+            for _, data, descricao, valor, forma, categoria, tipo in registros
+        ]
+        return ids, linhas
+
+    def pendentes_espelho(self, limite=500):
+        """
+        Transações ainda não enviadas para a planilha: (ids, linhas no formato da aba 'Transações').
+        """
+        with self._lock:
+            registros = self.conexao.execute(
+                "SELECT id, strftime('%d-%m-%Y', data), descricao, valor_centavos, forma_pagamento, categoria, tipo "
+                "FROM transacoes WHERE espelhada = 0 ORDER BY id LIMIT ?",
+                (limite,)
+            ).fetchall()
+        return self._linhas_espelho(registros)
+
+    def anotar_envio_espelho(self, ids, posicao):
+        """
+        Anota (antes do envio) o lote que vai para a planilha e o número de linhas da aba naquele momento.
+        """
+        with self._lock, self.conexao:
+            self.conexao.execute("DELETE FROM espelho_em_envio")
+            self.conexao.executemany("INSERT INTO espelho_em_envio VALUES (?, ?)", [(i, posicao) for i in ids])
+
+    def envio_espelho_pendente(self):
+        """
+        Lote anotado e não confirmado (queda ou erro no meio do envio): (ids, linhas, posição); sem lote, posição None.
+        """
+        with self._lock:
+            registros = self.conexao.execute(
+                "SELECT t.id, strftime('%d-%m-%Y', t.data), t.descricao, t.valor_centavos, t.forma_pagamento, "
+                "t.categoria, t.tipo, e.posicao "
+                "FROM espelho_em_envio e JOIN transacoes t ON t.id = e.id WHERE t.espelhada = 0 ORDER BY t.id"
+            ).fetchall()
+        if not registros:
+            return [], [], None
+        ids, linhas = self._linhas_espelho([registro[:-1] for registro in registros])
+        return ids, linhas, registros[0][-1]
+
+    def descartar_envio_espelho(self):
+        with self._lock, self.conexao:
+            self.conexao.execute("DELETE FROM espelho_em_envio")
+
+    def marcar_espelhadas(self, ids):
+        # Na mesma transação: a confirmação e a remoção da anotação do envio
+        with self._lock, self.conexao:
+            self.conexao.executemany("UPDATE transacoes SET espelhada = 1 WHERE id = ?", [(i,) for i in ids])
+            self.conexao.execute("DELETE FROM espelho_em_envio")
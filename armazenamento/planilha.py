@@ -0,0 +1,52 @@
+from ambiente.conexao import abrir_aba, conexao_obsoleta, descartar_conexoes
+from armazenamento.base import Armazenamento
+from funcoes.analise_incremental import atualizar_agregados, montar_tabela_analise, gravar_analise
+from funcoes.cache_transacoes import carregar_transacoes
+from funcoes.consulta import obter_indice_transacoes
+from funcoes.escrita_em_lote import enviar_linhas, linhas_por_aba
+from funcoes.metadados import atualizar_metadados
+
+
+class ArmazenamentoPlanilha(Armazenamento):
+    """
+    Armazenamento no Google Sheets: leitura pelo cache incremental, escrita em lote (batchUpdate)
+    e análise agregada incrementalmente, gravando só as linhas alteradas.
+    """
+
+    def __init__(self, client, nome_planilha):
+        self.client = client
+        self.nome = nome_planilha
+
+    def adicionar_transacoes(self, linhas):
+        enviar_linhas(self.client, self.nome, linhas_por_aba(linhas))
+
+    def listar_transacoes(self, forcar=False):
+        return carregar_transacoes(self.client, self.nome, forcar=forcar)
+
+    def consultar(self, pagina=1, tamanho_pagina=50, **filtros):
+        indice = obter_indice_transacoes(self.nome, self.listar_transacoes())
+        return indice.consultar(pagina=pagina, tamanho_pagina=tamanho_pagina, **filtros)
+
+    def consultar_em_blocos(self, tamanho_bloco=50_000, **filtros):
+        indice = obter_indice_transacoes(self.nome, self.listar_transacoes())
+        return indice.em_blocos(tamanho_bloco, **filtros)
+
+    def metadados(self):
+        return atualizar_metadados(self.nome, self.listar_transacoes())
+
+    def agregar_gastos(self):
+        estado, meses_afetados = atualizar_agregados(self.nome, self.listar_transacoes())
+        return montar_tabela_analise(estado), meses_afetados
+
+    def publicar_analise(self, analise_gastos_df):
+        # Sem linhas novas desde agregar_gastos, a atualização só devolve o estado atual
+        estado, _ = atualizar_agregados(self.nome, self.listar_transacoes())
+        try:
+            return gravar_analise(abrir_aba(self.client, self.nome, "Análise de Gastos"), self.nome, estado, analise_gastos_df)
+        except Exception as erro:
+            if not conexao_obsoleta(erro):
+                raise
+            # Aba apagada/renomeada na planilha: reabre e, sem saber o que há nela, regrava a tabela inteira
+            descartar_conexoes(self.nome)
+            estado["escrito"] = None
+            return gravar_analise(abrir_aba(self.client, self.nome, "Análise de Gastos"), self.nome, estado, analise_gastos_df)
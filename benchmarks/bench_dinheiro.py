@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import random
+import pandas as pd
+
+# Permite executar direto da raiz do projeto: python benchmarks/bench_dinheiro.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from funcoes.dinheiro import centavos_para_texto, texto_para_centavos
+
+
+def _formatar_por_linha(serie):
+    # Implementação antiga (lambda por linha), mantida apenas para comparação
+    return serie.apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+
+
+def _converter_por_linha(serie):
+    return serie.str.replace("R$ ", "", regex=False).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
+
+
+def _medir(funcao, *args):
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+
+def executar(linhas):
+    centavos = pd.Series([random.randint(-500_000, 5_000_000) for _ in range(linhas)], dtype="int64")
+    reais = centavos / 100
+    textos = centavos_para_texto(centavos)
+
+    return {
+        "linhas": linhas,
+        "formatar_lambda_s": _medir(_formatar_por_linha, reais),
+        "formatar_centavos_s": _medir(centavos_para_texto, centavos),
+        "converter_replace_float_s": _medir(_converter_por_linha, textos),
+        "converter_centavos_s": _medir(texto_para_centavos, textos),
+        # Fluxo antigo do total filtrado: formatar -> converter de volta -> somar
+        "total_ida_e_volta_s": _medir(lambda s: _converter_por_linha(_formatar_por_linha(s)).sum(), reais),
+        "total_centavos_s": _medir(lambda s: s.sum(), centavos),
+    }
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    for linhas in (100_000, 500_000):
+        resultado = executar(linhas)
+        print(f"📊 {linhas:,} linhas".replace(",", "."))
+        for chave, valor in resultado.items():
+            if chave != "linhas":
+                print(f"   {chave:<28} {valor * 1000:10.1f} ms")
@@ -0,0 +1,76 @@
+"""
+Relatórios de vários livros no próprio processo x no pool de processos, para calibrar
+LINHAS_MINIMAS_PROCESSOS (funcoes/relatorios.py) na máquina onde o app roda.
+
+Uso (da raiz do projeto):
+    python benchmarks/bench_relatorios.py
+    python benchmarks/bench_relatorios.py --linhas 250000 500000 1000000 --processos 4
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+# Permite executar direto da raiz do projeto: python benchmarks/bench_relatorios.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import funcoes.relatorios as relatorios
+from benchmarks.dados_sinteticos import gerar_livro
+from funcoes.modelo import tabela_de_linhas
+
+
+def _medir(funcao, *args, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def executar(linhas, processos):
+    # Dois livros com metade das linhas cada (mesmo cenário dos relatórios com uma planilha extra)
+    livros = {
+        "Casa": tabela_de_linhas(gerar_livro(linhas // 2)),
+        "Empresa": tabela_de_linhas(gerar_livro(linhas // 2, semente=7))
+    }
+    tabela = relatorios._preparar(livros)
+    particoes = relatorios._particionar_por_mes(tabela, processos * relatorios.PARTICOES_POR_PROCESSO)
+
+    relatorios.MAX_PROCESSOS = 1
+    um_processo = _medir(relatorios.analisar_livros, livros)
+
+    relatorios.MAX_PROCESSOS = processos
+    relatorios.LINHAS_MINIMAS_PROCESSOS = 0
+    # A primeira chamada inicia o pool (spawn); as medições seguintes usam os processos já prontos
+    inicio = time.perf_counter()
+    relatorios.analisar_livros(livros)
+    pool_frio = time.perf_counter() - inicio
+    pool = _medir(relatorios.analisar_livros, livros)
+    relatorios.encerrar_pool()
+
+    return {
+        "linhas": linhas,
+        "enviado_mb": sum(len(pickle.dumps(relatorios._codificar(particao))) for particao in particoes) / 1024 ** 2,
+        "um_processo_s": um_processo,
+        "pool_frio_s": pool_frio,
+        "pool_s": pool,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[100_000, 500_000, 1_000_000, 2_000_000])
+    parser.add_argument("--processos", type=int, default=min(4, os.cpu_count() or 1))
+    argumentos = parser.parse_args()
+
+    print(f"🖥️ {os.cpu_count()} CPU(s), pool com {argumentos.processos} processo(s)")
+    for linhas in argumentos.linhas:
+        resultado = executar(linhas, argumentos.processos)
+        print(f"📊 {linhas:,} linhas".replace(",", "."))
+        print(f"   {'enviado aos processos':<28} {resultado['enviado_mb']:10.1f} MB")
+        for chave in ("um_processo_s", "pool_frio_s", "pool_s"):
+            print(f"   {chave:<28} {resultado[chave] * 1000:10.1f} ms")
+        vencedor = "pool" if resultado["pool_s"] < resultado["um_processo_s"] else "um processo"
+        print(f"   {'mais rápido':<28} {vencedor:>10}")
@@ -0,0 +1,74 @@
+import io
+import random
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+# Estabelecimentos por categoria (títulos realistas, com variações que a categorização precisa reconhecer)
+ESTABELECIMENTOS = {
+    "Alimentação": ["iFood *Restaurante Sabor", "Padaria Pão Quente", "McDonalds Paulista", "Cafeteria Grão", "Pizzaria Napoli", "Bar do Zé"],
+    "Saúde": ["Drogasil 1234", "Drogaria São Paulo", "Farmácia Pacheco", "Clínica Vida"],
+    "Transporte": ["Uber *Trip", "99Pop Corrida", "Posto Shell BR", "Posto Ipiranga"],
+    "Lazer": ["Netflix.com", "Spotify", "Cinema Cinemark", "Teatro Municipal"],
+    "Educação": ["Curso Alura", "Faculdade XYZ", "Canva Pro"],
+    "Compras": ["Amazon Marketplace", "Magalu", "Supermercado Extra", "Mercado Livre", "Loja Renner"],
+    "Assinaturas": ["Prime Video", "Disney Plus", "HBO Max"],
+    "Moradia": ["Aluguel Apto", "Condomínio Ed. Sol", "Energia Enel", "Vivo Fibra Internet", "Claro Celular"],
+    "Outros": ["PIX Transferência", "Pagamento Boleto", "Tarifa Bancária", "Compra Internacional"]
+}
+
+RECEITAS = {"Salário": ["Salário Empresa SA"], "Freelance": ["Pix Recebido Cliente"], "Reembolso": ["Estorno Compra"]}
+
+FORMAS_PAGAMENTO = ["Pix", "Ted", "Boleto", "Dinheiro", "Nubank", "Cartão de Crédito"]
+
+# Peso relativo de cada categoria de despesa (alimentação e transporte dominam o volume)
+PESOS_CATEGORIAS = [30, 6, 20, 8, 3, 15, 4, 6, 8]
+
+
+def gerar_livro(linhas, semente=42, inicio=date(2019, 1, 1), anos=5):
+    """
+    Livro-caixa sintético e reprodutível no formato da aba 'Transações' (lista de linhas de texto),
+    com ~8% de receitas e datas espalhadas por `anos` anos.
+    """
+    gerador = np.random.default_rng(semente)
+    aleatorio = random.Random(semente)
+
+    categorias = list(ESTABELECIMENTOS)
+    pesos = np.array(PESOS_CATEGORIAS, dtype=float) / sum(PESOS_CATEGORIAS)
+    dias = np.sort(gerador.integers(0, 365 * anos, size=linhas))
+    receitas = gerador.random(linhas) < 0.08
+    escolhas_categoria = gerador.choice(len(categorias), size=linhas, p=pesos)
+    # Valores com cauda longa (muitos pequenos, poucos grandes), em centavos
+    valores = np.maximum(100, gerador.lognormal(mean=8.2, sigma=1.1, size=linhas).astype("int64"))
+
+    livro = []
+    for dia, receita, indice_categoria, valor in zip(dias.tolist(), receitas.tolist(), escolhas_categoria.tolist(), valores.tolist()):
+        if receita:
+            categoria = aleatorio.choice(list(RECEITAS))
+            descricao = aleatorio.choice(RECEITAS[categoria])
+            valor *= 10
+        else:
+            categoria = categorias[indice_categoria]
+            descricao = aleatorio.choice(ESTABELECIMENTOS[categoria])
+        livro.append([
+            (inicio + timedelta(days=dia)).strftime("%d-%m-%Y"),
+            descricao,
+            f"{valor / 100:_.2f}".replace(".", ",").replace("_", "."),
+            aleatorio.choice(FORMAS_PAGAMENTO),
+            categoria,
+            "Receita" if receita else "Despesa"
+        ])
+    return livro
+
+
+def gerar_csv(linhas, semente=42):
+    """
+    CSV sintético no formato exportado pelo cartão (date, title, amount), em memória.
+    """
+    livro = gerar_livro(linhas, semente)
+    df = pd.DataFrame({
+        "date": pd.to_datetime([linha[0] for linha in livro], format="%d-%m-%Y").strftime("%Y-%m-%d"),
+        "title": [linha[1] for linha in livro],
+        "amount": [float(linha[2].replace(".", "").replace(",", ".")) for linha in livro]
+    })
+    return io.StringIO(df.to_csv(index=False))
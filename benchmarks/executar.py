@@ -0,0 +1,210 @@
+"""
+Suíte de benchmarks com livros-caixa sintéticos e uma planilha em memória (sem conta Google).
+
+Uso (da raiz do projeto):
+    python benchmarks/executar.py
+    python benchmarks/executar.py --linhas 10000 100000 1000000 --repeticoes 3
+
+Os resultados ficam em benchmarks/resultados/ e cada execução é comparada com a anterior.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIR_PROJETO = os.path.dirname(DIR_BENCHMARKS)
+DIR_RESULTADOS = os.path.join(DIR_BENCHMARKS, "resultados")
+
+# Permite executar direto da raiz do projeto, com os caches em uma pasta temporária
+sys.path.insert(0, DIR_PROJETO)
+os.environ.setdefault("CACHE_LOCAL", tempfile.mkdtemp(prefix="bench_cache_"))
+
+import pandas as pd
+import ambiente.agendador
+from ambiente.agendador import AgendadorRequisicoes
+from armazenamento.local import ArmazenamentoLocal
+from armazenamento.planilha import ArmazenamentoPlanilha
+from benchmarks.dados_sinteticos import gerar_csv, gerar_livro
+from benchmarks.planilha_falsa import ClienteFalso
+from funcoes.analise_incremental import atualizar_agregados
+from funcoes.cache_transacoes import invalidar_cache
+from funcoes.categorizacao import CATEGORIAS_PADRAO, Categorizador
+from funcoes.deduplicacao import IndiceDeduplicacao
+from funcoes.importacao_csv import processar_csv_em_lotes
+from funcoes.modelo import COLUNAS_TRANSACOES
+from funcoes.relatorios import analisar_livros
+from integracao.nubank_api import remover_duplicatas, transacoes_do_extrato
+from integracao.nubank_falso import gerar_extrato
+
+# A planilha falsa não tem cota: o agendador do processo não deve atrasar as medições
+ambiente.agendador.agendador = AgendadorRequisicoes(leituras_por_minuto=10**9, escritas_por_minuto=10**9)
+
+LINHAS_PADRAO = [10_000, 100_000]
+
+# Variação (fração) acima da qual um benchmark é apontado como regressão em relação à execução anterior
+LIMITE_REGRESSAO = 0.15
+
+# Consultas típicas do visualizador (valores em centavos)
+CONSULTAS = [
+    {},
+    {"Tipo": "Despesa"},
+    {"data_inicio": "2021-01-01", "data_fim": "2021-12-31"},
+    {"Categoria": "Alimentação", "valor_min": 5_000},
+    {"texto": "uber"},
+    {"Tipo": "Despesa", "Forma de Pagamento": "Pix", "data_inicio": "2022-06-01", "data_fim": "2022-06-30"}
+]
+
+
+def _medir(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+
+def _consultar_todas(armazenamento):
+    for filtros in CONSULTAS:
+        armazenamento.consultar(pagina=2, tamanho_pagina=50, **filtros)
+
+
+def _rodada(livro, csv_texto, extrato, repeticao):
+    """
+    Uma repetição de todos os benchmarks para um livro. Retorna {benchmark: segundos}.
+    """
+    linhas = len(livro)
+    nome = f"bench_{linhas}_{repeticao}"
+    tempos = {}
+
+    # 🔹 Google Sheets (planilha em memória): carga completa e incremental pelo cache
+    cliente = ClienteFalso()
+    planilha = cliente.criar_planilha(nome)
+    incremento = max(1, linhas // 100)
+    aba = planilha.adicionar_aba("Transações", [COLUNAS_TRANSACOES] + livro[:-incremento])
+    for titulo in ("Receitas", "Despesas", "Análise de Gastos"):
+        planilha.adicionar_aba(titulo)
+    armazenamento = ArmazenamentoPlanilha(cliente, nome)
+
+    tempos["carga_completa"], df = _medir(armazenamento.listar_transacoes, forcar=True)
+    tempos["agregacao_completa"], (analise_df, _) = _medir(armazenamento.agregar_gastos)
+    tempos["metadados_completo"], _ = _medir(armazenamento.metadados)
+    tempos["publicar_analise"], _ = _medir(armazenamento.publicar_analise, analise_df)
+
+    aba.linhas.extend(livro[-incremento:])
+    invalidar_cache(nome)
+    tempos["carga_incremental"], df = _medir(armazenamento.listar_transacoes)
+    tempos["agregacao_incremental"], _ = _medir(atualizar_agregados, nome, df)
+    tempos["metadados_incremental"], _ = _medir(armazenamento.metadados)
+
+    # Relatórios de dois livros (o segundo é o mesmo livro, simulando outra conta)
+    tempos["relatorios_dois_livros"], _ = _medir(analisar_livros, {"Casa": df, "Empresa": df})
+
+    tempos["indice_consulta"], _ = _medir(armazenamento.consultar, tamanho_pagina=0)
+    tempos["consultas_planilha"], _ = _medir(_consultar_todas, armazenamento)
+
+    # 🔹 SQLite em memória: mesmas consultas com LIMIT/OFFSET e agregação em SQL
+    local = ArmazenamentoLocal(":memory:", nome)
+    tempos["sqlite_insercao"], _ = _medir(local.adicionar_transacoes, livro)
+    tempos["consultas_sqlite"], _ = _medir(_consultar_todas, local)
+    tempos["agregacao_sqlite"], _ = _medir(local.agregar_gastos)
+
+    # 🔹 Categorização (sem memória aquecida) e importação de CSV completa (leitura, categorização, impressões)
+    titulos = pd.Series([linha[1] for linha in livro])
+    tempos["categorizacao"], _ = _medir(Categorizador(CATEGORIAS_PADRAO).categorizar_serie, titulos)
+
+    csv_texto.seek(0)
+    indice_csv = IndiceDeduplicacao(f"{nome}_csv")
+    tempos["importacao_csv"], _ = _medir(lambda: sum(len(novas) for novas, _, _ in processar_csv_em_lotes(csv_texto, indice_csv)))
+
+    # 🔹 Deduplicação do Nubank contra o índice já sincronizado com o livro
+    indice_nubank = IndiceDeduplicacao(f"{nome}_nubank")
+    tempos["indice_deduplicacao"], _ = _medir(indice_nubank.sincronizar, df)
+
+    def deduplicar():
+        dados_novos, ids_nubank = transacoes_do_extrato(extrato)
+        return remover_duplicatas(dados_novos, ids_nubank, indice_nubank)
+
+    tempos["deduplicacao_nubank"], _ = _medir(deduplicar)
+    return tempos
+
+
+def executar(linhas, repeticoes=3):
+    """
+    Executa os benchmarks para um tamanho de livro. Retorna o melhor tempo (segundos) de cada um.
+    """
+    livro = gerar_livro(linhas)
+    csv_texto = gerar_csv(linhas)
+    extrato = gerar_extrato(min(linhas, 50_000))
+    melhores = {}
+    for repeticao in range(repeticoes):
+        for benchmark, segundos in _rodada(livro, csv_texto, extrato, repeticao).items():
+            melhores[benchmark] = min(segundos, melhores.get(benchmark, float("inf")))
+    return melhores
+
+
+def _versao():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=DIR_PROJETO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def _resultado_anterior():
+    arquivos = sorted(glob.glob(os.path.join(DIR_RESULTADOS, "*.json")))
+    if not arquivos:
+        return None
+    with open(arquivos[-1], "r", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def salvar(resultado):
+    os.makedirs(DIR_RESULTADOS, exist_ok=True)
+    caminho = os.path.join(DIR_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}_{resultado['versao']}.json")
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def imprimir(resultado, anterior=None):
+    for linhas, tempos in resultado["resultados"].items():
+        print(f"📊 {int(linhas):,} linhas".replace(",", "."))
+        tempos_anteriores = (anterior or {}).get("resultados", {}).get(linhas, {})
+        for benchmark, segundos in tempos.items():
+            comparacao = ""
+            if benchmark in tempos_anteriores and tempos_anteriores[benchmark] > 0:
+                variacao = segundos / tempos_anteriores[benchmark] - 1
+                alerta = "  ⚠️ regressão" if variacao > LIMITE_REGRESSAO else ""
+                comparacao = f"  ({variacao:+.0%} vs {anterior['versao']}){alerta}"
+            print(f"   {benchmark:<24} {segundos * 1000:10.1f} ms{comparacao}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Controle Financeiro com dados sintéticos.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=LINHAS_PADRAO, help="Tamanhos do livro-caixa")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições por tamanho (vale o melhor tempo)")
+    parser.add_argument("--nao-salvar", action="store_true", help="Apenas imprime, sem gravar em benchmarks/resultados")
+    args = parser.parse_args(argumentos)
+
+    resultado = {
+        "versao": _versao(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "maquina": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        "repeticoes": args.repeticoes,
+        "resultados": {str(linhas): executar(linhas, args.repeticoes) for linhas in args.linhas}
+    }
+    imprimir(resultado, _resultado_anterior())
+    if not args.nao_salvar:
+        print(f"💾 Resultados gravados em {salvar(resultado)}")
+
+
+if __name__ == "__main__":
+    main()
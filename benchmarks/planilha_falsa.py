@@ -0,0 +1,204 @@
+import re
+import time
+import gspread
+
+# Colunas A..Z -> índice
+_COLUNAS = {chr(ord("A") + i): i for i in range(26)}
+
+
+def _intervalo(intervalo):
+    """
+    "A2:F", "'Aba'!1:1" ou "A1" -> (aba ou None, linha inicial, linha final ou None, coluna inicial).
+    """
+    aba = None
+    if "!" in intervalo:
+        aba, intervalo = intervalo.rsplit("!", 1)
+        aba = aba.strip("'")
+    inicio, _, fim = intervalo.partition(":")
+    linha_inicio = re.search(r"\d+", inicio)
+    coluna_inicio = re.match(r"[A-Z]+", inicio)
+    linha_fim = re.search(r"\d+", fim) if fim else linha_inicio
+    return (
+        aba,
+        int(linha_inicio.group()) if linha_inicio else 1,
+        int(linha_fim.group()) if linha_fim else None,
+        _COLUNAS[coluna_inicio.group()] if coluna_inicio else 0
+    )
+
+
+class AbaFalsa:
+    """
+    Worksheet em memória com os métodos do gspread usados pelo app.
+    """
+
+    def __init__(self, planilha, id_aba, titulo, linhas=None, linhas_grade=1000, colunas_grade=26):
+        self.planilha = planilha
+        self.id = id_aba
+        self.title = titulo
+        self.linhas = [list(linha) for linha in (linhas or [])]
+        self.row_count = max(linhas_grade, len(self.linhas))
+        self.col_count = colunas_grade
+
+    def _expandir(self):
+        # Como na API de valores e no append, gravar além da última linha expande a grade
+        self.row_count = max(self.row_count, len(self.linhas))
+
+    @property
+    def spreadsheet(self):
+        return self.planilha
+
+    def get_all_values(self):
+        self.planilha._chamada("leitura")
+        return [list(linha) for linha in self.linhas]
+
+    def get(self, intervalo):
+        self.planilha._chamada("leitura")
+        _, inicio, fim, _ = _intervalo(intervalo)
+        return [list(linha) for linha in self.linhas[inicio - 1:fim]]
+
+    def _gravar(self, intervalo, valores):
+        _, inicio, _, coluna = _intervalo(intervalo)
+        for deslocamento, valores_linha in enumerate(valores):
+            indice = inicio - 1 + deslocamento
+            while len(self.linhas) <= indice:
+                self.linhas.append([])
+            linha = self.linhas[indice]
+            linha.extend([""] * (coluna + len(valores_linha) - len(linha)))
+            linha[coluna:coluna + len(valores_linha)] = [str(valor) for valor in valores_linha]
+        self._expandir()
+
+    def update(self, range_name="A1", values=None, **kwargs):
+        self.planilha._chamada("escrita")
+        self._gravar(range_name, values or [])
+
+    def batch_update(self, blocos, **kwargs):
+        self.planilha._chamada("escrita")
+        for bloco in blocos:
+            self._gravar(bloco["range"], bloco["values"])
+
+    def clear(self):
+        self.planilha._chamada("escrita")
+        self.linhas = []
+
+    def append_rows(self, linhas, **kwargs):
+        self.planilha._chamada("escrita")
+        self.linhas.extend([str(valor) for valor in linha] for linha in linhas)
+        self._expandir()
+
+
+class PlanilhaFalsa:
+    """
+    Spreadsheet em memória: batchUpdate (addSheet/appendCells), values_batch_get/update e abas.
+    Conta as chamadas e pode simular a latência de rede de cada uma.
+    """
+
+    def __init__(self, titulo, latencia=0.0):
+        self.title = titulo
+        self.latencia = latencia
+        self.abas = {}
+        self.chamadas = {"leitura": 0, "escrita": 0}
+
+    def _chamada(self, tipo):
+        self.chamadas[tipo] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def adicionar_aba(self, titulo, linhas=None, id_aba=None, linhas_grade=1000, colunas_grade=26):
+        aba = AbaFalsa(self, id_aba or len(self.abas) + 1, titulo, linhas, linhas_grade, colunas_grade)
+        self.abas[titulo] = aba
+        return aba
+
+    def worksheets(self):
+        self._chamada("leitura")
+        return list(self.abas.values())
+
+    def worksheet(self, titulo):
+        self._chamada("leitura")
+        if titulo not in self.abas:
+            raise gspread.exceptions.WorksheetNotFound(titulo)
+        return self.abas[titulo]
+
+    def batch_update(self, corpo):
+        self._chamada("escrita")
+        abas_por_id = {aba.id: aba for aba in self.abas.values()}
+        for requisicao in corpo["requests"]:
+            if "addSheet" in requisicao:
+                propriedades = requisicao["addSheet"]["properties"]
+                grade = propriedades.get("gridProperties", {})
+                aba = self.adicionar_aba(
+                    propriedades["title"], id_aba=propriedades.get("sheetId"),
+                    linhas_grade=grade.get("rowCount", 1000), colunas_grade=grade.get("columnCount", 26)
+                )
+                abas_por_id[aba.id] = aba
+            elif "appendDimension" in requisicao:
+                dimensao = requisicao["appendDimension"]
+                aba = abas_por_id[dimensao["sheetId"]]
+                if dimensao["dimension"] == "ROWS":
+                    aba.row_count += dimensao["length"]
+                else:
+                    aba.col_count += dimensao["length"]
+            elif "updateCells" in requisicao:
+                self._atualizar_celulas(abas_por_id, requisicao["updateCells"])
+            elif "appendCells" in requisicao:
+                aba = abas_por_id[requisicao["appendCells"]["sheetId"]]
+                aba.linhas.extend(
+                    [celula["userEnteredValue"]["stringValue"] for celula in linha["values"]]
+                    for linha in requisicao["appendCells"]["rows"]
+                )
+                aba._expandir()
+        return {"replies": []}
+
+    @staticmethod
+    def _atualizar_celulas(abas_por_id, corpo):
+        if "range" in corpo:
+            # Sem "rows": apaga as linhas a partir de startRowIndex
+            aba = abas_por_id[corpo["range"]["sheetId"]]
+            inicio = corpo["range"].get("startRowIndex", 0)
+            aba.linhas = aba.linhas[:inicio] + [[] for _ in aba.linhas[inicio:]]
+            while aba.linhas and not any(aba.linhas[-1]):
+                aba.linhas.pop()
+            return
+        inicio = corpo["start"]
+        aba = abas_por_id[inicio["sheetId"]]
+        for deslocamento, linha in enumerate(corpo["rows"]):
+            indice = inicio["rowIndex"] + deslocamento
+            if indice >= aba.row_count or inicio["columnIndex"] + len(linha["values"]) > aba.col_count:
+                raise ValueError(f"Intervalo fora da grade da aba '{aba.title}'")
+            valores = [celula.get("userEnteredValue", {}).get("stringValue", "") for celula in linha["values"]]
+            aba._gravar(f"{chr(ord('A') + inicio['columnIndex'])}{indice + 1}", [valores])
+        while aba.linhas and not any(aba.linhas[-1]):
+            aba.linhas.pop()
+
+    def values_batch_get(self, intervalos, **kwargs):
+        self._chamada("leitura")
+        resposta = []
+        for intervalo in intervalos:
+            aba, inicio, fim, _ = _intervalo(intervalo)
+            resposta.append({"range": intervalo, "values": [list(linha) for linha in self.abas[aba].linhas[inicio - 1:fim]]})
+        return {"valueRanges": resposta}
+
+    def values_batch_update(self, corpo):
+        self._chamada("escrita")
+        for bloco in corpo["data"]:
+            aba, _, _, _ = _intervalo(bloco["range"])
+            self.abas[aba]._gravar(bloco["range"].rsplit("!", 1)[1], bloco["values"])
+
+
+class ClienteFalso:
+    """
+    Substituto do cliente gspread (gspread.authorize) sem rede nem conta Google.
+    """
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.planilhas = {}
+
+    def criar_planilha(self, titulo):
+        planilha = PlanilhaFalsa(titulo, self.latencia)
+        self.planilhas[titulo] = planilha
+        return planilha
+
+    def open(self, titulo):
+        if titulo not in self.planilhas:
+            raise gspread.exceptions.SpreadsheetNotFound(titulo)
+        return self.planilhas[titulo]
@@ -1,17 +1,136 @@
 import os
-from cryptography.fernet import Fernet
+import threading
+import uuid
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
-# 📌 Carregar a chave de criptografia
+# Arquivo de chaves: uma chave por linha, a primeira é a atual (criptografa) e as demais são antigas (só descriptografam)
+ARQUIVO_CHAVE = os.environ.get("CHAVE_CRIPTOGRAFIA", "criptografia/chave_secreta.key")
+
+# Todo token Fernet começa com a versão (0x80) codificada em base64
+PREFIXO_TOKEN = "gAAAAA"
+
+_chaves = None
+_lock = threading.Lock()
+
+
+# 📌 Carregar as chaves de criptografia (uma única leitura do arquivo por processo)
 def carregar_chave():
-    with open("criptografia/chave_secreta.key", "rb") as chave_file:
-        return Fernet(chave_file.read())
+    global _chaves
+    with _lock:
+        if _chaves is None:
+            with open(ARQUIVO_CHAVE, "rb") as chave_file:
+                linhas = [linha.strip() for linha in chave_file.read().splitlines() if linha.strip()]
+            if not linhas:
+                raise ValueError(f"Nenhuma chave em {ARQUIVO_CHAVE}")
+            _chaves = MultiFernet([Fernet(linha) for linha in linhas])
+        return _chaves
+
+
+def recarregar_chave():
+    """
+    Descarta as chaves em memória; a próxima operação relê o arquivo (após uma rotação feita por outro processo).
+    """
+    global _chaves
+    with _lock:
+        _chaves = None
+
+
+# 🔄 Rotacionar a chave: a nova passa a criptografar e as anteriores continuam descriptografando
+def rotacionar_chave():
+    nova = Fernet.generate_key()
+    anteriores = b""
+    if os.path.exists(ARQUIVO_CHAVE):
+        with open(ARQUIVO_CHAVE, "rb") as chave_file:
+            anteriores = chave_file.read().strip()
+
+    temporario = f"{ARQUIVO_CHAVE}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(temporario, "wb") as chave_file:
+        chave_file.write(nova + (b"\n" + anteriores if anteriores else b"") + b"\n")
+    os.replace(temporario, ARQUIVO_CHAVE)
+    recarregar_chave()
+    return nova
+
+
+def criptografado(dado):
+    return isinstance(dado, str) and dado.startswith(PREFIXO_TOKEN)
+
 
 # 🔒 Criptografar um dado
 def criptografar(dado):
-    f = carregar_chave()
-    return f.encrypt(dado.encode()).decode()
+    return carregar_chave().encrypt(dado.encode()).decode()
+
 
 # 🔓 Descriptografar um dado
 def descriptografar(dado_criptografado):
-    f = carregar_chave()
-    return f.decrypt(dado_criptografado.encode()).decode()
+    return carregar_chave().decrypt(dado_criptografado.encode()).decode()
+
+
+# 🔹 Operações em colunas inteiras (listas ou pandas.Series), com as chaves carregadas uma única vez
+def _mapear_coluna(valores, funcao):
+    # Vazios (None, NaN, "") passam sem alteração; uma Series volta como Series com o mesmo índice
+    convertidos = [funcao(valor) if isinstance(valor, str) and valor else valor for valor in valores]
+    if hasattr(valores, "index") and hasattr(valores, "name"):
+        return type(valores)(convertidos, index=valores.index, name=valores.name, dtype=object)
+    return convertidos
+
+
+def criptografar_coluna(valores):
+    """
+    Criptografa todos os textos da coluna. Cada valor recebe o próprio IV: textos iguais geram tokens diferentes.
+    """
+    fernet = carregar_chave()
+    return _mapear_coluna(valores, lambda valor: fernet.encrypt(valor.encode()).decode())
+
+
+def descriptografar_coluna(valores, ignorar_texto_puro=False):
+    """
+    Descriptografa todos os tokens da coluna. Com `ignorar_texto_puro`, valores que não são tokens Fernet
+    (linhas gravadas antes da criptografia) são mantidos como estão.
+    Tokens repetidos são descriptografados uma única vez.
+    """
+    fernet = carregar_chave()
+    descriptografados = {}
+
+    def descriptografar_valor(valor):
+        if ignorar_texto_puro and not criptografado(valor):
+            return valor
+        if valor not in descriptografados:
+            descriptografados[valor] = fernet.decrypt(valor.encode()).decode()
+        return descriptografados[valor]
+
+    return _mapear_coluna(valores, descriptografar_valor)
+
+
+def rotacionar_coluna(valores):
+    """
+    Recriptografa os tokens da coluna com a chave atual (depois de `rotacionar_chave`), sem expor os textos.
+    """
+    fernet = carregar_chave()
+    return _mapear_coluna(valores, lambda valor: fernet.rotate(valor.encode()).decode())
+
+
+def criptografar_campos(dados, campos):
+    """
+    Cópia de um dicionário com os `campos` em texto puro criptografados (os já criptografados são mantidos).
+    """
+    resultado = dict(dados)
+    for campo in campos:
+        valor = resultado.get(campo)
+        if isinstance(valor, str) and valor and not criptografado(valor):
+            resultado[campo] = criptografar(valor)
+    return resultado
+
+
+def descriptografar_campos(dados, campos):
+    """
+    Cópia de um dicionário (ex.: credenciais) com os `campos` criptografados já em texto puro.
+    Campos ainda em texto puro são mantidos, para arquivos antigos continuarem funcionando.
+    """
+    resultado = dict(dados)
+    for campo in campos:
+        if criptografado(resultado.get(campo)):
+            try:
+                resultado[campo] = descriptografar(resultado[campo])
+            except InvalidToken:
+                raise ValueError(f"Não foi possível descriptografar '{campo}': chave diferente da usada na criptografia")
+    return resultado
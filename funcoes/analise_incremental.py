@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import pandas as pd
+from ambiente.manutencao import PlanoManutencao
+from funcoes.arquivos_cache import caminho_temporario
+from funcoes.cache_transacoes import DIR_CACHE, caminho_arquivo_cache, versao_cache
+from funcoes.dinheiro import centavos_para_texto, formatar_percentual
+
+CABECALHO_ANALISE = ["Mês/Ano", "Categoria", "Total Gasto", "Média Mensal", "Percentual do Total", "Recomendação"]
+
+_estados = {}
+_lock = threading.Lock()
+
+
+def _estado_vazio(versao):
+    # "escrito" guarda as linhas gravadas na aba na última vez (None = desconhecido, regrava tudo)
+    return {"versao": versao, "linhas": 0, "soma": {}, "contagem": {}, "escrito": None}
+
+
+def _carregar_estado(nome_planilha):
+    caminho = caminho_arquivo_cache("analise", nome_planilha, "json")
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+    # Chaves de tupla são salvas como "Mês/Ano|Categoria"
+    dados["soma"] = {tuple(chave.split("|", 1)): valor for chave, valor in dados["soma"].items()}
+    dados["contagem"] = {tuple(chave.split("|", 1)): valor for chave, valor in dados["contagem"].items()}
+    return dados
+
+
+def _salvar_estado(nome_planilha, estado):
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    dados = dict(estado)
+    dados["soma"] = {"|".join(chave): valor for chave, valor in estado["soma"].items()}
+    dados["contagem"] = {"|".join(chave): valor for chave, valor in estado["contagem"].items()}
+    caminho = caminho_arquivo_cache("analise", nome_planilha, "json")
+    temporario = caminho_temporario(caminho)
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def _acumular(estado, transacoes_df):
+    """
+    Soma ao estado as despesas das linhas informadas. Retorna os meses afetados.
+    """
+    despesas_df = transacoes_df[transacoes_df["Tipo"] == "Despesa"]
+    if despesas_df.empty:
+        return set()
+
+    # Datas inválidas (NaT) ficam de fora da análise
+    despesas_df = despesas_df[despesas_df["Data"].notna()]
+    if despesas_df.empty:
+        return set()
+
+    meses = despesas_df["Data"].dt.strftime("%m/%Y").rename("Mês/Ano")
+    parcial = despesas_df.groupby([meses, "Categoria"], observed=True)["Valor"].agg(["sum", "count"])
+
+    for (mes, categoria), soma, contagem in zip(parcial.index, parcial["sum"], parcial["count"]):
+        chave = (mes, categoria)
+        estado["soma"][chave] = estado["soma"].get(chave, 0) + int(soma)
+        estado["contagem"][chave] = estado["contagem"].get(chave, 0) + int(contagem)
+
+    return set(parcial.index.get_level_values(0))
+
+
+def atualizar_agregados(nome_planilha, transacoes_df):
+    """
+    Atualiza as somas/contagens por (Mês/Ano, Categoria) processando só as linhas ainda não vistas.
+    Se o cache de transações foi recarregado por completo, o estado é reconstruído do zero.
+    Retorna o estado e o conjunto de meses afetados.
+    """
+    with _lock:
+        versao = versao_cache(nome_planilha)
+        estado = _estados.get(nome_planilha) or _carregar_estado(nome_planilha)
+
+        if estado is None or estado["versao"] != versao or estado["linhas"] > len(transacoes_df):
+            estado = _estado_vazio(versao)
+
+        novas = transacoes_df.iloc[estado["linhas"]:]
+        meses_afetados = _acumular(estado, novas) if not novas.empty else set()
+        estado["linhas"] = len(transacoes_df)
+
+        _estados[nome_planilha] = estado
+        if not novas.empty:
+            _salvar_estado(nome_planilha, estado)
+        return estado, meses_afetados
+
+
+def ordem_cronologica(mes_ano):
+    """
+    Chave de ordenação de "MM/YYYY" por (ano, mês): como texto, "01/2025" viria antes de "12/2024".
+    """
+    return mes_ano[3:], mes_ano[:2]
+
+
+def gerar_recomendacao(percentual):
+    if percentual > 50:
+        return "Alto gasto! Considere cortar despesas supérfluas."
+    elif percentual > 30:
+        return "Gasto considerável. Analise se pode economizar."
+    else:
+        return "Gasto saudável. Continue monitorando."
+
+
+def montar_tabela_analise(estado):
+    """
+    Monta a tabela da 'Análise de Gastos' a partir dos agregados (uma linha por Mês/Ano e Categoria),
+    em ordem cronológica: um mês novo entra no fim e não desloca as linhas já gravadas na aba.
+    """
+    if not estado["soma"]:
+        return pd.DataFrame(columns=["Mês/Ano", "Categoria", "Total_Gasto", "Media_Mensal", "Percentual_do_Total", "Recomendação"])
+
+    chaves = sorted(estado["soma"], key=lambda chave: (ordem_cronologica(chave[0]), chave[1]))
+    analise_gastos_df = pd.DataFrame(chaves, columns=["Mês/Ano", "Categoria"])
+    total = pd.Series([estado["soma"][chave] for chave in chaves], dtype="int64")
+    contagem = pd.Series([estado["contagem"][chave] for chave in chaves], dtype="int64")
+
+    # Percentual de cada categoria dentro do seu Mês/Ano
+    total_por_mes = total.groupby(analise_gastos_df["Mês/Ano"]).transform("sum")
+    percentual = (total / total_por_mes * 100).replace([float("inf"), float("-inf")], 0).fillna(0)
+
+    analise_gastos_df["Total_Gasto"] = centavos_para_texto(total)
+    analise_gastos_df["Media_Mensal"] = centavos_para_texto((total / contagem).round())
+    analise_gastos_df["Percentual_do_Total"] = formatar_percentual(percentual)
+    analise_gastos_df["Recomendação"] = percentual.map(gerar_recomendacao)
+    return analise_gastos_df
+
+
+def gravar_analise(sheet_analise, nome_planilha, estado, analise_gastos_df):
+    """
+    Grava na aba apenas os blocos de linhas que mudaram desde a última escrita, em um único batchUpdate.
+    Sem escrita anterior conhecida, apaga a aba e grava cabeçalho e tabela no mesmo envio.
+    Retorna o número de linhas gravadas.
+    """
+    linhas = analise_gastos_df.values.tolist()
+
+    with _lock:
+        plano = PlanoManutencao(sheet_analise.spreadsheet, [sheet_analise])
+        if estado["escrito"] is None:
+            plano.limpar_a_partir(sheet_analise.id, 0)
+            plano.escrever_linhas(sheet_analise.id, [], [CABECALHO_ANALISE] + linhas)
+            gravadas = len(linhas)
+        else:
+            # linha_inicial=1: a linha 1 é o cabeçalho
+            gravadas = plano.escrever_linhas(sheet_analise.id, estado["escrito"], linhas, linha_inicial=1)
+            if not gravadas:
+                return 0
+        plano.aplicar()
+
+        estado["escrito"] = linhas
+        _salvar_estado(nome_planilha, estado)
+        return gravadas
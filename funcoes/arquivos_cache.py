@@ -0,0 +1,23 @@
+import os
+import re
+import uuid
+
+# Diretório do cache local (fica na raiz do projeto, fora do controle de versão; pode ser trocado pela variável CACHE_LOCAL)
+DIR_CACHE = os.environ.get("CACHE_LOCAL", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"))
+
+
+def caminho_arquivo_cache(prefixo, nome_planilha, extensao):
+    """
+    Caminho de um arquivo de cache local associado a uma planilha.
+    """
+    nome_arquivo = re.sub(r"[^\w-]+", "_", nome_planilha)
+    return os.path.join(DIR_CACHE, f"{prefixo}_{nome_arquivo}.{extensao}")
+
+
+def caminho_temporario(caminho):
+    """
+    Nome temporário único ao lado de `caminho`, para gravar e depois trocar com os.replace. O app, suas threads
+    e o sincronizador podem gravar o mesmo arquivo ao mesmo tempo; com um nome fixo um deles trocaria o arquivo
+    pela gravação ainda pela metade do outro.
+    """
+    return f"{caminho}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+import pandas as pd
+from ambiente.agendador import ler
+from ambiente.conexao import abrir_aba, com_reconexao
+from ambiente.metricas import medir
+from funcoes.arquivos_cache import DIR_CACHE, caminho_arquivo_cache, caminho_temporario
+from funcoes.modelo import concatenar_tabelas, tabela_de_linhas
+
+# Tempo (segundos) em que a cópia em memória é servida sem nenhuma chamada à API
+TTL_VERIFICACAO = 30
+
+# Tempo (segundos) após o qual a aba é relida por completo (captura edições/exclusões feitas direto na planilha)
+TTL_RECARGA_COMPLETA = 60 * 60
+
+_caches = {}
+_invalidacoes = {}  # nome da planilha -> número de invalidações (escritas) já registradas
+_lock = threading.Lock()  # só para os dicionários acima (operações rápidas, nunca durante chamadas à API)
+
+_locks_planilhas = {}  # nome da planilha -> Lock da atualização do cache (uma busca na API por vez)
+
+
+def _lock_planilha(nome_planilha):
+    with _lock:
+        return _locks_planilhas.setdefault(nome_planilha, threading.Lock())
+
+
+def _caminho_cache(nome_planilha):
+    return caminho_arquivo_cache("transacoes_v3", nome_planilha, "pkl")
+
+
+def _ler_disco(nome_planilha):
+    caminho = _caminho_cache(nome_planilha)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        entrada = pd.read_pickle(caminho)
+    except Exception:
+        return None
+
+    # O que veio do disco pode estar desatualizado: a próxima leitura busca as linhas novas
+    entrada["sujo"] = True
+    entrada["verificado_em"] = 0
+    return entrada
+
+
+def _gravar_disco(nome_planilha, entrada):
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    caminho = _caminho_cache(nome_planilha)
+    temporario = caminho_temporario(caminho)
+    pd.to_pickle({"linhas": entrada["linhas"], "df": entrada["df"], "carregado_em": entrada["carregado_em"]}, temporario)
+    os.replace(temporario, caminho)
+
+
+def _entrada_recente(entrada, agora):
+    # ✅ Cópia em memória recente e sem escritas pendentes: nenhuma chamada à API
+    return entrada is not None and not entrada["sujo"] and agora - entrada["verificado_em"] < TTL_VERIFICACAO
+
+
+def carregar_transacoes(client, nome_planilha, forcar=False):
+    """
+    Retorna a tabela tipada de transações (ver funcoes/modelo.py) a partir do cache local.
+    Só busca na API as linhas adicionadas depois da última sincronização;
+    a aba inteira é relida apenas na primeira carga, quando forçado ou após TTL_RECARGA_COMPLETA.
+    Sessões com a cópia recente não esperam por outra que esteja buscando dados na API; as que precisam
+    atualizar a mesma planilha esperam essa busca terminar e aproveitam o resultado.
+    """
+    with _lock:
+        entrada = _caches.get(nome_planilha)
+        if not forcar and _entrada_recente(entrada, time.time()):
+            return entrada["df"].copy()
+
+    with _lock_planilha(nome_planilha):
+        with _lock:
+            entrada = _caches.get(nome_planilha)
+            invalidacoes = _invalidacoes.get(nome_planilha, 0)
+        if entrada is None:
+            entrada = _ler_disco(nome_planilha)
+
+        agora = time.time()
+
+        # Outra sessão atualizou o cache enquanto esta esperava
+        if not forcar and _entrada_recente(entrada, agora):
+            return entrada["df"].copy()
+
+        if entrada is None or forcar or agora - entrada["carregado_em"] > TTL_RECARGA_COMPLETA:
+            # Carga completa
+            with medir("transacoes.api"):
+                dados = com_reconexao(nome_planilha, lambda: ler(
+                    abrir_aba(client, nome_planilha, "Transações").get_all_values,
+                    chave=("get_all_values", nome_planilha, "Transações")
+                ))
+            linhas = dados[1:]
+            with medir("transacoes.conversao"):
+                entrada = {"linhas": len(linhas), "df": tabela_de_linhas(linhas), "carregado_em": agora}
+            _gravar_disco(nome_planilha, entrada)
+        else:
+            # Sincronização incremental: apenas as linhas depois da última conhecida (+1 pelo cabeçalho)
+            intervalo = f"A{entrada['linhas'] + 2}:F"
+            with medir("transacoes.api"):
+                novas = com_reconexao(nome_planilha, lambda: ler(
+                    abrir_aba(client, nome_planilha, "Transações").get,
+                    intervalo,
+                    chave=("get", nome_planilha, "Transações", intervalo)
+                ))
+            # Nova entrada em vez de alterar a publicada, que outras sessões podem estar lendo
+            entrada = dict(entrada)
+            if novas:
+                with medir("transacoes.conversao"):
+                    entrada["df"] = concatenar_tabelas(entrada["df"], tabela_de_linhas(novas))
+                entrada["linhas"] += len(novas)
+                _gravar_disco(nome_planilha, entrada)
+
+        with _lock:
+            # Uma escrita invalidada durante a busca pode não ter entrado nela: a próxima leitura confere
+            entrada["sujo"] = _invalidacoes.get(nome_planilha, 0) != invalidacoes
+            entrada["verificado_em"] = agora
+            _caches[nome_planilha] = entrada
+        return entrada["df"].copy()
+
+
+def versao_cache(nome_planilha):
+    """
+    Identifica a última carga completa do cache. Quem mantém dados derivados do cache
+    usa este valor para saber se pode processar só as linhas novas ou precisa recomeçar.
+    """
+    with _lock:
+        entrada = _caches.get(nome_planilha)
+        return entrada["carregado_em"] if entrada is not None else None
+
+
+def invalidar_cache(nome_planilha):
+    """
+    Marca o cache como desatualizado após uma escrita, forçando a busca das linhas novas na próxima leitura.
+    """
+    with _lock:
+        _invalidacoes[nome_planilha] = _invalidacoes.get(nome_planilha, 0) + 1
+        entrada = _caches.get(nome_planilha)
+        if entrada is not None:
+            entrada["sujo"] = True
+
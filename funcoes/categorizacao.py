@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+import pandas as pd
+
+# Arquivo opcional com regras editáveis pelo usuário (mesmo formato de CATEGORIAS_PADRAO)
+DIR_ATUAL = os.path.dirname(os.path.abspath(__file__))
+CAMINHO_REGRAS = os.path.join(os.path.dirname(DIR_ATUAL), "ambiente", "regras_categorias.json")
+
+# Palavras-chave por categoria, em ordem de prioridade.
+# Cada palavra casa somente como palavra inteira ("oi" não casa com "oito");
+# um "*" no final casa com qualquer continuação ("droga*" casa com "drogasil" e "drogaria").
+CATEGORIAS_PADRAO = {
+    "Alimentação": ["restaurant*", "food", "ifood", "bar", "cafe*", "lanches", "tortas", "pizzaria", "padaria", "burguer", "mcdonalds"],
+    "Saúde": ["farmacia", "droga*", "pacheco", "saude", "clinic*"],
+    "Transporte": ["uber", "99pop", "gasolina", "posto", "combustivel"],
+    "Lazer": ["netflix", "spotify", "cinema", "teatro", "viagem"],
+    "Educação": ["curso", "escola", "faculdade", "canva"],
+    "Compras": ["shopping", "loja", "mercado", "supermercado", "amazon", "magalu", "casas bahia"],
+    "Assinaturas": ["prime video", "disney", "globo play", "hbo", "quinto andar"],
+    "Moradia": ["aluguel", "condominio", "energia", "internet", "claro", "vivo", "tim", "oi"],
+    "Outros": []
+}
+
+CATEGORIA_PADRAO = "Outros"
+
+# Limite de títulos memorizados (a memória é descartada ao ser atingido)
+LIMITE_MEMORIA = 100_000
+
+
+def normalizar_texto(texto):
+    """
+    Minúsculas e sem acentos ("Farmácia" -> "farmacia"), para comparar títulos com as palavras-chave.
+    """
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(caractere for caractere in texto if not unicodedata.combining(caractere))
+
+
+def _padrao_palavra(palavra):
+    palavra = normalizar_texto(palavra).strip()
+    if palavra.endswith("*"):
+        return re.escape(palavra[:-1]) + r"\w*"
+    return re.escape(palavra)
+
+
+class Categorizador:
+    """
+    Compila todas as regras em uma única expressão regular (um grupo nomeado por categoria)
+    e memoriza o resultado por título distinto.
+    """
+
+    def __init__(self, regras):
+        self.categorias = [categoria for categoria, palavras in regras.items() if palavras]
+        grupos = []
+        for indice, categoria in enumerate(self.categorias):
+            alternativas = "|".join(_padrao_palavra(palavra) for palavra in regras[categoria])
+            grupos.append(f"(?P<c{indice}>\\b(?:{alternativas})\\b)")
+        self.regex = re.compile("|".join(grupos)) if grupos else None
+        self._memoria = {}
+
+    def categorizar(self, titulo):
+        """
+        Categoria de um título; com várias categorias casando, vence a de maior prioridade.
+        """
+        categoria = self._memoria.get(titulo)
+        if categoria is not None:
+            return categoria
+
+        categoria = CATEGORIA_PADRAO
+        if self.regex is not None:
+            indices = [int(casamento.lastgroup[1:]) for casamento in self.regex.finditer(normalizar_texto(titulo))]
+            if indices:
+                categoria = self.categorias[min(indices)]
+
+        if len(self._memoria) >= LIMITE_MEMORIA:
+            self._memoria.clear()
+        self._memoria[titulo] = categoria
+        return categoria
+
+    def categorizar_serie(self, titulos):
+        """
+        Categoriza uma coluna inteira avaliando cada título distinto uma única vez.
+        """
+        titulos = titulos.fillna("").astype(str)
+        mapa = {titulo: self.categorizar(titulo) for titulo in pd.unique(titulos)}
+        return titulos.map(mapa)
+
+
+def carregar_regras(caminho=CAMINHO_REGRAS):
+    """
+    Lê as regras do arquivo JSON do usuário; sem arquivo, usa CATEGORIAS_PADRAO.
+    """
+    if not os.path.exists(caminho):
+        return CATEGORIAS_PADRAO
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+_lock = threading.Lock()
+_categorizador = None
+_mtime_regras = None
+
+
+def obter_categorizador():
+    """
+    Retorna o categorizador compilado, recompilando apenas quando o arquivo de regras muda.
+    """
+    global _categorizador, _mtime_regras
+    mtime = os.path.getmtime(CAMINHO_REGRAS) if os.path.exists(CAMINHO_REGRAS) else None
+    with _lock:
+        if _categorizador is None or mtime != _mtime_regras:
+            _categorizador = Categorizador(carregar_regras())
+            _mtime_regras = mtime
+        return _categorizador
+
+
+def categorizar_serie(titulos):
+    return obter_categorizador().categorizar_serie(titulos)
+
+
+def categorizar_titulo(titulo):
+    return obter_categorizador().categorizar(titulo)
@@ -0,0 +1,146 @@
+import re
+import threading
+from bisect import bisect_left
+import numpy as np
+from funcoes.cache_transacoes import versao_cache
+from funcoes.categorizacao import normalizar_texto
+
+# Colunas com índice por valor exato
+COLUNAS_INDEXADAS = ["Tipo", "Forma de Pagamento", "Categoria"]
+
+# Maior caractere possível: termo + FIM_TEXTO é maior que qualquer texto que comece com o termo
+FIM_TEXTO = chr(0x10FFFF)
+
+
+def _tokens(texto):
+    return re.findall(r"\w+", normalizar_texto(texto))
+
+
+class IndiceTransacoes:
+    """
+    Índices em memória sobre a tabela tipada de transações: Data e Valor ordenados (busca por intervalo),
+    posições por valor de Tipo/Forma de Pagamento/Categoria e índice invertido das palavras da Descrição,
+    com os sufixos das palavras ordenados para achar por busca binária as que contêm um termo.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.total = len(self.df)
+
+        # Datas e valores ordenados para busca binária por intervalo
+        self.datas = self.df["Data"].to_numpy(dtype="datetime64[ns]")
+        self.ordem_datas = np.argsort(self.datas, kind="stable")
+        self.datas_ordenadas = self.datas[self.ordem_datas]
+
+        self.valores = self.df["Valor"].to_numpy(dtype="int64")
+        self.ordem_valores = np.argsort(self.valores, kind="stable")
+        self.valores_ordenados = self.valores[self.ordem_valores]
+
+        # Posições das linhas por valor exato
+        self.grupos = {
+            coluna: {valor: np.asarray(posicoes) for valor, posicoes in self.df.groupby(coluna, observed=True).indices.items()}
+            for coluna in COLUNAS_INDEXADAS
+        }
+
+        # Índice invertido: palavra normalizada -> posições das linhas
+        posicoes_por_palavra = {}
+        for descricao, posicoes in self.df.groupby("Descrição").indices.items():
+            for palavra in set(_tokens(descricao)):
+                posicoes_por_palavra.setdefault(palavra, []).append(posicoes)
+        self.palavras = {palavra: np.concatenate(listas) for palavra, listas in posicoes_por_palavra.items()}
+
+        # Um termo aparece dentro de uma palavra quando é o início de algum sufixo dela: com todos os sufixos
+        # do vocabulário ordenados, as palavras que contêm o termo formam um intervalo contíguo
+        sufixos = sorted((palavra[i:], palavra) for palavra in self.palavras for i in range(len(palavra)))
+        self.sufixos = [sufixo for sufixo, _ in sufixos]
+        self.palavras_dos_sufixos = [palavra for _, palavra in sufixos]
+
+    def _mascara_intervalo(self, ordenados, ordem, minimo, maximo):
+        inicio = 0 if minimo is None else np.searchsorted(ordenados, minimo, side="left")
+        fim = len(ordenados) if maximo is None else np.searchsorted(ordenados, maximo, side="right")
+        mascara = np.zeros(self.total, dtype=bool)
+        mascara[ordem[inicio:fim]] = True
+        return mascara
+
+    def _mascara_posicoes(self, posicoes):
+        mascara = np.zeros(self.total, dtype=bool)
+        mascara[posicoes] = True
+        return mascara
+
+    def _palavras_com(self, termo):
+        inicio = bisect_left(self.sufixos, termo)
+        fim = bisect_left(self.sufixos, termo + FIM_TEXTO, inicio)
+        return set(self.palavras_dos_sufixos[inicio:fim])
+
+    def _mascara_texto(self, texto):
+        # Cada palavra digitada precisa aparecer (como parte de alguma palavra) na descrição, como no LIKE do SQLite
+        mascara = np.ones(self.total, dtype=bool)
+        for termo in _tokens(texto):
+            candidatas = [self.palavras[palavra] for palavra in self._palavras_com(termo)]
+            if not candidatas:
+                return np.zeros(self.total, dtype=bool)
+            mascara &= self._mascara_posicoes(np.concatenate(candidatas))
+        return mascara
+
+    def filtrar(self, data_inicio=None, data_fim=None, valor_min=None, valor_max=None, texto=None, **iguais):
+        """
+        Posições (em ordem) das linhas que atendem aos filtros.
+        'iguais' recebe filtros por valor exato das COLUNAS_INDEXADAS, ex.: {"Tipo": "Despesa"}.
+        """
+        mascara = np.ones(self.total, dtype=bool)
+
+        if data_inicio is not None or data_fim is not None:
+            minimo = np.datetime64(data_inicio, "ns") if data_inicio is not None else None
+            maximo = np.datetime64(data_fim, "ns") if data_fim is not None else None
+            # NaT fica no fim da ordenação e nunca entra em um intervalo com limite superior
+            mascara &= self._mascara_intervalo(self.datas_ordenadas, self.ordem_datas, minimo, maximo)
+            mascara &= ~np.isnat(self.datas)
+
+        if valor_min is not None or valor_max is not None:
+            mascara &= self._mascara_intervalo(self.valores_ordenados, self.ordem_valores, valor_min, valor_max)
+
+        for coluna, valor in iguais.items():
+            posicoes = self.grupos[coluna].get(valor)
+            if posicoes is None:
+                mascara[:] = False
+                break
+            mascara &= self._mascara_posicoes(posicoes)
+
+        if texto:
+            mascara &= self._mascara_texto(texto)
+
+        return np.flatnonzero(mascara)
+
+    def consultar(self, pagina=1, tamanho_pagina=50, **filtros):
+        """
+        Aplica os filtros e retorna (página de resultados, total de linhas filtradas, soma dos valores em centavos).
+        """
+        posicoes = self.filtrar(**filtros)
+        inicio = (max(pagina, 1) - 1) * tamanho_pagina
+        pagina_df = self.df.iloc[posicoes[inicio:inicio + tamanho_pagina]]
+        return pagina_df, len(posicoes), int(self.valores[posicoes].sum())
+
+    def em_blocos(self, tamanho_bloco, **filtros):
+        """
+        Gera as linhas filtradas em blocos de até `tamanho_bloco`, sem copiar o resultado inteiro de uma vez.
+        """
+        posicoes = self.filtrar(**filtros)
+        for inicio in range(0, len(posicoes), tamanho_bloco):
+            yield self.df.iloc[posicoes[inicio:inicio + tamanho_bloco]]
+
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def obter_indice_transacoes(nome_planilha, df):
+    """
+    Retorna o índice das transações, reconstruído somente quando o cache muda.
+    """
+    chave = (versao_cache(nome_planilha), len(df))
+    with _lock:
+        atual = _indices.get(nome_planilha)
+        if atual is None or atual[0] != chave:
+            atual = (chave, IndiceTransacoes(df))
+            _indices[nome_planilha] = atual
+        return atual[1]
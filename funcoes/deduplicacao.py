@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from funcoes.cache_transacoes import DIR_CACHE, caminho_arquivo_cache, versao_cache
+from funcoes.categorizacao import normalizar_texto
+
+# Versão do formato da impressão digital: índices gravados com outra versão são reconstruídos
+VERSAO_IMPRESSOES = 2
+
+
+def normalizar_datas(datas):
+    """
+    Converte datas "DD-MM-YYYY" (planilha), "YYYY-MM-DD..." (Nubank/CSV) ou datetime64 para "YYYY-MM-DD".
+    """
+    datas = pd.Series(datas)
+    if pd.api.types.is_datetime64_any_dtype(datas):
+        return datas.dt.strftime("%Y-%m-%d").fillna("")
+    datas = datas.fillna("").astype(str).str.slice(0, 10)
+    brasileiro = pd.to_datetime(datas, format="%d-%m-%Y", errors="coerce")
+    iso = pd.to_datetime(datas, format="%Y-%m-%d", errors="coerce")
+    return brasileiro.fillna(iso).dt.strftime("%Y-%m-%d").fillna(datas)
+
+
+def impressoes_digitais(datas, centavos, descricoes, tipos):
+    """
+    Impressão digital de cada transação: hash de (data ISO, valor absoluto em centavos, descrição normalizada, sentido).
+    O sentido (entrada ou saída de dinheiro) vem do Tipo, invertido quando o valor é negativo: separa um estorno
+    da compra original de mesma data, valor e descrição, seja ele uma Receita (Nubank) ou uma Despesa negativa (CSV).
+    """
+    datas = normalizar_datas(datas).tolist()
+    centavos = pd.Series(centavos).astype("int64")
+    receitas = pd.Series(tipos).astype(object).fillna("").astype(str).str.strip().str.lower().eq("receita").to_numpy()
+    entradas = (receitas != (centavos < 0).to_numpy()).tolist()
+    descricoes = pd.Series(descricoes).fillna("").astype(str)
+    normalizadas = {descricao: " ".join(normalizar_texto(descricao).split()) for descricao in pd.unique(descricoes)}
+
+    return [
+        hashlib.blake2b(
+            f"{data}|{valor}|{normalizadas[descricao]}|{'entrada' if entrada else 'saida'}".encode(), digest_size=8
+        ).hexdigest()
+        for data, valor, descricao, entrada in zip(datas, centavos.abs().tolist(), descricoes.tolist(), entradas)
+    ]
+
+
+class IndiceDeduplicacao:
+    """
+    Índice persistente de impressões digitais das transações já registradas na planilha.
+    É atualizado só com as linhas novas do cache e, quando disponível, também guarda o id do Nubank.
+    """
+
+    def __init__(self, nome_planilha):
+        self.nome_planilha = nome_planilha
+        self.caminho_impressoes = caminho_arquivo_cache("dedup", nome_planilha, "txt")
+        self.caminho_ids = caminho_arquivo_cache("dedup_ids", nome_planilha, "txt")
+        self.caminho_meta = caminho_arquivo_cache("dedup", nome_planilha, "json")
+        self.impressoes = set(self._ler_linhas(self.caminho_impressoes))
+        self.ids = set(self._ler_linhas(self.caminho_ids))
+        self.meta = {"versao": None, "linhas": 0, "impressoes": VERSAO_IMPRESSOES}
+        if os.path.exists(self.caminho_meta):
+            with open(self.caminho_meta, "r", encoding="utf-8") as arquivo:
+                self.meta = json.load(arquivo)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ler_linhas(caminho):
+        if not os.path.exists(caminho):
+            return []
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            return [linha.strip() for linha in arquivo if linha.strip()]
+
+    @staticmethod
+    def _acrescentar(caminho, valores):
+        if not valores:
+            return
+        os.makedirs(DIR_CACHE, exist_ok=True)
+        with open(caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write("".join(f"{valor}\n" for valor in valores))
+
+    def _salvar_meta(self):
+        os.makedirs(DIR_CACHE, exist_ok=True)
+        with open(self.caminho_meta, "w", encoding="utf-8") as arquivo:
+            json.dump(self.meta, arquivo)
+
+    def sincronizar(self, transacoes_df):
+        """
+        Indexa as linhas do cache ainda não vistas. Após uma recarga completa do cache, reconstrói o índice.
+        """
+        with self._lock:
+            versao = versao_cache(self.nome_planilha)
+            if (
+                self.meta["versao"] != versao
+                or self.meta["linhas"] > len(transacoes_df)
+                or self.meta.get("impressoes") != VERSAO_IMPRESSOES
+            ):
+                self.impressoes = set()
+                if os.path.exists(self.caminho_impressoes):
+                    os.remove(self.caminho_impressoes)
+                self.meta = {"versao": versao, "linhas": 0, "impressoes": VERSAO_IMPRESSOES}
+
+            novas = transacoes_df.iloc[self.meta["linhas"]:]
+            if not novas.empty:
+                self._registrar(impressoes_digitais(novas["Data"], novas["Valor"], novas["Descrição"], novas["Tipo"]))
+            self.meta["linhas"] = len(transacoes_df)
+            self._salvar_meta()
+
+    def _registrar(self, impressoes):
+        ineditas = [impressao for impressao in dict.fromkeys(impressoes) if impressao not in self.impressoes]
+        self.impressoes.update(ineditas)
+        self._acrescentar(self.caminho_impressoes, ineditas)
+
+    def filtrar_novas(self, impressoes, ids=None):
+        """
+        Retorna uma máscara (lista de bool) com as transações que ainda não existem no índice.
+        Repetições dentro do próprio lote também são descartadas.
+        """
+        ids = ids if ids is not None else [None] * len(impressoes)
+        with self._lock:
+            mascara = []
+            vistas = set()
+            for impressao, id_transacao in zip(impressoes, ids):
+                existe = (
+                    impressao in self.impressoes
+                    or impressao in vistas
+                    or (id_transacao is not None and id_transacao in self.ids)
+                )
+                mascara.append(not existe)
+                vistas.add(impressao)
+            return mascara
+
+    def registrar(self, impressoes, ids=None):
+        """
+        Registra no índice as transações gravadas com sucesso na planilha.
+        """
+        with self._lock:
+            self._registrar(impressoes)
+            novos_ids = [id_transacao for id_transacao in (ids or []) if id_transacao is not None and id_transacao not in self.ids]
+            self.ids.update(novos_ids)
+            self._acrescentar(self.caminho_ids, novos_ids)
+
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def obter_indice(nome_planilha):
+    """
+    Índice de deduplicação da planilha (um por processo).
+    """
+    with _lock_indices:
+        indice = _indices.get(nome_planilha)
+        if indice is None:
+            indice = IndiceDeduplicacao(nome_planilha)
+            _indices[nome_planilha] = indice
+        return indice
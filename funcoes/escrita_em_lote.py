@@ -0,0 +1,52 @@
+from ambiente.agendador import escrever
+from ambiente.conexao import abrir_planilha, abrir_aba, com_reconexao
+from funcoes.cache_transacoes import invalidar_cache
+
+
+def _linha_para_celulas(linha):
+    # stringValue equivale ao value_input_option="RAW" usado pelo append_row
+    return {"values": [{"userEnteredValue": {"stringValue": str(valor)}} for valor in linha]}
+
+
+def enviar_linhas(client, nome_planilha, linhas_por_aba):
+    """
+    Acrescenta as linhas de várias abas com uma única requisição batchUpdate (appendCells por aba).
+    """
+    if not any(linhas_por_aba.values()):
+        return
+
+    def enviar():
+        # Os ids das abas são lidos a cada tentativa: uma aba recriada na planilha tem outro id
+        requisicoes = []
+        for titulo_aba, linhas in linhas_por_aba.items():
+            if not linhas:
+                continue
+            sheet = abrir_aba(client, nome_planilha, titulo_aba)
+            requisicoes.append({
+                "appendCells": {
+                    "sheetId": sheet.id,
+                    "rows": [_linha_para_celulas(linha) for linha in linhas],
+                    "fields": "userEnteredValue"
+                }
+            })
+
+        # appendCells não é idempotente: repetido só em erro de cota (429), nunca após um 5xx.
+        # Um 400/404 (aba inexistente) é recusado por inteiro, então a nova tentativa de com_reconexao não duplica linhas
+        escrever(abrir_planilha(client, nome_planilha).batch_update, {"requests": requisicoes}, idempotente=False)
+
+    com_reconexao(nome_planilha, enviar)
+
+    if "Transações" in linhas_por_aba:
+        invalidar_cache(nome_planilha)
+
+
+def linhas_por_aba(linhas):
+    """
+    Distribui linhas no formato da aba 'Transações' entre ela e a aba do tipo (Receitas ou Despesas).
+    """
+    por_aba = {"Transações": linhas}
+    for linha in linhas:
+        aba_destino = "Receitas" if linha[5] == "Receita" else "Despesas"
+        por_aba.setdefault(aba_destino, []).append(linha[:5])
+    return por_aba
+
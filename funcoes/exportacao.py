@@ -0,0 +1,189 @@
+import csv
+import itertools
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from funcoes.arquivos_cache import DIR_CACHE
+from funcoes.dinheiro import centavos_para_texto
+
+# Formatos oferecidos na interface -> extensão do arquivo
+FORMATOS = {"CSV": "csv", "Parquet": "parquet", "Excel (XLSX)": "xlsx"}
+
+# Linhas por bloco lido do armazenamento e gravado no arquivo
+TAMANHO_BLOCO = 50_000
+
+# Limite de linhas de uma planilha do Excel (sem o cabeçalho)
+LIMITE_LINHAS_XLSX = 1_048_575
+
+DIR_EXPORTACOES = os.path.join(DIR_CACHE, "exportacoes")
+
+# Tempo (segundos) que um arquivo exportado fica em disco antes de ser apagado na próxima exportação
+VALIDADE_EXPORTACAO = 60 * 60
+
+TIPOS_MIME = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+
+def _centavos(bloco, coluna):
+    # "Valor" da tabela tipada é int64 em centavos; nas tabelas já formatadas (análise) é texto
+    return coluna == "Valor" and coluna in bloco.columns and pd.api.types.is_integer_dtype(bloco[coluna])
+
+
+def _bloco_csv(bloco):
+    """
+    Colunas do bloco como listas de texto: datas ISO (numpy, sem strftime por linha) e valores no formato da planilha.
+    """
+    colunas = []
+    for coluna in bloco.columns:
+        serie = bloco[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            textos = np.datetime_as_string(serie.to_numpy(dtype="datetime64[D]"), unit="D")
+            colunas.append(np.where(np.isnat(serie.to_numpy()), "", textos).tolist())
+        elif _centavos(bloco, coluna):
+            colunas.append(centavos_para_texto(serie, prefixo="").tolist())
+        else:
+            colunas.append(serie.astype(object).where(serie.notna(), "").tolist())
+    return zip(*colunas)
+
+
+def _escrever_csv(blocos, caminho):
+    # ";" como separador: o Excel em português abre direto, já que os valores usam vírgula decimal
+    linhas = 0
+    with open(caminho, "w", encoding="utf-8-sig", newline="") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        for numero, bloco in enumerate(blocos):
+            if numero == 0:
+                escritor.writerow(bloco.columns)
+            escritor.writerows(_bloco_csv(bloco))
+            linhas += len(bloco)
+    return linhas
+
+
+def _bloco_parquet(bloco):
+    # Categorias viram texto (os dicionários mudam de um bloco para outro) e o valor continua inteiro, em centavos
+    bloco = bloco.copy(deep=False)
+    for coluna in bloco.columns:
+        if isinstance(bloco[coluna].dtype, pd.CategoricalDtype):
+            bloco[coluna] = bloco[coluna].astype(str)
+    return bloco.rename(columns={"Valor": "Valor (centavos)"} if _centavos(bloco, "Valor") else {})
+
+
+def _escrever_parquet(blocos, caminho):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    linhas = 0
+    try:
+        for bloco in blocos:
+            tabela = pa.Table.from_pandas(_bloco_parquet(bloco), preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            # Cada bloco vira um row group: a memória fica limitada ao tamanho do bloco
+            escritor.write_table(tabela.cast(escritor.schema))
+            linhas += len(bloco)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return linhas
+
+
+def _bloco_xlsx(bloco):
+    # Datas como datetime e valores em reais (número), para o Excel poder somar e filtrar
+    colunas = []
+    for coluna in bloco.columns:
+        serie = bloco[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            colunas.append([None if pd.isna(valor) else valor for valor in serie.dt.to_pydatetime().tolist()])
+        elif _centavos(bloco, coluna):
+            colunas.append((serie.to_numpy() / 100).tolist())
+        else:
+            colunas.append(serie.astype(object).where(serie.notna(), None).tolist())
+    return zip(*colunas)
+
+
+def _escrever_xlsx(blocos, caminho):
+    import xlsxwriter
+
+    # constant_memory: cada linha vai para o disco assim que a próxima começa (as linhas precisam sair em ordem).
+    # Textos são gravados como texto: descrições começando com "=" não viram fórmula e não há busca de URLs por célula
+    livro = xlsxwriter.Workbook(caminho, {
+        "constant_memory": True,
+        "default_date_format": "dd/mm/yyyy",
+        "strings_to_formulas": False,
+        "strings_to_urls": False
+    })
+    aba = livro.add_worksheet("Exportação")
+    linhas = 0
+    try:
+        for numero, bloco in enumerate(blocos):
+            if linhas + len(bloco) > LIMITE_LINHAS_XLSX:
+                raise ValueError(f"O Excel aceita até {LIMITE_LINHAS_XLSX:,} linhas; use CSV ou Parquet.".replace(",", "."))
+            if numero == 0:
+                aba.write_row(0, 0, list(bloco.columns))
+                if _centavos(bloco, "Valor"):
+                    indice = list(bloco.columns).index("Valor")
+                    aba.set_column(indice, indice, 12, livro.add_format({"num_format": "#,##0.00"}))
+            for valores in _bloco_xlsx(bloco):
+                linhas += 1
+                aba.write_row(linhas, 0, valores)
+    finally:
+        livro.close()
+    return linhas
+
+
+_ESCRITORES = {"csv": _escrever_csv, "parquet": _escrever_parquet, "xlsx": _escrever_xlsx}
+
+
+def _apagar_antigas():
+    limite = time.time() - VALIDADE_EXPORTACAO
+    for nome in os.listdir(DIR_EXPORTACOES):
+        caminho = os.path.join(DIR_EXPORTACOES, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+
+def exportar(blocos, formato, nome_base):
+    """
+    Grava os blocos (DataFrames com as mesmas colunas) em um arquivo temporário de exportação, um bloco por vez.
+    Retorna (caminho do arquivo, número de linhas); sem nenhum bloco não há arquivo e o caminho é None.
+    """
+    extensao = FORMATOS.get(formato, formato)
+    blocos = iter(blocos)
+    primeiro = next(blocos, None)
+    if primeiro is None:
+        return None, 0
+    blocos = itertools.chain([primeiro], blocos)
+
+    os.makedirs(DIR_EXPORTACOES, exist_ok=True)
+    _apagar_antigas()
+    nome_arquivo = re.sub(r"[^\w-]+", "_", nome_base)
+    # Sufixo aleatório: duas exportações no mesmo segundo (outra sessão, clique duplo) não gravam o mesmo arquivo
+    caminho = os.path.join(
+        DIR_EXPORTACOES, f"{nome_arquivo}_{datetime.now():%Y%m%d-%H%M%S}_{uuid.uuid4().hex[:8]}.{extensao}"
+    )
+    try:
+        linhas = _ESCRITORES[extensao](blocos, caminho)
+    except Exception:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        raise
+    return caminho, linhas
+
+
+def em_blocos(df, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Divide uma tabela já em memória (ex.: a análise filtrada) em blocos, para usar o mesmo caminho de exportação.
+    """
+    for inicio in range(0, max(len(df), 1), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
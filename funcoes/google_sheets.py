@@ -1,7 +1,17 @@
-import gspread
+import os
 import streamlit as st
 from datetime import datetime
 import pandas as pd
+from ambiente.metricas import medir
+from armazenamento.diario import obter_diario
+from funcoes.analise_incremental import ordem_cronologica
+from funcoes.dinheiro import centavos_para_texto, formatar_centavos, formatar_percentual
+from funcoes.modelo import Transacao, formatar_para_exibicao
+from funcoes.importacao_csv import COLUNAS_PLANILHA, normalizar_lote, processar_csv_em_lotes
+from funcoes.deduplicacao import obter_indice
+from funcoes.metadados import opcoes_filtros
+from funcoes.exportacao import FORMATOS, TAMANHO_BLOCO, TIPOS_MIME, em_blocos, exportar
+from funcoes.relatorios import LIVRO_CONSOLIDADO, analisar_livros, anos_disponiveis
 
 # Listas de categorias padronizadas
 CATEGORIAS_RECEITAS = ["Salário", "Freelance", "Aluguel", "Investimentos", "Reembolso", "Outros"]
@@ -10,14 +20,11 @@ CATEGORIAS_DESPESAS = ["Alimentação", "Transporte", "Moradia", "Saúde", "Laze
 # Formas de pagamento aceitas
 FORMAS_PAGAMENTO = ["Pix", "Ted", "Boleto", "Dinheiro"]
 
-def adicionar_transacao(client, nome_planilha):
+def adicionar_transacao(armazenamento):
     """
     Adiciona uma transação na aba 'Transações' e também na respectiva aba de acordo com seu tipo (Receita ou Despesa).
     """
 
-    # Abrir a planilha
-    spreadsheet = client.open(nome_planilha)
-
     st.subheader("📝 Adicionar Nova Transação")
 
     # Escolher um tipo de transação
@@ -39,28 +46,43 @@ def adicionar_transacao(client, nome_planilha):
     categorias = CATEGORIAS_RECEITAS if tipo == "Receita" else CATEGORIAS_DESPESAS
     categoria = st.selectbox("Categoria da transação:", categorias)
 
+    # Na planilha, a transação vai para o diário local e é enviada em segundo plano (o banco local já é imediato)
+    diario = obter_diario(armazenamento.nome)
+
     # Botão para adicionar transação
     if st.button("Adicionar Transação"):
         try:
-            # Formatar valores corretamente
-            valor_formatado = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            data_formatada = data.strftime("%d-%m-%Y")
+            transacao = Transacao(
+                data=data,
+                descricao=descricao,
+                valor_centavos=round(valor * 100),
+                forma_pagamento=forma_pgt,
+                categoria=categoria,
+                tipo=tipo
+            )
 
             # Dados formatados para inserção na aba "Transações"
-            dados_transacao = [data_formatada, descricao, valor_formatado, forma_pgt, categoria, tipo]
-            dados_aba_correta = [data_formatada, descricao, valor_formatado, forma_pgt, categoria]
-
-            # Adiciona sempre na aba "Transações"
-            sheet_transacoes = spreadsheet.worksheet("Transações")
-            sheet_transacoes.append_row(dados_transacao)
-
-            # Adiciona também na aba correta (Receitas ou Despesas)
-            aba_destino = "Receitas" if tipo == "Receita" else "Despesas"
-            sheet_destino = spreadsheet.worksheet(aba_destino)
-            sheet_destino.append_row(dados_aba_correta)
-
-            # Exibir mensagem de sucesso
-            st.success(f"✅ Transação adicionada com sucesso na aba '{aba_destino}'!")
+            dados_transacao = transacao.para_linha()
+            data_formatada, _, valor_formatado = dados_transacao[:3]
+
+            # Aba "Transações" sempre, e também a aba correta (Receitas ou Despesas), na mesma requisição
+            aba_destino = transacao.aba_destino
+            with medir("adicionar.envio"):
+                if diario is not None:
+                    diario.registrar([dados_transacao])
+                else:
+                    armazenamento.adicionar_transacoes([dados_transacao])
+
+            # Exibir mensagem de sucesso (no modo planilha a transação ainda não chegou à aba)
+            if diario is None:
+                st.success(f"✅ Transação adicionada com sucesso na aba '{aba_destino}'!")
+            elif diario.transacoes_pendentes < diario.lote_minimo:
+                st.info(
+                    f"🕒 Transação salva localmente ({diario.transacoes_pendentes}/{diario.lote_minimo}). "
+                    f"Será enviada para a aba '{aba_destino}' junto com as próximas."
+                )
+            else:
+                st.success(f"✅ Transação salva localmente. Será enviada para a aba '{aba_destino}' em instantes.")
 
             # Exibir resumo da transação
             st.write("📌 **Resumo da Transação:**")
@@ -74,162 +96,175 @@ def adicionar_transacao(client, nome_planilha):
         except Exception as e:
             st.error(f"❌ Erro ao adicionar transação: {e}")
 
-
-def visualizar_transacoes(client, nome_planilha):
+    # Transações salvas no diário que a thread ainda não conseguiu enviar
+    if diario is not None and diario.transacoes_pendentes:
+        st.caption(f"📤 {diario.transacoes_pendentes} transação(ões) salvas localmente aguardando envio para a planilha.")
+        if diario.ultimo_erro:
+            st.warning(f"⚠️ Última tentativa de envio falhou: {diario.ultimo_erro}")
+        if st.button("Enviar pendentes agora"):
+            try:
+                with medir("adicionar.envio"):
+                    enviadas = diario.descarregar()
+                st.success(f"✅ {enviadas} transação(ões) enviadas para a planilha!")
+            except Exception as e:
+                st.error(f"❌ Erro ao enviar transações pendentes: {e}")
+
+
+def _painel_exportacao(gerar_blocos, nome_base, chave):
+    """
+    Gera o arquivo de exportação (CSV, Parquet ou XLSX) bloco a bloco e oferece o download.
+    """
+    with st.expander("📤 Exportar"):
+        formato = st.selectbox("Formato do arquivo:", list(FORMATOS), key=f"{chave}_formato",
+                               help="Para muitas linhas, CSV e Parquet são gerados bem mais rápido que XLSX.")
+        if st.button("Gerar arquivo", key=f"{chave}_gerar"):
+            try:
+                with medir("exportacao"):
+                    caminho, linhas = exportar(gerar_blocos(), formato, nome_base)
+                if caminho is None:
+                    st.warning("📂 Nenhuma transação para exportar.")
+                    return
+                with open(caminho, "rb") as arquivo:
+                    st.download_button(
+                        f"⬇️ Baixar {os.path.basename(caminho)} ({linhas} linhas)",
+                        arquivo,
+                        file_name=os.path.basename(caminho),
+                        mime=TIPOS_MIME[FORMATOS[formato]],
+                        key=f"{chave}_baixar"
+                    )
+            except ImportError as e:
+                st.error(f"❌ Formato {formato} indisponível: instale o pacote '{e.name}'.")
+            except Exception as e:
+                st.error(f"❌ Erro ao exportar: {e}")
+
+
+def visualizar_transacoes(armazenamento):
     """
-    Exibe as transações da aba 'Transações' no Streamlit.
-    Permite ao usuário visualizar todas as transações ou aplicar múltiplos filtros.
+    Exibe as transações da aba 'Transações' no Streamlit, uma página por vez.
+    Permite ao usuário visualizar todas as transações ou aplicar múltiplos filtros (inclusive por período e faixa de valor).
     """
     try:
-        # Abrir a planilha e acessar a aba "Transações"
-        spreadsheet = client.open(nome_planilha)
-        sheet = spreadsheet.worksheet("Transações")
+        # Criar sidebar para filtros
+        st.sidebar.header("🔍 Filtros de Pesquisa")
+        forcar_recarga = st.sidebar.button("🔄 Recarregar da planilha")
 
-        # Obter os dados da planilha
-        dados = sheet.get_all_values()
+        # Obter as transações (no Google Sheets, só as linhas novas são buscadas na API)
+        with medir("visualizar.carga"):
+            df = armazenamento.listar_transacoes(forcar=forcar_recarga)
 
         # Verificar se há transações registradas
-        if len(dados) <= 1:
+        if df.empty:
             st.warning("📂 Nenhuma transação encontrada.")
             return
 
-        # Criar DataFrame a partir dos dados
-        cabecalho = dados[0]  # Primeira linha (nomes das colunas)
-        transacoes = dados[1:]  # Dados das transações
-        df = pd.DataFrame(transacoes, columns=cabecalho)
-
-        # Converter a coluna 'Valor' corretamente
-        df["Valor"] = df["Valor"].str.replace("R$ ", "").str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-
-        # Criar sidebar para filtros
-        st.sidebar.header("🔍 Filtros de Pesquisa")
+        # Opções dos filtros a partir dos metadados mantidos a cada escrita (sem varrer as transações)
+        with medir("visualizar.metadados"):
+            metadados = armazenamento.metadados()
+            opcoes = opcoes_filtros(metadados)
+        limites_data = [pd.Timestamp(opcoes[limite]).date() if opcoes[limite] else None for limite in ("data_min", "data_max")]
+        faixa_valores = (
+            f"Valores registrados: de {formatar_centavos(opcoes['valor_min'])} a {formatar_centavos(opcoes['valor_max'])}"
+            if opcoes["valor_min"] is not None else None
+        )
 
         # Selecionar filtros
-        data_filtro = st.sidebar.text_input("📅 Filtrar por Data (DD-MM-YYYY)")
+        periodo = st.sidebar.date_input("📅 Filtrar por Período", value=(), min_value=limites_data[0], max_value=limites_data[1])
         descricao_filtro = st.sidebar.text_input("📂 Filtrar por Descrição")
-        valor_filtro = st.sidebar.number_input("💰 Filtrar por Valor", min_value=0.0, step=0.01, format="%.2f")
-        tipo_filtro = st.sidebar.selectbox("📄 Filtrar por Tipo", ["Todos", "Receita", "Despesa"])
-        forma_pgt_filtro = st.sidebar.selectbox("💳 Filtrar por Forma de Pagamento", ["Todos", "Pix", "Ted", "Boleto", "Dinheiro"])
-
-        # Aplicar filtros ao DataFrame
-        if data_filtro:
-            df = df[df["Data"] == data_filtro]
+        valor_min = st.sidebar.number_input("💰 Valor mínimo", min_value=0.0, step=0.01, format="%.2f", help=faixa_valores)
+        valor_max = st.sidebar.number_input("💰 Valor máximo (0 = sem limite)", min_value=0.0, step=0.01, format="%.2f", help=faixa_valores)
+        tipo_filtro = st.sidebar.selectbox("📄 Filtrar por Tipo", ["Todos"] + opcoes["tipos"])
+        categorias = opcoes_filtros(metadados, tipo_filtro)["categorias"] if tipo_filtro != "Todos" else opcoes["categorias"]
+        categoria_filtro = st.sidebar.selectbox("📂 Filtrar por Categoria", ["Todas"] + categorias)
+        forma_pgt_filtro = st.sidebar.selectbox("💳 Filtrar por Forma de Pagamento", ["Todos"] + opcoes["formas_pagamento"])
+        tamanho_pagina = st.sidebar.selectbox("📄 Transações por página", [25, 50, 100, 200], index=1)
+
+        # Montar a consulta (datas e valores por intervalo, demais colunas por valor exato)
+        filtros = {}
+        if len(periodo) == 2:
+            filtros["data_inicio"], filtros["data_fim"] = periodo
         if descricao_filtro:
-            df = df[df["Descrição"].str.contains(descricao_filtro, case=False, na=False)]
-        if valor_filtro > 0:
-            df = df[df["Valor"] == valor_filtro]
+            filtros["texto"] = descricao_filtro
+        if valor_min > 0:
+            filtros["valor_min"] = round(valor_min * 100)
+        if valor_max > 0:
+            filtros["valor_max"] = round(valor_max * 100)
         if tipo_filtro != "Todos":
-            df = df[df["Tipo"] == tipo_filtro]
+            filtros["Tipo"] = tipo_filtro
+        if categoria_filtro != "Todas":
+            filtros["Categoria"] = categoria_filtro
         if forma_pgt_filtro != "Todos":
-            df = df[df["Forma de Pagamento"] == forma_pgt_filtro]
+            filtros["Forma de Pagamento"] = forma_pgt_filtro
+
+        # Contagem e soma de todas as linhas filtradas (sem montar a página)
+        with medir("visualizar.consulta"):
+            _, total_linhas, total_centavos = armazenamento.consultar(tamanho_pagina=0, **filtros)
 
         # Exibir resultados
-        if df.empty:
+        if total_linhas == 0:
             st.warning("❌ Nenhuma transação encontrada com os filtros aplicados.")
         else:
-            # Formatar valores para exibição correta
-            df["Valor"] = df["Valor"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+            total_paginas = (total_linhas - 1) // tamanho_pagina + 1
+            pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1)
+            with medir("visualizar.consulta"):
+                pagina_df, _, _ = armazenamento.consultar(pagina=int(pagina), tamanho_pagina=tamanho_pagina, **filtros)
+
+            # Formatar datas e valores apenas da página exibida
+            with medir("visualizar.formatacao"):
+                pagina_df = formatar_para_exibicao(pagina_df)
 
-            st.subheader("📊 Transações Filtradas")
-            st.dataframe(df)
+            st.subheader(f"📊 Transações Filtradas ({total_linhas})")
+            with medir("visualizar.renderizacao"):
+                st.dataframe(pagina_df)
 
-            # Calcular e exibir o valor total das transações filtradas
-            total_valor = df["Valor"].str.replace("R$ ", "").str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float).sum()
-            total_valor_formatado = f"R$ {total_valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+            # Exibir o valor total das transações filtradas (todas as páginas)
+            st.info(f"💰 **Valor Total das Transações Filtradas:** {formatar_centavos(total_centavos)}")
 
-            st.info(f"💰 **Valor Total das Transações Filtradas:** {total_valor_formatado}")
+            # Exportação de todas as linhas filtradas, lidas e gravadas em blocos
+            _painel_exportacao(
+                lambda: armazenamento.consultar_em_blocos(TAMANHO_BLOCO, **filtros), "transacoes", "exportar_transacoes"
+            )
 
     except Exception as e:
         st.error(f"❌ Erro ao visualizar transações: {e}")
 
 
-def atualizar_analise_gastos(client, nome_planilha):
+def atualizar_analise_gastos(armazenamento):
     """
     Gera os cálculos de análise de gastos a partir da aba 'Transações' e grava os resultados na aba 'Análise de Gastos'.
     Permite visualizar os resultados com filtros aplicáveis no Streamlit.
     """
     try:
-        # Abrir a planilha e acessar as abas necessárias
-        spreadsheet = client.open(nome_planilha)
-        sheet_transacoes = spreadsheet.worksheet("Transações")
-        sheet_analise = spreadsheet.worksheet("Análise de Gastos")
-
-        # Obter os dados da aba "Transações"
-        dados_transacoes = sheet_transacoes.get_all_values()
-
         # Verificar se há transações registradas
-        if len(dados_transacoes) <= 1:
+        with medir("analise.carga"):
+            vazio = armazenamento.listar_transacoes().empty
+        if vazio:
             st.warning("📂 Nenhuma transação encontrada para análise.")
             return
 
-        # Criar DataFrame com os dados das transações
-        cabecalho = dados_transacoes[0]
-        transacoes_df = pd.DataFrame(dados_transacoes[1:], columns=cabecalho)
-
-        # Converter valores numéricos corretamente (tratando erros de conversão)
-        transacoes_df["Valor"] = (
-            transacoes_df["Valor"]
-            .str.replace("R$ ", "")
-            .str.replace(".", "", regex=False)
-            .str.replace(",", ".", regex=False)
-        )
-
-        # Converter para número corretamente e tratar erros
-        transacoes_df["Valor"] = pd.to_numeric(transacoes_df["Valor"], errors="coerce")
-        transacoes_df.loc[:, "Valor"] = transacoes_df["Valor"].fillna(0)  # ✅ Isso resolve o problema
-
-        # Extrair "Mês/Ano" da coluna "Data"
-        transacoes_df["Mês/Ano"] = pd.to_datetime(transacoes_df["Data"], format="%d-%m-%Y").dt.strftime("%m/%Y")
-
-        # Separar apenas as despesas (excluir receitas)
-        despesas_df = transacoes_df[transacoes_df["Tipo"] == "Despesa"]
+        # Total Gasto, Média Mensal, Percentual do Total e Recomendação por Mês/Ano e Categoria
+        # (no Google Sheets, somente os meses com transações novas são recalculados)
+        with medir("analise.agregacao"):
+            analise_gastos_df, meses_afetados = armazenamento.agregar_gastos()
 
         # Se não houver despesas, exibir alerta
-        if despesas_df.empty:
+        if analise_gastos_df.empty:
             st.warning("💰 Nenhuma despesa registrada. Seus gastos estão zerados!")
             return
 
-        # Agrupar por Mês/Ano e Categoria e calcular Total Gasto e Média Mensal
-        analise_gastos_df = despesas_df.groupby(["Mês/Ano", "Categoria"]).agg(
-            Total_Gasto=("Valor", "sum"),
-            Media_Mensal=("Valor", "mean")
-        ).reset_index()
-
-        # Calcular percentual do total para cada categoria dentro de cada Mês/Ano
-        total_por_mes = analise_gastos_df.groupby("Mês/Ano")["Total_Gasto"].transform("sum")
-        analise_gastos_df["Percentual_do_Total"] = (analise_gastos_df["Total_Gasto"] / total_por_mes) * 100
-
-        # Gerar recomendações baseadas no percentual gasto
-        def gerar_recomendacao(percentual):
-            if percentual > 50:
-                return "Alto gasto! Considere cortar despesas supérfluas."
-            elif percentual > 30:
-                return "Gasto considerável. Analise se pode economizar."
-            else:
-                return "Gasto saudável. Continue monitorando."
-
-        analise_gastos_df["Recomendação"] = analise_gastos_df["Percentual_do_Total"].apply(gerar_recomendacao)
-
-        # Substituir valores NaN e infinitos antes da exibição
-        analise_gastos_df.replace([float("inf"), float("-inf")], 0, inplace=True)
-        analise_gastos_df.fillna(0, inplace=True)
-
-        # Converter valores numéricos para string antes da exibição (evita erro de JSON)
-        analise_gastos_df["Total_Gasto"] = analise_gastos_df["Total_Gasto"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-        analise_gastos_df["Media_Mensal"] = analise_gastos_df["Media_Mensal"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-        analise_gastos_df["Percentual_do_Total"] = analise_gastos_df["Percentual_do_Total"].apply(lambda x: f"{x:.2f}%")
-
-        # Atualizar os dados na aba "Análise de Gastos"
-        sheet_analise.clear()
-        sheet_analise.append_row(["Mês/Ano", "Categoria", "Total Gasto", "Média Mensal", "Percentual do Total", "Recomendação"])
-        sheet_analise.append_rows(analise_gastos_df.values.tolist())
+        # Atualizar a "Análise de Gastos" (no Google Sheets, somente as linhas que mudaram)
+        with medir("analise.gravacao"):
+            linhas_gravadas = armazenamento.publicar_analise(analise_gastos_df)
+        if meses_afetados:
+            st.caption(f"🔄 Meses recalculados: {', '.join(sorted(meses_afetados, key=ordem_cronologica))} ({linhas_gravadas} linha(s) gravada(s)).")
 
         st.success("✅ Análise de Gastos atualizada com sucesso!")
 
-        # Filtros para visualização
+        # Filtros para visualização (meses e categorias das despesas, vindos dos metadados)
         st.subheader("🔍 Filtros para Análise")
-        mes_filtro = st.selectbox("📅 Selecione um mês/ano:", ["Todos"] + analise_gastos_df["Mês/Ano"].unique().tolist())
-        categoria_filtro = st.selectbox("📂 Selecione uma categoria:", ["Todas"] + analise_gastos_df["Categoria"].unique().tolist())
+        with medir("analise.metadados"):
+            opcoes = opcoes_filtros(armazenamento.metadados(), "Despesa")
+        mes_filtro = st.selectbox("📅 Selecione um mês/ano:", ["Todos"] + opcoes["meses"])
+        categoria_filtro = st.selectbox("📂 Selecione uma categoria:", ["Todas"] + opcoes["categorias"])
 
         df_filtrado = analise_gastos_df.copy()
 
@@ -243,53 +278,131 @@ def atualizar_analise_gastos(client, nome_planilha):
             st.warning("❌ Nenhum dado encontrado para os filtros aplicados.")
         else:
             st.subheader("📊 Análise de Gastos")
-            st.dataframe(df_filtrado)
+            with medir("analise.renderizacao"):
+                st.dataframe(df_filtrado)
+            _painel_exportacao(lambda: em_blocos(df_filtrado), "analise_de_gastos", "exportar_analise")
 
     except Exception as e:
         st.error(f"❌ Erro ao analisar os gastos: {e}")
 
 
-def importar_transacoes_csv():
+def importar_transacoes_csv(armazenamento):
     """
-    Permite ao usuário carregar um arquivo CSV com transações e processa os dados antes de adicioná-los à planilha.
+    Permite ao usuário carregar um arquivo CSV com transações, processa os dados em lotes
+    e envia apenas as transações novas para as abas 'Transações' e 'Despesas'.
     """
     st.subheader("📥 Importar Transações do CSV")
     uploaded_file = st.file_uploader("Selecione um arquivo CSV", type=["csv"])
-    if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
-        
-    # Definir categorias conhecidas com base em palavras-chave
-    categorias_map = {
-        "Alimentação": ["restaurant", "food", "bar", "cafe", "lanches", "tortas", "pizzaria", "padaria", "burguer", "mcdonalds"],
-        "Saúde": ["farmacia", "droga", "pacheco", "saude", "clinic"],
-        "Transporte": ["uber", "99pop", "gasolina", "posto", "combustivel"],
-        "Lazer": ["netflix", "spotify", "cinema", "teatro", "viagem"],
-        "Educação": ["curso", "escola", "faculdade", "canva"],
-        "Compras": ["shopping", "loja", "mercado", "amazon", "magalu", "casas bahia"],
-        "Assinaturas": ["prime video", "disney", "globo play", "hbo", "quinto andar"],
-        "Moradia": ["aluguel", "condominio", "energia", "internet", "claro", "vivo", "tim", "oi"],
-        "Outros": []
-    }
-
-    # Função para mapear a categoria com base no título
-    def definir_categoria(title):
-        title_lower = title.lower()
-        for categoria, palavras in categorias_map.items():
-            if any(palavra in title_lower for palavra in palavras):
-                return categoria
-        return "Outros"
-
-    # Ajustar DataFrame conforme necessário
-    df["Categoria"] = df["title"].apply(definir_categoria)
-    df["Data"] = pd.to_datetime(df["date"]).dt.strftime("%d-%m-%Y")
-    df["Descrição"] = df["title"]
-    df["Valor"] = df["amount"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-    df["Forma de Pagamento"] = "Cartão de Crédito"
-    df["Tipo"] = "Despesa"
-
-    # Selecionar apenas as colunas no formato correto para a planilha
-    df_final = df[["Data", "Descrição", "Valor", "Forma de Pagamento", "Categoria", "Tipo"]]
-
-    # Exibir o DataFrame processado
-    st.dataframe(df_final)
-    st.success("✅ Transações processadas com sucesso!")
\ No newline at end of file
+    if uploaded_file is None:
+        st.info("📂 Envie um arquivo CSV com as colunas date, title e amount.")
+        return
+
+    # Prévia das primeiras linhas já no formato da planilha
+    try:
+        previa, _ = normalizar_lote(pd.read_csv(uploaded_file, nrows=20))
+        uploaded_file.seek(0)
+    except Exception as e:
+        st.error(f"❌ Erro ao ler o arquivo CSV: {e}")
+        return
+
+    st.write("📌 **Prévia das transações:**")
+    st.dataframe(previa)
+
+    if not st.button("Importar para a planilha"):
+        return
+
+    try:
+        # Índice de deduplicação atualizado só com as linhas novas
+        indice = obter_indice(armazenamento.nome)
+        indice.sincronizar(armazenamento.listar_transacoes())
+
+        barra = st.progress(0.0)
+        tamanho_arquivo = max(uploaded_file.size, 1)
+        importadas = duplicadas = 0
+
+        for df_novas, impressoes, descartadas in processar_csv_em_lotes(uploaded_file, indice):
+            if not df_novas.empty:
+                armazenamento.adicionar_transacoes(df_novas[COLUNAS_PLANILHA].values.tolist())
+                indice.registrar(impressoes)
+            importadas += len(df_novas)
+            duplicadas += descartadas
+            barra.progress(min(uploaded_file.tell() / tamanho_arquivo, 1.0))
+
+        barra.progress(1.0)
+        st.success(f"✅ {importadas} transação(ões) importada(s)! {duplicadas} ignorada(s) por duplicidade ou data inválida.")
+
+    except Exception as e:
+        st.error(f"❌ Erro ao importar transações: {e}")
+
+
+def _formatar_relatorio(relatorio):
+    """
+    Valores em centavos como "R$ 1.234,56" e percentuais como "12.35%" (sem base de comparação, "—").
+    """
+    exibicao = relatorio.copy()
+    for coluna in exibicao.columns:
+        if coluna in ("Receitas", "Despesas", "Saldo", "Total") or coluna.startswith("Média"):
+            exibicao[coluna] = centavos_para_texto(exibicao[coluna])
+        elif coluna.endswith("(%)") or coluna.startswith("Percentual"):
+            valores = exibicao[coluna].dropna()
+            exibicao[coluna] = formatar_percentual(valores).reindex(exibicao.index, fill_value="—")
+    return exibicao
+
+
+def relatorios_gastos(armazenamento, planilhas_extras=()):
+    """
+    Relatórios de vários livros (a planilha principal e as planilhas extras), calculados em uma única passada:
+    receitas, despesas e saldo por mês com médias móveis de 3/6/12 meses e variação anual,
+    gastos por categoria e por forma de pagamento.
+    """
+    st.subheader("📈 Relatórios de Gastos")
+
+    try:
+        with medir("relatorios.carga"):
+            livros = {armazenamento.nome: armazenamento.listar_transacoes()}
+            if planilhas_extras:
+                from ambiente.conexao import obter_cliente
+                from armazenamento.planilha import ArmazenamentoPlanilha
+                client = obter_cliente()
+                # Só leitura: as planilhas extras não recebem transações, então não abrem diário nem thread de envio
+                for nome_planilha in planilhas_extras:
+                    livros[nome_planilha] = ArmazenamentoPlanilha(client, nome_planilha).listar_transacoes()
+
+        anos = anos_disponiveis(livros)
+        if not anos:
+            st.warning("📂 Nenhuma transação encontrada para os relatórios.")
+            return
+
+        anos_filtro = st.multiselect("📅 Anos:", anos, default=anos[:1])
+
+        # Médias móveis e variação anual usam o histórico completo; o filtro de anos vale só para a exibição
+        with medir("relatorios.agregacao"):
+            relatorios = analisar_livros(livros, anos=anos_filtro)
+
+        mensal = relatorios["mensal"]
+        if mensal.empty:
+            st.warning("❌ Nenhum dado encontrado para os anos selecionados.")
+            return
+
+        nomes_livros = mensal["Livro"].unique().tolist()
+        padrao = nomes_livros.index(LIVRO_CONSOLIDADO) if LIVRO_CONSOLIDADO in nomes_livros else 0
+        livro = st.selectbox("📒 Livro:", nomes_livros, index=padrao)
+
+        aba_mensal, aba_categorias, aba_formas = st.tabs(["📆 Mensal", "📂 Categorias", "💳 Formas de Pagamento"])
+
+        with aba_mensal:
+            mensal_livro = mensal[mensal["Livro"] == livro].drop(columns="Livro")
+            grafico = mensal_livro.set_index("Mês/Ano")[["Despesas", "Média 3 meses", "Média 6 meses", "Média 12 meses"]] / 100
+            st.line_chart(grafico)
+            st.dataframe(_formatar_relatorio(mensal_livro), hide_index=True)
+
+        with aba_categorias:
+            categorias = relatorios["categorias"]
+            st.dataframe(_formatar_relatorio(categorias[categorias["Livro"] == livro].drop(columns="Livro")), hide_index=True)
+
+        with aba_formas:
+            formas = relatorios["formas_pagamento"]
+            st.dataframe(_formatar_relatorio(formas[formas["Livro"] == livro].drop(columns="Livro")), hide_index=True)
+
+    except Exception as e:
+        st.error(f"❌ Erro ao gerar os relatórios: {e}")
@@ -0,0 +1,51 @@
+import pandas as pd
+from funcoes.categorizacao import categorizar_serie
+from funcoes.dinheiro import centavos_para_texto, reais_para_centavos
+from funcoes.deduplicacao import impressoes_digitais
+
+# Colunas esperadas no CSV exportado pelo cartão (Nubank: date, title, amount)
+COLUNAS_CSV = ["date", "title", "amount"]
+
+COLUNAS_PLANILHA = ["Data", "Descrição", "Valor", "Forma de Pagamento", "Categoria", "Tipo"]
+
+# Quantidade de linhas lidas/enviadas por vez (mantém o uso de memória limitado)
+TAMANHO_LOTE = 5000
+
+
+def normalizar_lote(lote):
+    """
+    Converte um lote do CSV para as colunas da aba 'Transações', já categorizado e com valores formatados.
+    Também retorna os valores em centavos, usados na deduplicação.
+    """
+    centavos = reais_para_centavos(lote["amount"])
+    df = pd.DataFrame({
+        "Data": pd.to_datetime(lote["date"], errors="coerce").dt.strftime("%d-%m-%Y"),
+        "Descrição": lote["title"].fillna("").astype(str),
+        "Valor": centavos_para_texto(centavos),
+        "Forma de Pagamento": "Cartão de Crédito",
+        "Categoria": categorizar_serie(lote["title"]),
+        "Tipo": "Despesa"
+    })
+
+    # Linhas sem data válida não são importadas
+    validas = df["Data"].notna()
+    return df[validas], centavos[validas]
+
+
+def processar_csv_em_lotes(arquivo, indice, tamanho_lote=TAMANHO_LOTE):
+    """
+    Lê o CSV em lotes e devolve, a cada lote, as linhas novas, suas impressões digitais
+    (para registro no índice após a gravação) e a quantidade de linhas descartadas.
+    """
+    for lote in pd.read_csv(arquivo, chunksize=tamanho_lote):
+        faltando = [coluna for coluna in COLUNAS_CSV if coluna not in lote.columns]
+        if faltando:
+            raise ValueError(f"Colunas ausentes no CSV: {', '.join(faltando)}")
+
+        df, centavos = normalizar_lote(lote)
+        impressoes = impressoes_digitais(df["Data"], centavos, df["Descrição"], df["Tipo"])
+        mascara = indice.filtrar_novas(impressoes)
+
+        df_novas = df[mascara]
+        impressoes_novas = [impressao for impressao, nova in zip(impressoes, mascara) if nova]
+        yield df_novas, impressoes_novas, len(lote) - len(df_novas)
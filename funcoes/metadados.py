@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import pandas as pd
+from funcoes.arquivos_cache import DIR_CACHE, caminho_arquivo_cache, caminho_temporario
+from funcoes.cache_transacoes import versao_cache
+
+_metadados = {}
+_lock = threading.Lock()
+
+
+def metadados_vazios(versao=None):
+    """
+    Contagens por valor distinto (para manter as listas ao acrescentar linhas) e limites de data e valor.
+    Meses e categorias são separados por Tipo, para os filtros de despesas não oferecerem opções só de receitas.
+    """
+    return {
+        "versao": versao,
+        "linhas": 0,
+        "meses": {},  # Tipo -> {"MM/YYYY": quantidade}
+        "categorias": {},  # Tipo -> {Categoria: quantidade}
+        "formas_pagamento": {},
+        "tipos": {},
+        "data_min": None,  # "YYYY-MM-DD"
+        "data_max": None,
+        "valor_min": None,  # centavos
+        "valor_max": None
+    }
+
+
+def _somar(contagens, valores, quantidades):
+    for valor, quantidade in zip(valores, quantidades):
+        contagens[valor] = contagens.get(valor, 0) + int(quantidade)
+
+
+def _limite(atual, novo, funcao):
+    return novo if atual is None else funcao(atual, novo)
+
+
+def acumular_metadados(metadados, transacoes_df):
+    """
+    Soma aos metadados as linhas informadas (tabela tipada de transações).
+    """
+    if transacoes_df.empty:
+        return metadados
+
+    # Meses como contagem de meses desde 01/1970 (datetime64[M]); só os distintos são formatados como "MM/YYYY"
+    com_data = transacoes_df[transacoes_df["Data"].notna()]
+    meses = pd.Series(com_data["Data"].to_numpy(dtype="datetime64[M]").astype("int64"), index=com_data.index, name="Mês")
+    for (tipo, mes), quantidade in pd.concat([com_data["Tipo"], meses], axis=1).groupby(["Tipo", "Mês"], observed=True).size().items():
+        _somar(metadados["meses"].setdefault(tipo, {}), [f"{mes % 12 + 1:02d}/{1970 + mes // 12}"], [quantidade])
+
+    for (tipo, categoria), quantidade in transacoes_df.groupby(["Tipo", "Categoria"], observed=True).size().items():
+        _somar(metadados["categorias"].setdefault(tipo, {}), [categoria], [quantidade])
+
+    formas = transacoes_df["Forma de Pagamento"].value_counts()
+    tipos = transacoes_df["Tipo"].value_counts()
+    _somar(metadados["formas_pagamento"], formas[formas > 0].index, formas[formas > 0].to_numpy())
+    _somar(metadados["tipos"], tipos[tipos > 0].index, tipos[tipos > 0].to_numpy())
+
+    datas = transacoes_df["Data"].dropna()
+    if not datas.empty:
+        metadados["data_min"] = _limite(metadados["data_min"], datas.min().strftime("%Y-%m-%d"), min)
+        metadados["data_max"] = _limite(metadados["data_max"], datas.max().strftime("%Y-%m-%d"), max)
+    metadados["valor_min"] = _limite(metadados["valor_min"], int(transacoes_df["Valor"].min()), min)
+    metadados["valor_max"] = _limite(metadados["valor_max"], int(transacoes_df["Valor"].max()), max)
+    metadados["linhas"] += len(transacoes_df)
+    return metadados
+
+
+def _caminho(nome_planilha):
+    return caminho_arquivo_cache("metadados", nome_planilha, "json")
+
+
+def _carregar(nome_planilha):
+    if not os.path.exists(_caminho(nome_planilha)):
+        return None
+    try:
+        with open(_caminho(nome_planilha), "r", encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _salvar(nome_planilha, metadados):
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    caminho = _caminho(nome_planilha)
+    temporario = caminho_temporario(caminho)
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(metadados, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def atualizar_metadados(nome_planilha, transacoes_df):
+    """
+    Atualiza os metadados processando só as linhas ainda não vistas (mesma regra da análise incremental):
+    após uma recarga completa do cache de transações, eles são reconstruídos do zero.
+    """
+    with _lock:
+        versao = versao_cache(nome_planilha)
+        metadados = _metadados.get(nome_planilha) or _carregar(nome_planilha)
+
+        if metadados is None or metadados["versao"] != versao or metadados["linhas"] > len(transacoes_df):
+            metadados = metadados_vazios(versao)
+
+        novas = transacoes_df.iloc[metadados["linhas"]:]
+        if not novas.empty:
+            acumular_metadados(metadados, novas)
+            _salvar(nome_planilha, metadados)
+        _metadados[nome_planilha] = metadados
+        return metadados
+
+
+def _ordenar_meses(meses):
+    # "MM/YYYY" em ordem cronológica
+    return sorted(meses, key=lambda mes: (mes[3:], mes[:2]))
+
+
+def opcoes_filtros(metadados, tipo=None):
+    """
+    Listas prontas para os widgets de filtro, restritas a um Tipo quando informado.
+    """
+    tipos = [tipo] if tipo else list(metadados["meses"].keys() | metadados["categorias"].keys())
+    meses = set().union(*(metadados["meses"].get(t, {}) for t in tipos))
+    categorias = set().union(*(metadados["categorias"].get(t, {}) for t in tipos))
+    # Células vazias na planilha não viram opção
+    return {
+        "meses": _ordenar_meses(meses),
+        "categorias": sorted(valor for valor in categorias if valor),
+        "formas_pagamento": sorted(valor for valor in metadados["formas_pagamento"] if valor),
+        "tipos": sorted(valor for valor in metadados["tipos"] if valor),
+        "data_min": metadados["data_min"],
+        "data_max": metadados["data_max"],
+        "valor_min": metadados["valor_min"],
+        "valor_max": metadados["valor_max"]
+    }
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from datetime import date
+import pandas as pd
+from pandas.api.types import union_categoricals
+from funcoes.dinheiro import centavos_para_texto, formatar_centavos, texto_para_centavos
+
+# Colunas da aba "Transações"
+COLUNAS_TRANSACOES = ["Data", "Descrição", "Valor", "Forma de Pagamento", "Categoria", "Tipo"]
+
+# Colunas com poucos valores distintos, guardadas como categorias
+COLUNAS_CATEGORICAS = ["Forma de Pagamento", "Categoria", "Tipo"]
+
+FORMATO_DATA = "%d-%m-%Y"
+
+# Formato das linhas gravadas pela sincronização antiga do Nubank, ainda presentes em planilhas existentes
+FORMATO_DATA_ISO = "%Y-%m-%d"
+
+
+@dataclass(slots=True, frozen=True)
+class Transacao:
+    """
+    Uma transação com tipos nativos: data como date e valor em centavos.
+    """
+    data: date
+    descricao: str
+    valor_centavos: int
+    forma_pagamento: str
+    categoria: str
+    tipo: str
+
+    @property
+    def aba_destino(self):
+        return "Receitas" if self.tipo == "Receita" else "Despesas"
+
+    def para_linha(self):
+        """
+        Linha no formato da aba 'Transações': ["DD-MM-YYYY", descrição, "1.234,56", forma, categoria, tipo].
+        """
+        return [
+            self.data.strftime(FORMATO_DATA),
+            self.descricao,
+            formatar_centavos(self.valor_centavos, prefixo=""),
+            self.forma_pagamento,
+            self.categoria,
+            self.tipo
+        ]
+
+
+def tabela_de_linhas(linhas):
+    """
+    Monta a tabela colunar de transações a partir das linhas da planilha:
+    'Data' datetime64 (NaT quando inválida), 'Valor' int64 em centavos e colunas categóricas.
+    """
+    # A API omite células vazias no fim da linha, então completamos até o número de colunas
+    largura = len(COLUNAS_TRANSACOES)
+    linhas = [(list(linha) + [""] * largura)[:largura] for linha in linhas]
+    df = pd.DataFrame(linhas, columns=COLUNAS_TRANSACOES)
+    return tipar_tabela(df)
+
+
+def converter_datas(datas):
+    """
+    Datas "DD-MM-YYYY" da planilha para datetime64; as que não estão nesse formato são tentadas como
+    "YYYY-MM-DD" (linhas antigas do Nubank). NaT só para datas vazias ou inválidas.
+    """
+    convertidas = pd.to_datetime(datas, format=FORMATO_DATA, errors="coerce")
+    faltantes = convertidas.isna() & datas.notna()
+    if faltantes.any():
+        iso = datas[faltantes].astype(str).str.slice(0, 10)
+        convertidas[faltantes] = pd.to_datetime(iso, format=FORMATO_DATA_ISO, errors="coerce")
+    return convertidas
+
+
+def tipar_tabela(df):
+    """
+    Converte um DataFrame com as colunas da aba 'Transações' para os tipos compactos da tabela.
+    """
+    df = df.copy()
+    if not pd.api.types.is_datetime64_any_dtype(df["Data"]):
+        df["Data"] = converter_datas(df["Data"])
+    if not pd.api.types.is_integer_dtype(df["Valor"]):
+        df["Valor"] = texto_para_centavos(df["Valor"])
+    df["Descrição"] = df["Descrição"].fillna("").astype(str)
+    for coluna in COLUNAS_CATEGORICAS:
+        df[coluna] = df[coluna].fillna("").astype(str).astype("category")
+    return df
+
+
+def concatenar_tabelas(anterior, novas):
+    """
+    Acrescenta linhas à tabela preservando as colunas categóricas (sem voltar para object).
+    """
+    if anterior.empty:
+        return novas.reset_index(drop=True)
+    resultado = pd.concat([anterior, novas], ignore_index=True)
+    for coluna in COLUNAS_CATEGORICAS:
+        resultado[coluna] = union_categoricals([anterior[coluna], novas[coluna]], ignore_order=True)
+    return resultado
+
+
+def formatar_para_exibicao(df):
+    """
+    Cópia da tabela com data "DD-MM-YYYY" e valor "R$ 1.234,56", para exibição.
+    """
+    exibicao = df.copy()
+    exibicao["Data"] = exibicao["Data"].dt.strftime(FORMATO_DATA).fillna("")
+    exibicao["Valor"] = centavos_para_texto(exibicao["Valor"])
+    return exibicao
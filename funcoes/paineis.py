@@ -0,0 +1,103 @@
+import streamlit as st
+from datetime import datetime
+from ambiente.metricas import exportar_json, exportar_prometheus, instantaneo
+from integracao.sincronizador import iniciar_em_segundo_plano, ler_checkpoint, ler_progresso
+
+# Painéis do menu lateral exibidos em todas as páginas: dependem só de arquivos locais e das métricas
+# do processo (sem pandas nem conexão com o Google Sheets), para não pesar na abertura do app
+
+
+def painel_sincronizacao_nubank(nome_armazenamento, tipo_armazenamento):
+    """
+    Painel lateral da sincronização com o Nubank: dispara uma rodada em outro processo
+    e mostra o progresso publicado pelo sincronizador (sem bloquear a página).
+    """
+    st.sidebar.subheader("🏦 Nubank")
+
+    if st.sidebar.button("📥 Importar Transações do Nubank"):
+        if iniciar_em_segundo_plano(nome_armazenamento, tipo_armazenamento):
+            st.sidebar.info("🔄 Sincronização iniciada em segundo plano.")
+        else:
+            st.sidebar.warning("⏳ Já existe uma sincronização em andamento.")
+
+    progresso = ler_progresso(nome_armazenamento)
+    if progresso["estado"] == "executando":
+        total = progresso["total"]
+        st.sidebar.progress(progresso["processadas"] / total if total else 0.0, text=progresso["etapa"])
+        st.sidebar.button("🔄 Atualizar status")
+    elif progresso["estado"] == "erro":
+        st.sidebar.error(f"❌ Erro na sincronização do Nubank: {progresso['mensagem']}")
+    elif progresso["estado"] == "concluido":
+        st.sidebar.success(f"✅ {progresso['mensagem']}")
+
+    checkpoint = ler_checkpoint(nome_armazenamento)
+    if checkpoint["sincronizado_em"]:
+        ultima = datetime.fromtimestamp(checkpoint["sincronizado_em"]).strftime("%d-%m-%Y %H:%M")
+        st.sidebar.caption(f"Última sincronização: {ultima}")
+
+    desempenho = progresso.get("desempenho")
+    if desempenho:
+        st.sidebar.caption(f"⏱️ Última rodada: {desempenho['duracao']:.1f} s, {desempenho['chamadas_api']} chamada(s) à API")
+
+
+def painel_diario(nome_armazenamento):
+    """
+    Aviso lateral com as transações digitadas que estão no diário local e ainda não chegaram à planilha.
+    """
+    # Importado aqui: o diário só existe depois que a página carregou o armazenamento
+    from armazenamento.diario import obter_diario
+
+    diario = obter_diario(nome_armazenamento)
+    if diario is None or not diario.transacoes_pendentes:
+        return
+    st.sidebar.caption(f"📤 {diario.transacoes_pendentes} transação(ões) aguardando envio para a planilha.")
+    if diario.ultimo_erro:
+        st.sidebar.warning("⚠️ A última tentativa de envio falhou; uma nova será feita em instantes.")
+
+
+def painel_desempenho(rodada):
+    """
+    Painel lateral de depuração: tempo de cada etapa do rerun, chamadas à API e bytes trafegados,
+    rodadas acima do orçamento de latência e exportação das métricas (JSON e Prometheus).
+    """
+    if not st.sidebar.checkbox("⏱️ Painel de desempenho"):
+        return
+
+    import pandas as pd
+
+    with st.sidebar.expander("⏱️ Desempenho", expanded=True):
+        if rodada is not None:
+            orcamento = f" (orçamento: {rodada['orcamento'] * 1000:.0f} ms)" if rodada["orcamento"] else ""
+            st.write(f"**{rodada['pagina']}**: {rodada['duracao'] * 1000:.0f} ms{orcamento}")
+            if rodada["estourou"]:
+                st.error("🐢 Rerun acima do orçamento de latência!")
+            st.caption(
+                f"{rodada['chamadas_api']} chamada(s) à API, "
+                f"{rodada['bytes_recebidos'] / 1024:.1f} KB recebidos, {rodada['bytes_enviados'] / 1024:.1f} KB enviados"
+            )
+            if rodada["etapas"]:
+                etapas = pd.DataFrame(rodada["etapas"], columns=["Etapa", "Segundos"]).groupby("Etapa", sort=False).sum()
+                st.dataframe(etapas.style.format("{:.3f}"))
+
+        dados = instantaneo()
+        if dados["rodadas"]:
+            st.write("**Rodadas recentes**")
+            rodadas = pd.DataFrame([
+                {
+                    "Página": r["pagina"],
+                    "ms": round(r["duracao"] * 1000),
+                    "API": r["chamadas_api"],
+                    "Acima do orçamento": "⚠️" if r["estourou"] else ""
+                }
+                for r in reversed(dados["rodadas"])
+            ])
+            st.dataframe(rodadas, hide_index=True)
+
+        agendador = dados["agendador"]
+        st.caption(
+            f"Agendador: {agendador['chamadas']} chamada(s), {agendador['limitadas']} limitada(s) pela cota, "
+            f"{agendador['novas_tentativas']} nova(s) tentativa(s), {agendador['coalescidas']} leitura(s) coalescida(s)."
+        )
+
+        st.download_button("📄 Exportar JSON", exportar_json(), file_name="metricas.json", mime="application/json")
+        st.download_button("📈 Exportar Prometheus", exportar_prometheus(), file_name="metricas.prom", mime="text/plain")
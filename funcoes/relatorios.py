@@ -0,0 +1,254 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Abaixo deste número de linhas o cálculo roda no próprio processo (enviar as partições custaria mais que agregar).
+# Com 2 livros de 250 mil linhas o pool ainda perdia para um processo; recalibre com benchmarks/bench_relatorios.py
+LINHAS_MINIMAS_PROCESSOS = 1_000_000
+
+# Processos do pool e partições (faixas de meses) por processo
+MAX_PROCESSOS = min(4, os.cpu_count() or 1)
+PARTICOES_POR_PROCESSO = 4
+
+# Janelas (em meses) das médias móveis de despesas
+JANELAS_MEDIA_MOVEL = (3, 6, 12)
+
+# Rótulo do consolidado quando há mais de um livro
+LIVRO_CONSOLIDADO = "Todos"
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _obter_pool():
+    # "spawn": o servidor do Streamlit tem várias threads e um fork poderia herdar locks travados
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESSOS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(encerrar_pool)
+        return _pool
+
+
+def encerrar_pool():
+    """
+    Cancela as partições ainda na fila e espera os processos do pool terminarem (chamado na saída do processo).
+    """
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _agregar_particao(colunas):
+    """
+    Agregados de uma faixa de meses (executado nos processos do pool). Cada mês pertence a uma única
+    partição, então os resultados das partições só precisam ser concatenados.
+    Recebe e devolve só inteiros (códigos das categorias, meses e centavos): é o que trafega entre os processos.
+    """
+    particao = pd.DataFrame(colunas)
+    particao["Mês"] = particao["Mês"].astype("int32")
+    particao["Valor"] = particao["Valor"].astype("int64")
+    despesas = particao[particao["Despesa"]]
+    receitas = particao[~particao["Despesa"]]
+    return {
+        "categorias": despesas.groupby(["Livro", "Mês", "Categoria"])["Valor"].agg(["sum", "count"]),
+        "formas": despesas.groupby(["Livro", "Mês", "Forma de Pagamento"])["Valor"].sum(),
+        "despesas": despesas.groupby(["Livro", "Mês"])["Valor"].sum(),
+        "receitas": receitas.groupby(["Livro", "Mês"])["Valor"].sum()
+    }
+
+
+def _codificar(tabela):
+    """
+    Colunas enviadas aos processos: só as receitas e despesas, com os códigos inteiros das categorias
+    (sem os rótulos), o mês e o valor em centavos nos menores inteiros que os comportam.
+    """
+    tipos = tabela["Tipo"]
+    despesa = (tipos == "Despesa").to_numpy()
+    movimento = despesa | (tipos == "Receita").to_numpy()
+    colunas = {
+        coluna: tabela[coluna].cat.codes.to_numpy()[movimento]
+        for coluna in ("Livro", "Categoria", "Forma de Pagamento")
+    }
+    # Meses desde o ano 0 cabem em int16 até o ano 2730
+    colunas["Mês"] = tabela["Mês"].to_numpy()[movimento].astype("int16")
+    colunas["Despesa"] = despesa[movimento]
+    valores = tabela["Valor"].to_numpy()[movimento]
+    limite = np.iinfo("int32")
+    if len(valores) and limite.min <= valores.min() and valores.max() <= limite.max:
+        valores = valores.astype("int32")
+    colunas["Valor"] = valores
+    return colunas
+
+
+def _decodificar(agregado, tabela):
+    # Códigos de volta para as categorias da tabela (mesma ordem, então o índice continua ordenado igual)
+    indice = agregado.index
+    for posicao, nivel in enumerate(indice.names):
+        if nivel != "Mês":
+            codigos = indice.levels[posicao].to_numpy()
+            indice = indice.set_levels(pd.CategoricalIndex(
+                pd.Categorical.from_codes(codigos, dtype=tabela[nivel].dtype), name=nivel
+            ), level=posicao, verify_integrity=False)
+    agregado.index = indice
+    return agregado
+
+
+def _preparar(livros):
+    """
+    Junta as tabelas tipadas dos livros em uma só, com 'Livro' e 'Mês' (ano * 12 + mês - 1, contínuo).
+    As colunas categóricas recebem as mesmas categorias em todos os livros, para a junção continuar categórica.
+    """
+    colunas_categoricas = ("Categoria", "Forma de Pagamento", "Tipo")
+    tipos = {
+        coluna: pd.CategoricalDtype(sorted(set().union(*(df[coluna].astype("category").cat.categories for df in livros.values()))))
+        for coluna in colunas_categoricas
+    }
+    nomes = list(livros)
+
+    partes = []
+    for posicao, (nome, df) in enumerate(livros.items()):
+        df = df[df["Data"].notna()]
+        # datetime64[M] conta os meses desde 01/1970
+        meses = df["Data"].to_numpy(dtype="datetime64[M]").astype("int64") + 1970 * 12
+        parte = pd.DataFrame({
+            "Livro": pd.Categorical.from_codes(np.full(len(df), posicao), categories=nomes),
+            "Mês": meses.astype("int32")
+        })
+        for coluna in colunas_categoricas:
+            parte[coluna] = df[coluna].astype(tipos[coluna]).array
+        parte["Valor"] = df["Valor"].to_numpy()
+        partes.append(parte)
+    return pd.concat(partes, ignore_index=True)
+
+
+def _particionar_por_mes(tabela, quantidade):
+    """
+    Divide a tabela em `quantidade` faixas contíguas de meses com número de linhas parecido.
+    """
+    tabela = tabela.sort_values("Mês", kind="stable")
+    meses = tabela["Mês"].to_numpy()
+    limites = np.searchsorted(meses, np.quantile(meses, np.linspace(0, 1, quantidade + 1)[1:-1]), side="right")
+    cortes = [0, *np.unique(limites).tolist(), len(tabela)]
+    return [tabela.iloc[inicio:fim] for inicio, fim in zip(cortes, cortes[1:]) if fim > inicio]
+
+
+def _agregar(tabela):
+    if MAX_PROCESSOS == 1 or len(tabela) < LINHAS_MINIMAS_PROCESSOS:
+        parciais = [_agregar_particao(_codificar(tabela))]
+    else:
+        particoes = _particionar_por_mes(tabela, MAX_PROCESSOS * PARTICOES_POR_PROCESSO)
+        parciais = list(_obter_pool().map(_agregar_particao, [_codificar(particao) for particao in particoes]))
+    return {chave: _decodificar(pd.concat([parcial[chave] for parcial in parciais]), tabela) for chave in parciais[0]}
+
+
+def rotulo_mes(meses):
+    """
+    Índice de mês contínuo -> "MM/YYYY" (mesmo formato da aba 'Análise de Gastos').
+    """
+    meses = np.asarray(meses)
+    return [f"{mes % 12 + 1:02d}/{mes // 12}" for mes in meses.tolist()]
+
+
+def _variacao(atual, anterior):
+    # Variação percentual; sem base de comparação (zero ou sem histórico), NaN
+    return (atual / anterior.where(anterior != 0) - 1) * 100
+
+
+def _relatorio_mensal(despesas, receitas):
+    """
+    Receitas, despesas e saldo por livro e mês, com médias móveis e variação anual das despesas.
+    Meses sem movimento entram com zero para as janelas e a comparação anual ficarem corretas.
+    """
+    despesas = despesas.unstack("Livro", fill_value=0)
+    receitas = receitas.unstack("Livro", fill_value=0)
+    meses = despesas.index.union(receitas.index)
+    todos_meses = pd.RangeIndex(meses.min(), meses.max() + 1, name="Mês") if len(meses) else pd.RangeIndex(0, name="Mês")
+    livros = despesas.columns.union(receitas.columns)
+    despesas = despesas.reindex(index=todos_meses, columns=livros, fill_value=0)
+    receitas = receitas.reindex(index=todos_meses, columns=livros, fill_value=0)
+
+    colunas = {"Receitas": receitas, "Despesas": despesas, "Saldo": receitas - despesas}
+    for janela in JANELAS_MEDIA_MOVEL:
+        colunas[f"Média {janela} meses"] = despesas.rolling(janela, min_periods=1).mean().round()
+    colunas["Variação anual (%)"] = _variacao(despesas, despesas.shift(12))
+
+    mensal = pd.concat({nome: valores.stack() for nome, valores in colunas.items()}, axis=1)
+    return mensal.reorder_levels(["Livro", "Mês"]).sort_index()
+
+
+def _relatorio_categorias(categorias):
+    categorias = categorias.rename(columns={"sum": "Total", "count": "Quantidade"})
+    total_mes = categorias["Total"].groupby(level=["Livro", "Mês"]).transform("sum")
+    categorias["Percentual do mês"] = categorias["Total"] / total_mes * 100
+
+    # Mesmo livro e categoria, 12 meses antes
+    ano_anterior = categorias["Total"].rename(index=lambda mes: mes + 12, level="Mês")
+    categorias["Variação anual (%)"] = _variacao(categorias["Total"], ano_anterior.reindex(categorias.index))
+    return categorias.sort_index()
+
+
+def _relatorio_formas(formas):
+    formas = formas.to_frame("Total")
+    formas["Percentual do mês"] = formas["Total"] / formas["Total"].groupby(level=["Livro", "Mês"]).transform("sum") * 100
+    return formas.sort_index()
+
+
+def _consolidar(agregados):
+    # Soma de todos os livros como um livro a mais
+    consolidados = {}
+    for chave, valores in agregados.items():
+        niveis = [nivel for nivel in valores.index.names if nivel != "Livro"]
+        total = valores.groupby(level=niveis, observed=True).sum()
+        consolidados[chave] = pd.concat([valores, pd.concat({LIVRO_CONSOLIDADO: total}, names=["Livro"])])
+    return consolidados
+
+
+def analisar_livros(livros, anos=None):
+    """
+    Relatórios de vários livros (planilhas/contas) em uma única passada, com os meses divididos entre
+    processos quando o volume justifica. `livros` é {nome: tabela tipada de transações}.
+    Retorna {"mensal", "categorias", "formas_pagamento"} (valores em centavos), filtrando por `anos`
+    só no fim, para a média móvel e a variação anual dos primeiros meses usarem o histórico anterior.
+    """
+    tabela = _preparar(livros)
+    if tabela.empty:
+        vazio = pd.DataFrame()
+        return {"mensal": vazio, "categorias": vazio, "formas_pagamento": vazio}
+
+    agregados = _agregar(tabela)
+    if len(livros) > 1:
+        agregados = _consolidar(agregados)
+
+    relatorios = {
+        "mensal": _relatorio_mensal(agregados["despesas"], agregados["receitas"]),
+        "categorias": _relatorio_categorias(agregados["categorias"]),
+        "formas_pagamento": _relatorio_formas(agregados["formas"])
+    }
+
+    for nome, relatorio in relatorios.items():
+        meses = relatorio.index.get_level_values("Mês")
+        if anos:
+            relatorio = relatorio[np.isin(meses // 12, list(anos))]
+            meses = relatorio.index.get_level_values("Mês")
+        # Mês como "MM/YYYY" e livro como coluna, prontos para exibição
+        relatorio = relatorio.reset_index()
+        relatorio.insert(1, "Mês/Ano", rotulo_mes(meses))
+        relatorios[nome] = relatorio.drop(columns="Mês")
+    return relatorios
+
+
+def anos_disponiveis(livros):
+    """
+    Anos com transações em algum dos livros, do mais recente para o mais antigo.
+    """
+    anos = set()
+    for df in livros.values():
+        anos.update(df["Data"].dt.year.dropna().astype(int).unique().tolist())
+    return sorted(anos, reverse=True)
@@ -1,110 +1,83 @@
+import json
 import os
-import gspread
-import pandas as pd
-import streamlit as st
-from pynubank import Nubank
-from oauth2client.service_account import ServiceAccountCredentials
+from datetime import datetime
+from funcoes.modelo import Transacao
+from funcoes.categorizacao import categorizar_titulo
+from funcoes.deduplicacao import impressoes_digitais
 
-# 🔹 Configuração do Google Sheets
-def conectar_google_sheets():
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/spreadsheets"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name("ambiente/chave.json", scope)
-    client = gspread.authorize(creds)
-    return client
+ARQUIVO_CREDENCIAIS = "criptografia/credenciais_nubank.json"
+CAMPOS_SENSIVEIS = ("cpf", "senha")
 
-# 🔹 Conectar ao Nubank
+# 🔹 Credenciais do Nubank
+def carregar_credenciais_nubank():
+    if not os.path.exists(ARQUIVO_CREDENCIAIS):
+        return {}
+    from criptografia.seguranca import descriptografar_campos
+
+    with open(ARQUIVO_CREDENCIAIS, "r", encoding="utf-8") as arquivo:
+        return descriptografar_campos(json.load(arquivo), CAMPOS_SENSIVEIS)
+
+# 🔹 Conectar ao Nubank (roda no sincronizador, fora do Streamlit: erros sobem para a rodada registrá-los)
 def conectar_nubank():
+    # Importado aqui para o sincronizador funcionar com o cliente falso sem o pynubank instalado
+    from pynubank import Nubank
+
     nu = Nubank()
     
-    # Credenciais do Nubank
-    CPF = "SEU_CPF"
-    SENHA = "SUA_SENHA"
-    CERTIFICADO = "ambiente/certificado_nubank.p12"  # Caminho do certificado
+    # Credenciais do Nubank (CPF e senha podem estar criptografados com criptografia/seguranca.py)
+    credenciais = carregar_credenciais_nubank()
+    CPF = credenciais.get("cpf", "SEU_CPF")
+    SENHA = credenciais.get("senha", "SUA_SENHA")
+    CERTIFICADO = credenciais.get("certificado", "ambiente/certificado_nubank.p12")  # Caminho do certificado
     
     if not os.path.exists(CERTIFICADO):
-        st.error("❌ Certificado Nubank não encontrado. Gere o certificado no app Nubank!")
-        return None
+        raise FileNotFoundError(f"Certificado Nubank não encontrado em '{CERTIFICADO}'. Gere o certificado no app Nubank!")
     
     nu.authenticate_with_cert(CPF, SENHA, CERTIFICADO)
     return nu
 
-# 🔹 Buscar transações do Nubank
-def obter_transacoes_nubank(nu):
-    try:
-        transacoes = nu.get_account_statements()  # Obtém os extratos da conta
-        return transacoes
-    except Exception as e:
-        st.error(f"❌ Erro ao buscar transações do Nubank: {e}")
-        return None
-
 # 🔹 Evitar transações duplicadas
-def remover_duplicatas(dados_novos, dados_existentes):
+def remover_duplicatas(dados_novos, ids_nubank, indice):
     """ 
-    Compara as transações novas com as existentes na planilha para evitar duplicação.
+    Consulta o índice de deduplicação (impressão digital + id do Nubank) para evitar duplicação.
+    Recebe objetos Transacao e retorna as novas com suas impressões digitais e ids, para registro após a gravação.
     """
-    df_existente = pd.DataFrame(dados_existentes[1:], columns=dados_existentes[0]) if len(dados_existentes) > 1 else pd.DataFrame()
-    
-    # Se a planilha estiver vazia, retorna todos os novos dados
-    if df_existente.empty:
-        return dados_novos
-    
-    transacoes_existentes = set(df_existente["Descrição"] + df_existente["Data"] + df_existente["Valor"])  # Combinação única
-    
-    # Filtrar apenas transações novas
-    transacoes_filtradas = [t for t in dados_novos if (t[1] + t[0] + t[2]) not in transacoes_existentes]
-    
-    return transacoes_filtradas
+    if not dados_novos:
+        return [], [], []
 
-# 🔹 Atualizar Planilha com as transações do Nubank
-def atualizar_planilha_nubank():
-    st.info("🔄 Buscando transações do Nubank...")
-
-    client = conectar_google_sheets()
-    nu = conectar_nubank()
-    
-    if not nu:
-        return
-    
-    transacoes = obter_transacoes_nubank(nu)
-    
-    if not transacoes:
-        return
+    impressoes = impressoes_digitais(
+        [t.data.isoformat() for t in dados_novos],
+        [t.valor_centavos for t in dados_novos],
+        [t.descricao for t in dados_novos],
+        [t.tipo for t in dados_novos]
+    )
+    mascara = indice.filtrar_novas(impressoes, ids_nubank)
 
-    planilha = client.open("Controle Financeiro")  
-    sheet = planilha.worksheet("Transações")  
+    selecionadas = [i for i, nova in enumerate(mascara) if nova]
+    return (
+        [dados_novos[i] for i in selecionadas],
+        [impressoes[i] for i in selecionadas],
+        [ids_nubank[i] for i in selecionadas]
+    )
 
-    dados_existentes = sheet.get_all_values()
-    
+# 🔹 Converter o extrato do Nubank em transações
+def transacoes_do_extrato(transacoes):
+    """
+    Converte os itens de get_account_statements em objetos Transacao e ids do Nubank (para deduplicação).
+    """
     dados_novos = []
-    
-    for t in transacoes:
-        # Ajustar valores conforme o formato correto
-        valor_formatado = f"R$ {abs(t['amount']) / 100:.2f}".replace(".", ",")  # Formato R$ 0,00
-        tipo_transacao = "Receita" if t["amount"] > 0 else "Despesa"  # Define se é Receita ou Despesa
-        categoria = "Outros"  # Se não houver categoria, definir como "Outros"
-
-        dados_novos.append([
-            t["time"][:10],  # 📅 Data da transação (YYYY-MM-DD)
-            t["title"],  # 📝 Descrição
-            valor_formatado,  # 💰 Valor formatado corretamente
-            "Nubank",  # 💳 Meio de pagamento fixo como Nubank
-            categoria,  # 🏷️ Categoria (se não houver, definir como "Outros")
-            tipo_transacao  # 🔄 Tipo (Receita ou Despesa)
-        ])
+    ids_nubank = []
 
-    # Remover transações duplicadas antes de adicionar na planilha
-    transacoes_filtradas = remover_duplicatas(dados_novos, dados_existentes)
-
-    if transacoes_filtradas:
-        sheet.append_rows(transacoes_filtradas)
-        st.success("✅ Transações do Nubank adicionadas com sucesso!")
-    else:
-        st.warning("⚠️ Nenhuma nova transação encontrada. Nenhuma atualização feita.")
+    for t in transacoes:
+        transacao = Transacao(
+            data=datetime.strptime(t["time"][:10], "%Y-%m-%d").date(),  # 📅 Data da transação
+            descricao=t["title"],  # 📝 Descrição
+            valor_centavos=round(abs(t["amount"])),  # 💰 Valor em centavos
+            forma_pagamento="Nubank",  # 💳 Meio de pagamento fixo como Nubank
+            categoria=categorizar_titulo(t["title"]),  # 🏷️ Categoria pelas palavras-chave (sem correspondência, "Outros")
+            tipo="Receita" if t["amount"] > 0 else "Despesa"  # 🔄 Tipo (Receita ou Despesa)
+        )
+        dados_novos.append(transacao)
+        ids_nubank.append(f"nubank:{t['id']}" if t.get("id") else None)
 
-# 🔹 Streamlit para Importação manual
-if st.sidebar.button("📥 Importar Transações do Nubank"):
-    atualizar_planilha_nubank()
+    return dados_novos, ids_nubank
@@ -0,0 +1,70 @@
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Títulos usados no extrato sintético (cobrem as categorias padrão e o "Outros")
+TITULOS_EXEMPLO = [
+    "Uber Trip", "iFood", "Mercado Extra", "Drogasil", "Netflix", "Posto Shell",
+    "Transferência recebida", "Salário", "Padaria Pão Quente", "Cinema", "Loja XYZ"
+]
+
+
+class NubankFalso:
+    """
+    Substituto do pynubank.Nubank que não acessa a rede: autentica sem validar nada e devolve
+    um extrato fixo no mesmo formato de get_account_statements (id, time, title, amount em centavos).
+    """
+
+    def __init__(self, transacoes=None):
+        self.transacoes = list(transacoes or [])
+        self.autenticado = False
+        self.consultas = 0
+
+    @classmethod
+    def de_arquivo(cls, caminho):
+        """
+        Carrega o extrato de um arquivo JSON (lista de transações).
+        """
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            return cls(json.load(arquivo))
+
+    def authenticate_with_cert(self, cpf, senha, certificado):
+        self.autenticado = True
+
+    def get_account_statements(self):
+        self.consultas += 1
+        return [dict(transacao) for transacao in self.transacoes]
+
+    def adicionar(self, title, amount, time=None, id=None):
+        """
+        Acrescenta uma transação ao extrato (simula uma compra nova entre duas sincronizações).
+        """
+        transacao = {
+            "id": id or str(uuid.uuid4()),
+            "time": time or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "title": title,
+            "amount": amount
+        }
+        self.transacoes.append(transacao)
+        return transacao
+
+
+def gerar_extrato(quantidade, inicio=None, semente=0):
+    """
+    Extrato sintético e reprodutível, em ordem cronológica, para testes de carga da sincronização.
+    """
+    aleatorio = random.Random(semente)
+    momento = inicio or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    transacoes = []
+    for i in range(quantidade):
+        momento += timedelta(minutes=aleatorio.randint(5, 600))
+        titulo = aleatorio.choice(TITULOS_EXEMPLO)
+        valor = aleatorio.randint(100, 50000)
+        transacoes.append({
+            "id": f"falso-{semente}-{i}",
+            "time": momento.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "title": titulo,
+            "amount": valor if titulo in ("Transferência recebida", "Salário") else -valor
+        })
+    return transacoes
@@ -0,0 +1,288 @@
+"""
+Sincronização do Nubank fora do Streamlit.
+
+Uso:
+    python -m integracao.sincronizador --uma-vez
+    python -m integracao.sincronizador --intervalo 900
+    python -m integracao.sincronizador --uma-vez --extrato-falso extrato.json
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from ambiente.metricas import finalizar_rodada, iniciar_rodada, medir
+from funcoes.arquivos_cache import DIR_CACHE, caminho_arquivo_cache, caminho_temporario
+
+logger = logging.getLogger(__name__)
+
+DIR_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NOME_PLANILHA = "Controle Financeiro"
+
+# Intervalo (segundos) entre rodadas no modo agendado
+INTERVALO_SINCRONIZACAO = 15 * 60
+
+# Transações do extrato gravadas por vez (o checkpoint avança a cada lote)
+LOTE_SINCRONIZACAO = 500
+
+# Depois desse tempo (segundos) uma trava é considerada abandonada (processo morto no meio da rodada)
+TEMPO_MAXIMO_RODADA = 30 * 60
+
+
+def _ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return dict(padrao)
+    try:
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            return {**padrao, **json.load(arquivo)}
+    except (OSError, ValueError):
+        return dict(padrao)
+
+
+def _gravar_json(caminho, dados):
+    # Grava em arquivo temporário e troca, para o app nunca ler um JSON pela metade
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    temporario = caminho_temporario(caminho)
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def ler_checkpoint(nome):
+    """
+    Momento ('time' do Nubank) da última transação sincronizada e resumo da última rodada.
+    """
+    padrao = {"ultima_transacao": None, "sincronizado_em": None, "adicionadas": 0}
+    return _ler_json(caminho_arquivo_cache("nubank_checkpoint", nome, "json"), padrao)
+
+
+def gravar_checkpoint(nome, checkpoint):
+    _gravar_json(caminho_arquivo_cache("nubank_checkpoint", nome, "json"), checkpoint)
+
+
+def ler_progresso(nome):
+    """
+    Progresso publicado pelo sincronizador, para o app consultar sem bloquear.
+    """
+    padrao = {"estado": "parado", "etapa": "", "processadas": 0, "total": 0, "adicionadas": 0, "mensagem": "", "atualizado_em": None}
+    return _ler_json(caminho_arquivo_cache("nubank_progresso", nome, "json"), padrao)
+
+
+def publicar_progresso(nome, **dados):
+    progresso = ler_progresso(nome)
+    progresso.update(dados, atualizado_em=time.time())
+    _gravar_json(caminho_arquivo_cache("nubank_progresso", nome, "json"), progresso)
+
+
+def _caminho_trava(nome):
+    return caminho_arquivo_cache("nubank_sync", nome, "lock")
+
+
+def _adquirir_trava(nome):
+    """
+    Garante uma única rodada por armazenamento, mesmo com o agendador e o botão do app rodando juntos.
+    """
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    caminho = _caminho_trava(nome)
+    if os.path.exists(caminho) and time.time() - os.path.getmtime(caminho) > TEMPO_MAXIMO_RODADA:
+        os.remove(caminho)
+    try:
+        descritor = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(descritor, "w") as arquivo:
+        arquivo.write(str(os.getpid()))
+    return True
+
+
+def _liberar_trava(nome):
+    try:
+        os.remove(_caminho_trava(nome))
+    except FileNotFoundError:
+        pass
+
+
+def sincronizacao_em_andamento(nome):
+    caminho = _caminho_trava(nome)
+    return os.path.exists(caminho) and time.time() - os.path.getmtime(caminho) <= TEMPO_MAXIMO_RODADA
+
+
+def filtrar_posteriores(transacoes, ultima_transacao):
+    """
+    Transações a partir do checkpoint, em ordem cronológica. As do mesmo instante do checkpoint
+    voltam para a verificação (o índice de deduplicação descarta as já gravadas).
+    """
+    transacoes = sorted(transacoes, key=lambda t: t["time"])
+    if ultima_transacao is None:
+        return transacoes
+    return [t for t in transacoes if t["time"] >= ultima_transacao]
+
+
+def sincronizar_nubank(nu, armazenamento):
+    """
+    Uma rodada de sincronização: baixa o extrato, grava só as transações posteriores ao checkpoint
+    que ainda não existem no armazenamento e avança o checkpoint a cada lote gravado.
+    Retorna o número de transações adicionadas.
+    """
+    from funcoes.deduplicacao import obter_indice
+    from integracao.nubank_api import remover_duplicatas, transacoes_do_extrato
+
+    nome = armazenamento.nome
+    checkpoint = ler_checkpoint(nome)
+
+    publicar_progresso(nome, estado="executando", etapa="Baixando extrato do Nubank", processadas=0, total=0, adicionadas=0, mensagem="")
+    with medir("nubank.extrato"):
+        novas = filtrar_posteriores(nu.get_account_statements(), checkpoint["ultima_transacao"])
+
+    adicionadas = 0
+    if novas:
+        publicar_progresso(nome, etapa="Atualizando índice de deduplicação", total=len(novas))
+        with medir("nubank.indice"):
+            indice = obter_indice(nome)
+            indice.sincronizar(armazenamento.listar_transacoes())
+
+        for inicio in range(0, len(novas), LOTE_SINCRONIZACAO):
+            lote = novas[inicio:inicio + LOTE_SINCRONIZACAO]
+            with medir("nubank.deduplicacao"):
+                dados_novos, ids_nubank = transacoes_do_extrato(lote)
+                transacoes_filtradas, impressoes, ids = remover_duplicatas(dados_novos, ids_nubank, indice)
+
+            if transacoes_filtradas:
+                with medir("nubank.gravacao"):
+                    armazenamento.adicionar_transacoes([transacao.para_linha() for transacao in transacoes_filtradas])
+                indice.registrar(impressoes, ids)
+                adicionadas += len(transacoes_filtradas)
+
+            # ✅ Lote gravado: uma rodada interrompida recomeça daqui
+            checkpoint["ultima_transacao"] = lote[-1]["time"]
+            gravar_checkpoint(nome, checkpoint)
+            publicar_progresso(nome, etapa="Gravando transações", processadas=inicio + len(lote), adicionadas=adicionadas)
+
+    checkpoint.update(sincronizado_em=time.time(), adicionadas=adicionadas)
+    gravar_checkpoint(nome, checkpoint)
+    publicar_progresso(
+        nome,
+        estado="concluido",
+        etapa="Concluído",
+        adicionadas=adicionadas,
+        mensagem=f"{adicionadas} transação(ões) adicionada(s)." if adicionadas else "Nenhuma transação nova."
+    )
+    return adicionadas
+
+
+def criar_armazenamento_sincronizacao(tipo, nome_planilha):
+    """
+    Armazenamento usado pelo sincronizador. No modo local o espelho para a planilha fica a cargo do app,
+    para não haver dois processos enviando as mesmas linhas.
+    """
+    if tipo == "local":
+        from armazenamento.base import CAMINHO_BANCO_LOCAL
+        from armazenamento.local import ArmazenamentoLocal
+        return ArmazenamentoLocal(CAMINHO_BANCO_LOCAL, nome_planilha)
+    if tipo == "planilha":
+        from ambiente.conexao import obter_cliente
+        from armazenamento.planilha import ArmazenamentoPlanilha
+        return ArmazenamentoPlanilha(obter_cliente(), nome_planilha)
+    raise ValueError(f"Armazenamento desconhecido: {tipo}")
+
+
+def criar_cliente_nubank(extrato_falso=None):
+    if extrato_falso:
+        from integracao.nubank_falso import NubankFalso
+        return NubankFalso.de_arquivo(extrato_falso)
+    from integracao.nubank_api import conectar_nubank
+    return conectar_nubank()
+
+
+def executar_rodada(armazenamento, criar_nubank):
+    """
+    Executa uma rodada com trava e registra falhas no progresso. Retorna as transações adicionadas
+    (None se outra rodada já estava em andamento ou se houve erro).
+    """
+    nome = armazenamento.nome
+    if not _adquirir_trava(nome):
+        logger.info("Sincronização de %s já está em andamento.", nome)
+        return None
+    iniciar_rodada("Sincronização Nubank")
+    try:
+        publicar_progresso(nome, estado="executando", etapa="Conectando ao Nubank", mensagem="")
+        with medir("nubank.conexao"):
+            nu = criar_nubank()
+        adicionadas = sincronizar_nubank(nu, armazenamento)
+        logger.info("Sincronização de %s: %s transação(ões) adicionada(s).", nome, adicionadas)
+        return adicionadas
+    except Exception as e:
+        logger.exception("Sincronização de %s falhou.", nome)
+        publicar_progresso(nome, estado="erro", etapa="Erro", mensagem=str(e))
+        return None
+    finally:
+        # Tempos da rodada ficam no progresso, para o painel de desempenho do app
+        rodada = finalizar_rodada()
+        publicar_progresso(nome, desempenho={chave: rodada[chave] for chave in ("duracao", "etapas", "chamadas_api", "bytes_recebidos")})
+        _liberar_trava(nome)
+
+
+def executar_periodicamente(armazenamento, criar_nubank, intervalo=INTERVALO_SINCRONIZACAO):
+    """
+    Agendador simples: uma rodada a cada `intervalo` segundos (descontando a duração da rodada).
+    """
+    while True:
+        inicio = time.monotonic()
+        executar_rodada(armazenamento, criar_nubank)
+        espera = max(0, intervalo - (time.monotonic() - inicio))
+        publicar_progresso(armazenamento.nome, proxima_execucao=time.time() + espera)
+        time.sleep(espera)
+
+
+def iniciar_em_segundo_plano(nome_armazenamento, tipo, nome_planilha=NOME_PLANILHA):
+    """
+    Dispara uma rodada em outro processo (sem bloquear o Streamlit). Retorna False se já houver uma em andamento.
+    """
+    if sincronizacao_em_andamento(nome_armazenamento):
+        return False
+    publicar_progresso(nome_armazenamento, estado="executando", etapa="Iniciando", processadas=0, total=0, adicionadas=0, mensagem="")
+    subprocess.Popen(
+        [sys.executable, "-m", "integracao.sincronizador", "--uma-vez", "--armazenamento", tipo, "--planilha", nome_planilha],
+        cwd=DIR_PROJETO,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    return True
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Sincroniza as transações do Nubank com o armazenamento do Controle Financeiro.")
+    parser.add_argument("--planilha", default=NOME_PLANILHA, help="Nome da planilha no Google Sheets")
+    parser.add_argument("--armazenamento", default=os.environ.get("ARMAZENAMENTO", "planilha"), choices=["planilha", "local"])
+    parser.add_argument("--uma-vez", action="store_true", help="Executa uma única rodada e sai")
+    parser.add_argument("--intervalo", type=int, default=INTERVALO_SINCRONIZACAO, help="Segundos entre rodadas no modo agendado")
+    parser.add_argument("--extrato-falso", help="Arquivo JSON com um extrato para testes (não acessa o Nubank)")
+    args = parser.parse_args(argumentos)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Sem chave.json, credenciais expiradas ou sem rede o processo terminaria sem avisar ninguém
+    # (o app o inicia sem stdout/stderr): a falha vai para o progresso, que o painel lateral mostra
+    from armazenamento.base import nome_armazenamento
+    nome = nome_armazenamento(args.armazenamento, args.planilha)
+    try:
+        armazenamento = criar_armazenamento_sincronizacao(args.armazenamento, args.planilha)
+    except Exception as e:
+        logger.exception("Não foi possível abrir o armazenamento %s.", nome)
+        publicar_progresso(nome, estado="erro", etapa="Erro", mensagem=f"Não foi possível abrir o armazenamento: {e}")
+        return 1
+
+    def criar_nubank():
+        return criar_cliente_nubank(args.extrato_falso)
+
+    if args.uma_vez:
+        return 0 if executar_rodada(armazenamento, criar_nubank) is not None else 1
+    executar_periodicamente(armazenamento, criar_nubank, args.intervalo)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Configuração dos testes: caches locais em uma pasta temporária e a planilha em memória dos benchmarks
+(benchmarks/planilha_falsa.py) no lugar do Google Sheets.
+
+Uso (da raiz do projeto):
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+DIR_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIR_PROJETO)
+os.environ.setdefault("CACHE_LOCAL", tempfile.mkdtemp(prefix="testes_cache_"))
+
+import pytest
+import ambiente.agendador
+from ambiente.agendador import AgendadorRequisicoes
+from benchmarks.planilha_falsa import ClienteFalso
+from funcoes.modelo import COLUNAS_TRANSACOES
+
+# A planilha falsa não tem cota: o agendador do processo não deve atrasar os testes
+ambiente.agendador.agendador = AgendadorRequisicoes(leituras_por_minuto=10**9, escritas_por_minuto=10**9)
+
+
+@pytest.fixture
+def cliente():
+    return ClienteFalso()
+
+
+@pytest.fixture
+def nome_planilha(request):
+    # Os caches do processo (memória e disco) são por nome de planilha: cada teste usa a sua
+    return f"teste_{request.node.name}"
+
+
+@pytest.fixture
+def planilha(cliente, nome_planilha):
+    planilha = cliente.criar_planilha(nome_planilha)
+    planilha.adicionar_aba("Transações", [COLUNAS_TRANSACOES])
+    for titulo in ("Receitas", "Despesas", "Análise de Gastos"):
+        planilha.adicionar_aba(titulo)
+    return planilha
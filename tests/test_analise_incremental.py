@@ -0,0 +1,46 @@
+from armazenamento.planilha import ArmazenamentoPlanilha
+from benchmarks.dados_sinteticos import gerar_livro
+from funcoes.analise_incremental import CABECALHO_ANALISE, ordem_cronologica
+from funcoes.cache_transacoes import invalidar_cache
+
+
+def _publicar(armazenamento):
+    analise_df, meses = armazenamento.agregar_gastos()
+    return analise_df, meses, armazenamento.publicar_analise(analise_df)
+
+
+def test_tabela_em_ordem_cronologica():
+    meses = ["01/2025", "12/2024", "02/2024", "11/2025"]
+    assert sorted(meses, key=ordem_cronologica) == ["02/2024", "12/2024", "01/2025", "11/2025"]
+
+
+def test_mes_novo_grava_so_as_linhas_novas(cliente, planilha, nome_planilha):
+    # Livro de 2019 a 2023: a transação nova (01/2024) viria antes de 12/2023 em ordem de texto
+    planilha.abas["Transações"].linhas.extend(gerar_livro(2_000))
+    armazenamento = ArmazenamentoPlanilha(cliente, nome_planilha)
+    analise_df, _, gravadas = _publicar(armazenamento)
+    assert gravadas == len(analise_df)
+
+    planilha.abas["Transações"].linhas.append(["15-01-2024", "Padaria Pão Quente", "12,34", "Pix", "Alimentação", "Despesa"])
+    invalidar_cache(nome_planilha)
+    analise_df, meses, gravadas = _publicar(armazenamento)
+
+    assert meses == {"01/2024"}
+    assert gravadas == 1
+    assert analise_df.iloc[-1].tolist()[:2] == ["01/2024", "Alimentação"]
+    assert planilha.abas["Análise de Gastos"].linhas == [CABECALHO_ANALISE] + analise_df.values.tolist()
+
+
+def test_mes_existente_grava_so_as_linhas_do_mes(cliente, planilha, nome_planilha):
+    planilha.abas["Transações"].linhas.extend(gerar_livro(2_000))
+    armazenamento = ArmazenamentoPlanilha(cliente, nome_planilha)
+    _publicar(armazenamento)
+
+    planilha.abas["Transações"].linhas.append(["10-06-2021", "Uber *Trip", "150,00", "Pix", "Transporte", "Despesa"])
+    invalidar_cache(nome_planilha)
+    analise_df, meses, gravadas = _publicar(armazenamento)
+
+    # Mudam o total da categoria e os percentuais das outras categorias do mesmo mês, e nada fora dele
+    assert meses == {"06/2021"}
+    assert 0 < gravadas <= (analise_df["Mês/Ano"] == "06/2021").sum()
+    assert planilha.abas["Análise de Gastos"].linhas == [CABECALHO_ANALISE] + analise_df.values.tolist()
@@ -0,0 +1,59 @@
+import threading
+import time
+import pandas as pd
+from benchmarks.dados_sinteticos import gerar_livro
+from funcoes.cache_transacoes import carregar_transacoes, invalidar_cache, versao_cache
+
+
+def test_sincronizacao_incremental_igual_a_carga_completa(cliente, planilha, nome_planilha):
+    livro = gerar_livro(1_000)
+    aba = planilha.abas["Transações"]
+    aba.linhas.extend(livro[:900])
+    carregar_transacoes(cliente, nome_planilha)
+    versao = versao_cache(nome_planilha)
+
+    aba.linhas.extend(livro[900:])
+    invalidar_cache(nome_planilha)
+    incremental = carregar_transacoes(cliente, nome_planilha)
+
+    # Só as linhas novas foram buscadas: a carga completa anterior continua valendo
+    assert versao_cache(nome_planilha) == versao
+    completa = carregar_transacoes(cliente, nome_planilha, forcar=True)
+    assert len(incremental) == 1_000
+    # As categorias acumuladas ficam na ordem de chegada; o conteúdo tem de ser o mesmo
+    pd.testing.assert_frame_equal(incremental, completa, check_categorical=False)
+
+
+def test_copia_recente_nao_espera_busca_em_andamento(cliente, planilha, nome_planilha):
+    planilha.abas["Transações"].linhas.extend(gerar_livro(100))
+    carregar_transacoes(cliente, nome_planilha)
+
+    # Outra sessão relendo a aba inteira devagar (ex.: retomada do diário com forcar=True)
+    planilha.latencia = 0.5
+    busca = threading.Thread(target=carregar_transacoes, args=(cliente, nome_planilha), kwargs={"forcar": True})
+    busca.start()
+    time.sleep(0.1)
+
+    inicio = time.perf_counter()
+    df = carregar_transacoes(cliente, nome_planilha)
+    assert time.perf_counter() - inicio < 0.2
+    assert len(df) == 100
+    busca.join()
+
+
+def test_escrita_durante_a_busca_deixa_o_cache_sujo(cliente, planilha, nome_planilha, monkeypatch):
+    aba = planilha.abas["Transações"]
+    livro = gerar_livro(10)
+    aba.linhas.extend(livro[:5])
+    ler_aba = aba.get_all_values
+
+    def ler_e_receber_escrita():
+        # A resposta sai antes da escrita de outra sessão, que invalida o cache com a leitura ainda em andamento
+        dados = ler_aba()
+        aba.linhas.extend(livro[5:])
+        invalidar_cache(nome_planilha)
+        return dados
+
+    monkeypatch.setattr(aba, "get_all_values", ler_e_receber_escrita)
+    assert len(carregar_transacoes(cliente, nome_planilha)) == 5
+    assert len(carregar_transacoes(cliente, nome_planilha)) == 10
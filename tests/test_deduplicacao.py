@@ -0,0 +1,59 @@
+from armazenamento.planilha import ArmazenamentoPlanilha
+from funcoes.deduplicacao import impressoes_digitais
+from funcoes.modelo import tabela_de_linhas
+from integracao.nubank_falso import NubankFalso
+from integracao.sincronizador import gravar_checkpoint, ler_checkpoint, sincronizar_nubank
+
+# Linha gravada pela sincronização antiga do Nubank (data ISO, valor com "R$")
+LINHA_LEGADA = ["2024-01-15", "UBER", "R$ 12,34", "Nubank", "Transporte", "Despesa"]
+
+EXTRATO = [
+    {"id": "a1", "time": "2024-01-15T10:30:00.000000Z", "title": "UBER", "amount": -1234},
+    {"id": "a2", "time": "2024-01-20T08:00:00.000000Z", "title": "Padaria Pão Quente", "amount": -850},
+    {"id": "a3", "time": "2024-02-01T12:00:00.000000Z", "title": "Salário", "amount": 500000}
+]
+
+
+def test_data_iso_legada_e_convertida():
+    df = tabela_de_linhas([LINHA_LEGADA, ["15-01-2024", "UBER", "12,34", "Nubank", "Transporte", "Despesa"], ["", "X", "1,00", "", "", ""]])
+    assert df["Data"].dt.strftime("%Y-%m-%d").tolist()[:2] == ["2024-01-15", "2024-01-15"]
+    assert df["Data"].isna().tolist() == [False, False, True]
+    # Mesma impressão digital nos dois formatos de data da planilha
+    impressoes = impressoes_digitais(df["Data"], df["Valor"], df["Descrição"], df["Tipo"])
+    assert impressoes[0] == impressoes[1]
+
+
+def test_estorno_nao_colide_com_a_compra():
+    datas = ["2024-03-10"] * 4
+    descricoes = ["Loja X"] * 4
+    # Compra, estorno como Receita (Nubank), estorno como Despesa negativa (CSV) e outra compra igual
+    impressoes = impressoes_digitais(datas, [5000, 5000, -5000, 5000], descricoes, ["Despesa", "Receita", "Despesa", "Despesa"])
+    assert impressoes[0] != impressoes[1]
+    assert impressoes[1] == impressoes[2]
+    assert impressoes[0] == impressoes[3]
+
+
+def test_estorno_do_nubank_e_gravado(cliente, planilha, nome_planilha):
+    extrato = [
+        {"id": "b1", "time": "2024-03-10T10:00:00.000000Z", "title": "Loja X", "amount": -5000},
+        {"id": "b2", "time": "2024-03-10T15:00:00.000000Z", "title": "Loja X", "amount": 5000}
+    ]
+    armazenamento = ArmazenamentoPlanilha(cliente, nome_planilha)
+    assert sincronizar_nubank(NubankFalso(extrato), armazenamento) == 2
+    assert armazenamento.listar_transacoes()["Tipo"].astype(str).tolist() == ["Despesa", "Receita"]
+
+
+def test_reimportacao_do_nubank_nao_duplica(cliente, planilha, nome_planilha):
+    aba = planilha.abas["Transações"]
+    aba.linhas.append(LINHA_LEGADA)
+    armazenamento = ArmazenamentoPlanilha(cliente, nome_planilha)
+
+    # A transação já gravada no formato antigo é reconhecida; só as outras duas entram
+    assert sincronizar_nubank(NubankFalso(EXTRATO), armazenamento) == 2
+    assert len(aba.linhas) == 4
+
+    # Checkpoint perdido: o extrato inteiro volta a ser verificado e nada é gravado de novo
+    gravar_checkpoint(nome_planilha, {**ler_checkpoint(nome_planilha), "ultima_transacao": None})
+    assert sincronizar_nubank(NubankFalso(EXTRATO), armazenamento) == 0
+    assert len(aba.linhas) == 4
+    assert len(armazenamento.listar_transacoes()) == 3
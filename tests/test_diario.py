@@ -0,0 +1,99 @@
+import json
+import pytest
+from armazenamento.diario import DiarioTransacoes
+from armazenamento.planilha import ArmazenamentoPlanilha
+from benchmarks.dados_sinteticos import gerar_livro
+
+
+class Queda(Exception):
+    """
+    Processo interrompido no meio do envio.
+    """
+
+
+@pytest.fixture
+def armazenamento(cliente, planilha, nome_planilha):
+    return ArmazenamentoPlanilha(cliente, nome_planilha)
+
+
+def _registros(diario):
+    with open(diario.caminho, "r", encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo]
+
+
+def test_registra_e_envia(armazenamento, planilha):
+    diario = DiarioTransacoes(armazenamento)
+    diario.registrar(gerar_livro(3))
+    assert diario.transacoes_pendentes == 3
+    assert len(planilha.abas["Transações"].linhas) == 1
+
+    assert diario.descarregar() == 3
+    assert diario.transacoes_pendentes == 0
+    assert len(armazenamento.listar_transacoes()) == 3
+    assert [list(registro) for registro in _registros(diario)][-2:] == [["envio", "posicao"], ["confirmado"]]
+
+
+def test_queda_depois_da_gravacao_nao_reenvia(armazenamento, planilha, monkeypatch):
+    diario = DiarioTransacoes(armazenamento)
+    diario.registrar(gerar_livro(5))
+
+    # As linhas chegam à planilha, mas o processo cai antes de anotar a confirmação
+    def cair(ids):
+        raise Queda()
+
+    monkeypatch.setattr(diario, "_confirmar", cair)
+    with pytest.raises(Queda):
+        diario.descarregar()
+    assert len(planilha.abas["Transações"].linhas) == 6
+
+    # Retomada a partir do arquivo: o lote já está na aba e só é confirmado
+    retomado = DiarioTransacoes(armazenamento)
+    assert retomado.transacoes_pendentes == 5
+    assert retomado.descarregar() == 0
+    assert retomado.transacoes_pendentes == 0
+    assert len(planilha.abas["Transações"].linhas) == 6
+    assert DiarioTransacoes(armazenamento).transacoes_pendentes == 0
+
+
+def test_queda_antes_da_gravacao_reenvia_uma_vez(armazenamento, planilha, monkeypatch):
+    diario = DiarioTransacoes(armazenamento)
+    diario.registrar(gerar_livro(5))
+
+    # O registro "envio" é gravado, mas a requisição nunca chega à planilha
+    def cair(linhas):
+        raise Queda()
+
+    monkeypatch.setattr(armazenamento, "adicionar_transacoes", cair)
+    with pytest.raises(Queda):
+        diario.descarregar()
+    monkeypatch.undo()
+    assert len(planilha.abas["Transações"].linhas) == 1
+
+    retomado = DiarioTransacoes(armazenamento)
+    assert retomado.descarregar() == 5
+    assert DiarioTransacoes(armazenamento).descarregar() == 0
+    assert len(planilha.abas["Transações"].linhas) == 6
+
+
+def test_registro_incompleto_descartado(armazenamento):
+    diario = DiarioTransacoes(armazenamento)
+    diario.registrar(gerar_livro(2))
+    with open(diario.caminho, "ab") as arquivo:
+        arquivo.write(b'{"registro": "abc", "linha": ["01-01')
+
+    retomado = DiarioTransacoes(armazenamento)
+    assert retomado.transacoes_pendentes == 2
+    # O próximo registro não fica colado no pedaço descartado
+    retomado.registrar(gerar_livro(1))
+    assert DiarioTransacoes(armazenamento).transacoes_pendentes == 3
+
+
+def test_envio_a_cada_n_transacoes(armazenamento, planilha):
+    diario = DiarioTransacoes(armazenamento)
+    diario.registrar(gerar_livro(2))
+    assert diario.descarregar(minimo=3) == 0
+    assert len(planilha.abas["Transações"].linhas) == 1
+
+    diario.registrar(gerar_livro(1, semente=7))
+    assert diario.descarregar(minimo=3) == 3
+    assert len(planilha.abas["Transações"].linhas) == 4
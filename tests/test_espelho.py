@@ -0,0 +1,61 @@
+import pytest
+from armazenamento.espelho import espelhar_pendentes
+from armazenamento.local import ArmazenamentoLocal
+from armazenamento.planilha import ArmazenamentoPlanilha
+from benchmarks.dados_sinteticos import gerar_livro
+
+
+class Queda(Exception):
+    """
+    Processo interrompido no meio do envio.
+    """
+
+
+@pytest.fixture
+def armazenamento(cliente, planilha, nome_planilha):
+    return ArmazenamentoPlanilha(cliente, nome_planilha)
+
+
+@pytest.fixture
+def caminho_banco(tmp_path):
+    return str(tmp_path / "transacoes.db")
+
+
+def test_espelho_queda_depois_da_gravacao_nao_reenvia(armazenamento, planilha, caminho_banco, nome_planilha, monkeypatch):
+    local = ArmazenamentoLocal(caminho_banco, nome_planilha)
+    local.adicionar_transacoes(gerar_livro(5))
+
+    # As linhas chegam à planilha, mas o processo cai antes de marcá-las como espelhadas
+    def cair(ids):
+        raise Queda()
+
+    monkeypatch.setattr(local, "marcar_espelhadas", cair)
+    with pytest.raises(Queda):
+        espelhar_pendentes(local, armazenamento)
+    assert len(planilha.abas["Transações"].linhas) == 6
+
+    # Retomada a partir do banco: o lote já está na aba e só é confirmado
+    retomado = ArmazenamentoLocal(caminho_banco, nome_planilha)
+    assert espelhar_pendentes(retomado, armazenamento) == 0
+    assert retomado.pendentes_espelho() == ([], [])
+    assert len(planilha.abas["Transações"].linhas) == 6
+
+
+def test_espelho_queda_antes_da_gravacao_reenvia_uma_vez(armazenamento, planilha, caminho_banco, nome_planilha, monkeypatch):
+    local = ArmazenamentoLocal(caminho_banco, nome_planilha)
+    local.adicionar_transacoes(gerar_livro(5))
+
+    # O lote é anotado, mas a requisição nunca chega à planilha
+    def cair(linhas):
+        raise Queda()
+
+    monkeypatch.setattr(armazenamento, "adicionar_transacoes", cair)
+    with pytest.raises(Queda):
+        espelhar_pendentes(local, armazenamento)
+    monkeypatch.undo()
+    assert len(planilha.abas["Transações"].linhas) == 1
+
+    retomado = ArmazenamentoLocal(caminho_banco, nome_planilha)
+    assert espelhar_pendentes(retomado, armazenamento) == 5
+    assert espelhar_pendentes(retomado, armazenamento) == 0
+    assert len(planilha.abas["Transações"].linhas) == 6